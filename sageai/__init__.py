@@ -1 +1,2 @@
+from sageai.async_sageai import AsyncSageAI
 from sageai.sageai import SageAI
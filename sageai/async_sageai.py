@@ -0,0 +1,471 @@
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
+
+from sageai.base_sageai import BaseSageAI
+from sageai.services.async_openai_service import AsyncOpenAIService
+from sageai.services.function_watcher_service import FunctionWatcherService
+from sageai.types.function import Function
+from sageai.types.function_timeout_error import FunctionTimeoutError
+from sageai.types.stage import Stage
+from sageai.types.stream_event_type import StreamEventType
+from sageai.utils.batch_utilities import ResultsBuffer, iter_batches
+from sageai.utils.logger import get_logger
+from sageai.utils.stream_utilities import StreamedFunctionCalls
+
+__all__ = ["AsyncSageAI"]
+
+
+class AsyncSageAI(BaseSageAI):
+    """asyncio-native SageAI. Embeddings, search and completions are awaited on
+    the event loop, `async def` functions are awaited directly and sync
+    functions run in a worker thread so they never block the loop.
+    """
+
+    vectordb_config_key = "async_vectordb"
+
+    def init_services(self):
+        self.openai = AsyncOpenAIService()
+        self.vectordb = self.config.async_vectordb()
+        self.logger = get_logger("AsyncSageAI", self.config.log_level)
+
+        self.watcher = None
+        self.watch_task: Optional[asyncio.Task] = None
+        self.watch_pending = False
+        if self.config.watch:
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                # The watcher runs on the event loop, so it starts with the
+                # first `aindex`, `achat` or `achat_many`.
+                self.watch_pending = True
+            else:
+                self.start_watching()
+
+    async def aindex(self):
+        self.start_pending_watcher()
+        await self.vectordb.index()
+
+    def start_watching(self):
+        """Hot reloads functions added, changed or removed in the functions
+        directory, re-embedding only those functions. The watcher is a task of
+        the running event loop."""
+        self.watch_pending = False
+        if self.watch_task is not None and not self.watch_task.done():
+            return
+        loop = asyncio.get_running_loop()
+        if self.watcher is None:
+            self.watcher = FunctionWatcherService(
+                self.config.functions_directory,
+                interval=self.config.watch_interval,
+                logger=self.logger,
+            )
+        self.watch_task = loop.create_task(self.watch_functions())
+
+    def start_pending_watcher(self):
+        if self.watch_pending:
+            self.start_watching()
+
+    def stop_watching(self):
+        self.watch_pending = False
+        if self.watch_task is not None:
+            self.watch_task.cancel()
+            self.watch_task = None
+
+    async def watch_functions(self):
+        while True:
+            await asyncio.sleep(self.watcher.interval)
+            try:
+                changed, removed = await asyncio.to_thread(self.watcher.get_changes)
+                if len(changed) > 0 or len(removed) > 0:
+                    await self.areload_functions(changed=changed, removed=removed)
+            except Exception as e:
+                self.logger.error(f"Failed to reload functions: {e}")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+    async def areload_functions(self, *, changed: List[str], removed: List[str]):
+        """Async `SageAI.reload_functions`. Function files are imported in a
+        worker thread so the event loop isn't blocked."""
+        function_map = self.function_map
+        new_function_map, changed_names, removed_names = await asyncio.to_thread(
+            self.load_changed_functions, function_map, changed=changed, removed=removed
+        )
+        self.swap_function_map(
+            function_map, new_function_map, changed_names, removed_names
+        )
+        await self.vectordb.reindex_functions(
+            changed=changed_names, removed=removed_names
+        )
+        self.log_reload(changed_names, removed_names)
+
+    async def achat(
+        self, *args, **kwargs
+    ) -> Union[Dict[str, Any], AsyncIterator[Dict[str, Any]]]:
+        self.start_pending_watcher()
+        merged, top_n, query = self.prepare_chat_args(args, kwargs)
+        return await self.acomplete_chat(
+            merged, top_n=top_n, query=query, function_map=self.function_map
+        )
+
+    async def acomplete_chat(
+        self,
+        merged: Dict[str, Any],
+        *,
+        top_n: int,
+        query: str,
+        function_map: Dict[str, Function],
+        top_functions: Optional[List[Dict[str, Any]]] = None,
+    ) -> Union[Dict[str, Any], AsyncIterator[Dict[str, Any]]]:
+        """Runs a chat with prepared arguments. `top_functions` skips retrieval
+        when the functions were already retrieved, e.g. by `achat_many`."""
+        stream = merged.pop("stream", False)
+        if stream:
+            return self.astream_chat(
+                merged,
+                top_n=top_n,
+                query=query,
+                function_map=function_map,
+                top_functions=top_functions,
+            )
+
+        with self.hooks.stage(Stage.CHAT, model=merged.get("model")):
+            query_embedding, context = None, None
+            if self.use_semantic_cache(stream):
+                query_embedding = await self.aget_query_embedding(query)
+                context = self.get_semantic_cache_context(merged)
+                entry = self.lookup_semantic_cache(
+                    query_embedding,
+                    model=merged["model"],
+                    context=context,
+                    function_map=function_map,
+                )
+                if entry is not None:
+                    function_response = entry.result
+                    if function_response is None:
+                        function_response = await self.arun_function(
+                            name=entry.name, args=entry.args, function_map=function_map
+                        )
+                    return self.format_semantic_cache_response(entry, function_response)
+
+            if top_functions is None:
+                top_functions = await self.aget_top_n_functions(
+                    query=query, top_n=top_n, function_map=function_map
+                )
+
+            function_tokens = self.get_function_tokens(top_functions, function_map)
+            if self.config.use_tools:
+                tool_calls = await self.acall_openai_tools(
+                    merged, top_functions, function_tokens=function_tokens
+                )
+                function_responses = await self.arun_functions(
+                    tool_calls, function_map=function_map
+                )
+                response = self.format_tool_calls_response(
+                    tool_calls, function_responses
+                )
+            else:
+                function_name, function_args = await self.acall_openai(
+                    merged, top_functions, function_tokens=function_tokens
+                )
+                function_response = await self.arun_function(
+                    name=function_name, args=function_args, function_map=function_map
+                )
+                response = self.format_chat_response(
+                    function_name, function_args, function_response
+                )
+                if query_embedding is not None:
+                    self.store_semantic_cache(
+                        query_embedding,
+                        query=query,
+                        model=merged["model"],
+                        context=context,
+                        function_map=function_map,
+                        function_name=function_name,
+                        function_args=function_args,
+                        function_response=function_response,
+                    )
+
+            response["function_tokens"] = function_tokens
+            return response
+
+    async def achat_many(
+        self,
+        conversations: Iterable[Dict[str, Any]],
+        *,
+        concurrency: int = 8,
+        ordered: bool = True,
+        batch_size: Optional[int] = None,
+        **kwargs,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Async counterpart of `SageAI.chat_many`, running up to `concurrency`
+        completions as tasks on the event loop."""
+        if concurrency < 1:
+            raise Exception("Concurrency must be at least 1.")
+        self.start_pending_watcher()
+        function_map = self.function_map
+        batch_size = batch_size or self.config.embeddings_batch_size
+        buffer = ResultsBuffer(ordered=ordered)
+        pending: Dict[asyncio.Task, int] = {}
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def complete(merged, top_n, query, functions):
+            async with semaphore:
+                return await self.acomplete_chat(
+                    merged,
+                    top_n=top_n,
+                    query=query,
+                    function_map=function_map,
+                    top_functions=functions,
+                )
+
+        async def wait_pending(max_pending: int):
+            while len(pending) > max_pending:
+                done, _ = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    index = pending.pop(task)
+                    try:
+                        result = self.format_batch_result(index, response=task.result())
+                    except Exception as e:
+                        result = self.format_batch_result(index, error=e)
+                    buffer.add(result)
+
+        try:
+            for batch in iter_batches(conversations, batch_size):
+                prepared, failed = self.prepare_chat_batch(batch, kwargs)
+                for result in failed:
+                    buffer.add(result)
+
+                for top_n, conversations_by_index in prepared.items():
+                    try:
+                        top_functions = await self.vectordb.search_impl_batch(
+                            queries=[
+                                query for _, query in conversations_by_index.values()
+                            ],
+                            top_n=top_n,
+                            function_map=function_map,
+                        )
+                    except Exception as e:
+                        for index in conversations_by_index:
+                            buffer.add(self.format_batch_result(index, error=e))
+                        continue
+
+                    for (index, (merged, query)), functions in zip(
+                        conversations_by_index.items(), top_functions
+                    ):
+                        task = asyncio.create_task(
+                            complete(merged, top_n, query, functions)
+                        )
+                        pending[task] = index
+
+                await wait_pending(concurrency)
+                for result in buffer.pop_ready():
+                    yield result
+
+            await wait_pending(0)
+            for result in buffer.pop_ready():
+                yield result
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def aget_query_embedding(self, query: str) -> List[float]:
+        embedder = self.semantic_cache_embedder
+        if getattr(self.vectordb, "embedder", None) is embedder:
+            return await self.vectordb.get_query_embedding(query, embedder.aembed_query)
+        return await embedder.aembed_query(query)
+
+    async def aget_top_n_functions(
+        self,
+        *,
+        query: str,
+        top_n: int,
+        function_map: Optional[Dict[str, Function]] = None,
+    ):
+        return await self.vectordb.search_impl(
+            query=query, top_n=top_n, function_map=function_map
+        )
+
+    async def acall_openai(
+        self,
+        openai_args: Dict[str, Any],
+        top_functions: list[Dict[str, Any]],
+        *,
+        function_tokens: Optional[int] = None,
+    ) -> Tuple[str, Dict[str, Any]]:
+        with self.hooks.stage(Stage.COMPLETION, model=openai_args.get("model")):
+            openai_result = await self.openai.chat(
+                **openai_args,
+                functions=top_functions,
+                function_tokens=function_tokens,
+            )
+
+        if not openai_result.function_call:
+            raise Exception("No function call found in OpenAI response.")
+
+        function_name = openai_result.function_call.name
+        with self.hooks.stage(Stage.PARSE_ARGUMENTS, function=function_name):
+            function_args = json.loads(openai_result.function_call.arguments)
+        return function_name, function_args
+
+    async def astream_chat(
+        self,
+        openai_args: Dict[str, Any],
+        *,
+        top_n: int,
+        query: str,
+        function_map: Dict[str, Function],
+        top_functions: Optional[List[Dict[str, Any]]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Streams a chat with prepared arguments. The `CHAT` stage spans
+        producing the stream, so retrieval only runs, and raises, once iteration
+        starts. It is paused while the consumer holds an event."""
+        with self.hooks.stage(
+            Stage.CHAT, model=openai_args.get("model"), stream=True
+        ) as chat:
+            if top_functions is None:
+                top_functions = await self.aget_top_n_functions(
+                    query=query, top_n=top_n, function_map=function_map
+                )
+            async for event in self.astream_completion(
+                openai_args, top_functions, function_map=function_map
+            ):
+                with chat.paused():
+                    yield event
+
+    async def astream_completion(
+        self,
+        openai_args: Dict[str, Any],
+        top_functions: List[Dict[str, Any]],
+        function_map: Dict[str, Function],
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Streams the completion and yields progress events. Each function call
+        is validated and dispatched as soon as its arguments are complete, while
+        the rest of the completion is still streaming."""
+        function_tokens = self.get_function_tokens(top_functions, function_map)
+        streamed_calls = StreamedFunctionCalls(hooks=self.hooks)
+        tasks: Dict[int, asyncio.Future] = {}
+        results: Dict[int, Dict[str, Any]] = {}
+
+        def dispatch(event: Dict[str, Any]):
+            if "error" in event:
+                task = asyncio.get_running_loop().create_future()
+                task.set_result(dict(error=event["error"]))
+            else:
+                task = asyncio.create_task(
+                    self.arun_function(
+                        name=event["name"],
+                        args=event["args"],
+                        function_map=function_map,
+                    )
+                )
+            tasks[event["index"]] = task
+
+        async def collect_results(wait: bool) -> AsyncIterator[Dict[str, Any]]:
+            while True:
+                pending = {
+                    task: index for index, task in tasks.items() if index not in results
+                }
+                if wait and len(pending) > 0:
+                    done, _ = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                else:
+                    done = [task for task in pending if task.done()]
+
+                for task in done:
+                    index = pending[task]
+                    results[index] = task.result()
+                    yield self.format_result_event(
+                        index, streamed_calls.calls[index], results[index]
+                    )
+                if not wait or len(pending) == 0:
+                    return
+
+        # The stage spans the stream, paused while the events are consumed.
+        with self.hooks.stage(
+            Stage.COMPLETION, model=openai_args.get("model"), stream=True
+        ) as completion:
+            async for delta in self.openai.stream_chat(
+                **openai_args,
+                **self.get_function_args(top_functions),
+                function_tokens=function_tokens,
+            ):
+                for event in streamed_calls.feed(delta):
+                    with completion.paused():
+                        yield event
+                    if event["type"] == StreamEventType.ARGUMENTS_COMPLETE:
+                        dispatch(event)
+                async for event in collect_results(wait=False):
+                    with completion.paused():
+                        yield event
+
+        for event in streamed_calls.finish():
+            yield event
+            dispatch(event)
+        async for event in collect_results(wait=True):
+            yield event
+
+        response = self.format_streamed_response(
+            streamed_calls.ordered_calls(),
+            [results[index] for index in sorted(results)],
+        )
+        response["function_tokens"] = function_tokens
+        yield dict(type=StreamEventType.DONE, response=response)
+
+    async def acall_openai_tools(
+        self,
+        openai_args: Dict[str, Any],
+        top_functions: List[Dict[str, Any]],
+        *,
+        function_tokens: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        with self.hooks.stage(Stage.COMPLETION, model=openai_args.get("model")):
+            openai_result = await self.openai.chat(
+                **openai_args,
+                tools=self.format_tools(top_functions),
+                function_tokens=function_tokens,
+            )
+        with self.hooks.stage(Stage.PARSE_ARGUMENTS):
+            return self.parse_tool_calls(openai_result)
+
+    async def arun_functions(
+        self,
+        tool_calls: List[Dict[str, Any]],
+        function_map: Optional[Dict[str, Function]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Runs tool calls concurrently and returns their results in call order."""
+
+        async def run_tool_call(tool_call: Dict[str, Any]) -> Dict[str, Any]:
+            if "error" in tool_call:
+                return dict(error=tool_call["error"])
+            return await self.arun_function(
+                name=tool_call["name"],
+                args=tool_call["args"],
+                function_map=function_map,
+            )
+
+        return list(await asyncio.gather(*map(run_tool_call, tool_calls)))
+
+    async def arun_function(
+        self,
+        *,
+        name: str,
+        args: Dict[str, Any],
+        function_map: Optional[Dict[str, Function]] = None,
+    ) -> Dict[str, Any]:
+        try:
+            if function_map is None:
+                function_map = self.function_map
+            with self.hooks.stage(Stage.RUN_FUNCTION, function=name):
+                return await self.memoization.ainvoke(function_map[name], args)
+        except FunctionTimeoutError as e:
+            return dict(error=str(e), error_type=e.error_type)
+        except Exception as e:
+            return dict(error=str(e))
@@ -0,0 +1,466 @@
+import copy
+import hashlib
+import json
+import os
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple, Type, Union
+
+from sageai.config import LogLevel, create_registry, use_registry
+from sageai.services.function_executor_service import FunctionExecutorService
+from sageai.services.manifest_service import ManifestService
+from sageai.services.memoization_service import MemoizationService
+from sageai.services.semantic_cache_service import (
+    SemanticCacheEntry,
+    SemanticCacheService,
+)
+from sageai.types.abstract_async_vectordb import AbstractAsyncVectorDB
+from sageai.types.abstract_embedder import AbstractEmbedder
+from sageai.types.abstract_hooks import AbstractHooks
+from sageai.types.abstract_result_cache import AbstractResultCache
+from sageai.types.abstract_vectordb import AbstractVectorDB
+from sageai.types.execution_mode import ExecutionMode
+from sageai.types.index_mode import IndexMode
+from sageai.types.semantic_cache_mode import SemanticCacheMode
+from sageai.types.stream_event_type import StreamEventType
+from sageai.utils.file_utilities import get_source_mtime, load_function_from_file
+from sageai.utils.openai_utilities import get_latest_user_message
+
+
+class BaseSageAI(ABC):
+    """Configuration and chat plumbing shared by `SageAI` and `AsyncSageAI`."""
+
+    vectordb_config_key = "vectordb"
+
+    def __init__(
+        self,
+        *,
+        openai_key: str,
+        functions_directory: Optional[str] = None,
+        vectordb: Optional[Type[Union[AbstractVectorDB, AbstractAsyncVectorDB]]] = None,
+        openai_base_url: Optional[str] = None,
+        http_max_connections: Optional[int] = None,
+        http_max_keepalive_connections: Optional[int] = None,
+        http_keepalive_expiry: Optional[float] = None,
+        http_timeout: Optional[float] = None,
+        http_connect_timeout: Optional[float] = None,
+        http2: Optional[bool] = None,
+        chat_requests_per_minute: Optional[int] = None,
+        chat_tokens_per_minute: Optional[int] = None,
+        embeddings_requests_per_minute: Optional[int] = None,
+        embeddings_tokens_per_minute: Optional[int] = None,
+        openai_max_concurrency: Optional[int] = None,
+        openai_min_concurrency: Optional[int] = None,
+        embedder: Optional[Type[AbstractEmbedder]] = None,
+        embeddings_model: Optional[str] = None,
+        embeddings_dimension: Optional[int] = None,
+        result_cache: Optional[Type[AbstractResultCache]] = None,
+        hooks: Optional[List[Type[AbstractHooks]]] = None,
+        log_level: Optional[LogLevel] = None,
+        lazy_loading: Optional[bool] = None,
+        manifest_path: Optional[str] = None,
+        watch: Optional[bool] = None,
+        watch_interval: Optional[float] = None,
+        use_tools: Optional[bool] = None,
+        tool_calls_max_workers: Optional[int] = None,
+        function_max_workers: Optional[int] = None,
+        function_timeout: Optional[float] = None,
+        function_max_processes: Optional[int] = None,
+        function_process_start_method: Optional[str] = None,
+        index_mode: Optional[IndexMode] = None,
+        hybrid_search: Optional[bool] = None,
+        lexical_confidence_threshold: Optional[float] = None,
+        function_token_budget: Optional[int] = None,
+        function_budget_candidates: Optional[int] = None,
+        function_min_score: Optional[float] = None,
+        semantic_cache: Optional[bool] = None,
+        semantic_cache_threshold: Optional[float] = None,
+        semantic_cache_ttl: Optional[float] = None,
+        semantic_cache_size: Optional[int] = None,
+        query_embeddings_cache_size: Optional[int] = None,
+        query_embeddings_cache_ttl: Optional[float] = None,
+        embeddings_batch_size: Optional[int] = None,
+        embeddings_concurrency: Optional[int] = None,
+        embeddings_max_retries: Optional[int] = None,
+        embeddings_cache_directory: Optional[str] = None,
+        embeddings_cache_max_size_mb: Optional[int] = None,
+    ):
+        # The parameters left unset keep the defaults of `Config`.
+        config_args = {
+            name: value
+            for name, value in locals().items()
+            if name != "self" and value is not None
+        }
+        if openai_key is None:
+            raise Exception("No OpenAI key provided.")
+        if vectordb is not None:
+            config_args[self.vectordb_config_key] = config_args.pop("vectordb")
+
+        self.registry = create_registry(**config_args)
+        self.config = self.registry.config
+        self.hooks = self.registry.hooks
+        if self.config.semantic_cache and self.config.use_tools:
+            raise Exception("The semantic cache doesn't support use_tools.")
+
+        # Services read the instance's registry while they are created, so
+        # instances with different configs don't clobber each other.
+        with use_registry(self.registry):
+            self.function_executor = FunctionExecutorService.from_config(self.config)
+            # Workers import the process functions once the first one is run.
+            self.function_executor.processes.register(self.function_map)
+            self.memoization = MemoizationService(
+                self.config.result_cache(), self.hooks, self.function_executor
+            )
+            self.init_services()
+            self.semantic_cache = SemanticCacheService.from_config(self.config)
+            self.semantic_cache_embedder = None
+            if self.semantic_cache is not None:
+                # Reuse the vector db's embedder so the query embedding is
+                # shared with its search through the query embeddings cache.
+                self.semantic_cache_embedder = (
+                    getattr(self.vectordb, "embedder", None) or self.config.embedder()
+                )
+
+    @property
+    def function_map(self) -> Dict[str, Any]:
+        """The instance's current function map, swapped on hot reloads."""
+        return self.registry.function_map
+
+    @abstractmethod
+    def init_services(self):
+        """Creates the vector db and the OpenAI service of the instance."""
+        pass
+
+    @abstractmethod
+    def stop_watching(self):
+        pass
+
+    def close(self):
+        """Stops the watcher and shuts down the pools running functions. The
+        instance can't run functions afterwards."""
+        self.stop_watching()
+        self.function_executor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def load_changed_functions(
+        self,
+        function_map: Dict[str, Any],
+        *,
+        changed: List[str],
+        removed: List[str],
+    ) -> Tuple[Dict[str, Any], List[str], List[str]]:
+        """Reloads the function folders in `changed` and drops those in
+        `removed`, returning the new function map and the names of the added or
+        changed and of the removed functions. A function that fails to import
+        keeps its previous version. With lazy loading, the manifest entries of
+        the folders are refreshed, so the next start doesn't rebuild them."""
+        names_by_directory = {
+            os.path.dirname(os.path.abspath(func.source_path)): func_name
+            for func_name, func in function_map.items()
+            if func.source_path is not None
+        }
+
+        new_function_map = dict(function_map)
+        changed_names, removed_names = [], []
+        for dirpath in removed:
+            func_name = names_by_directory.get(dirpath)
+            if func_name is not None:
+                new_function_map.pop(func_name, None)
+                removed_names.append(func_name)
+
+        reloaded = []
+        for dirpath in changed:
+            try:
+                mtime = get_source_mtime(dirpath)
+                function = load_function_from_file(
+                    os.path.basename(dirpath), os.path.join(dirpath, "function.py")
+                )
+            except Exception as e:
+                self.logger.error(f"Failed to load function from {dirpath}: {e}")
+                continue
+            reloaded.append((dirpath, function, mtime))
+
+            previous_name = names_by_directory.get(dirpath)
+            if previous_name is not None and previous_name != function.name:
+                new_function_map.pop(previous_name, None)
+                removed_names.append(previous_name)
+            new_function_map[function.name] = function
+            changed_names.append(function.name)
+
+        if self.config.lazy_loading:
+            try:
+                manifest = ManifestService.from_config(self.config, self.logger)
+                manifest.refresh(reloaded, removed)
+            except Exception as e:
+                self.logger.error(f"Failed to refresh the functions manifest: {e}")
+
+        return dict(sorted(new_function_map.items())), changed_names, removed_names
+
+    def swap_function_map(
+        self,
+        function_map: Dict[str, Any],
+        new_function_map: Dict[str, Any],
+        changed_names: List[str],
+        removed_names: List[str],
+    ):
+        """Swaps in the reloaded function map, and drops what was cached or
+        imported for the previous versions of the reloaded functions."""
+        self.registry.function_map = new_function_map
+        self.vectordb.function_map = new_function_map
+        self.memoization.invalidate(changed_names + removed_names)
+        if self.semantic_cache is not None:
+            self.semantic_cache.invalidate(changed_names + removed_names)
+
+        reloaded = [
+            func
+            for func_name in changed_names + removed_names
+            for func in (function_map.get(func_name), new_function_map.get(func_name))
+            if func is not None
+        ]
+        if any(func.execution_mode == ExecutionMode.PROCESS for func in reloaded):
+            # Workers hold the modules they imported, so stop them.
+            self.function_executor.processes.restart(new_function_map)
+
+    def log_reload(self, changed_names: List[str], removed_names: List[str]):
+        self.logger.info(
+            f"Reloaded functions: {len(changed_names)} added or changed, "
+            f"{len(removed_names)} removed"
+        )
+
+    def prepare_chat_args(
+        self, args: Tuple[Any, ...], kwargs: Dict[str, Any]
+    ) -> Tuple[Dict[str, Any], int, str]:
+        merged = {i: v for i, v in enumerate(args)}
+        merged.update(kwargs)
+
+        top_n = merged.pop("top_n") if "top_n" in merged else None
+
+        if merged.get("model") is None:
+            raise Exception("No model provided.")
+
+        if merged.get("messages") is None:
+            raise Exception("No messages provided.")
+
+        if top_n is None:
+            if self.config.function_token_budget is None:
+                raise Exception("No top_n provided.")
+            top_n = self.config.function_budget_candidates
+
+        latest_user_message = get_latest_user_message(merged.get("messages"))
+        if latest_user_message is None:
+            raise Exception("No user message found.")
+
+        return merged, top_n, latest_user_message["content"]
+
+    def prepare_chat_batch(
+        self, batch: List[Tuple[int, Dict[str, Any]]], defaults: Dict[str, Any]
+    ) -> Tuple[Dict[int, Dict[int, Tuple[Dict[str, Any], str]]], List[Dict[str, Any]]]:
+        """Prepares a batch of `chat_many` conversations, each given as `chat`
+        keyword arguments over `defaults`. Returns the prepared conversations
+        grouped by top_n, as {top_n: {index: (merged, query)}}, and the results
+        of those that failed."""
+        prepared: Dict[int, Dict[int, Tuple[Dict[str, Any], str]]] = {}
+        failed = []
+        for index, conversation in batch:
+            try:
+                merged, top_n, query = self.prepare_chat_args(
+                    (), {**defaults, **conversation}
+                )
+                if merged.get("stream", False):
+                    raise Exception("Streaming is not supported in batch chats.")
+            except Exception as e:
+                failed.append(self.format_batch_result(index, error=e))
+                continue
+            prepared.setdefault(top_n, {})[index] = (merged, query)
+        return prepared, failed
+
+    @staticmethod
+    def format_batch_result(
+        index: int,
+        *,
+        response: Optional[Dict[str, Any]] = None,
+        error: Optional[Exception] = None,
+    ) -> Dict[str, Any]:
+        if error is not None:
+            return dict(index=index, error=str(error))
+        return dict(index=index, response=response)
+
+    def use_semantic_cache(self, stream: bool) -> bool:
+        return self.semantic_cache is not None and not stream
+
+    @staticmethod
+    def get_semantic_cache_context(merged: Dict[str, Any]) -> str:
+        """Hash of what a chat depends on besides its latest user message: the
+        other messages and the request arguments. Cached results are only
+        reused for chats with the same context."""
+        messages = merged["messages"]
+        latest_user_message = get_latest_user_message(messages)
+        context = dict(
+            messages=[
+                message for message in messages if message is not latest_user_message
+            ],
+            kwargs={
+                str(key): value for key, value in merged.items() if key != "messages"
+            },
+        )
+        serialized = json.dumps(context, sort_keys=True, default=repr)
+        return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+    def lookup_semantic_cache(
+        self,
+        query_embedding: List[float],
+        *,
+        model: str,
+        context: str,
+        function_map: Dict[str, Any],
+    ) -> Optional[SemanticCacheEntry]:
+        hit = self.semantic_cache.lookup(
+            query_embedding,
+            model=model,
+            context=context,
+            accept=lambda entry: entry.name in function_map
+            and function_map[entry.name].semantic_cache is not None,
+        )
+        return None if hit is None else hit[0]
+
+    def store_semantic_cache(
+        self,
+        query_embedding: List[float],
+        *,
+        query: str,
+        model: str,
+        context: str,
+        function_map: Dict[str, Any],
+        function_name: str,
+        function_args: Dict[str, Any],
+        function_response: Dict[str, Any],
+    ):
+        """Caches a successful call of a function that opted in to the semantic
+        cache, including its result for `SemanticCacheMode.RESULT`."""
+        function = function_map.get(function_name)
+        if function is None or function.semantic_cache is None:
+            return
+        if "error" in function_response:
+            return
+        self.semantic_cache.store(
+            query_embedding,
+            SemanticCacheEntry(
+                model=model,
+                context=context,
+                query=query,
+                name=function_name,
+                args=copy.deepcopy(function_args),
+                result=copy.deepcopy(function_response)
+                if function.semantic_cache == SemanticCacheMode.RESULT
+                else None,
+                expires_at=self.semantic_cache.get_expires_at(),
+            ),
+        )
+
+    @classmethod
+    def format_semantic_cache_response(
+        cls, entry: SemanticCacheEntry, function_response: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        response = cls.format_chat_response(entry.name, entry.args, function_response)
+        response["function_tokens"] = 0
+        response["cached"] = True
+        return response
+
+    @staticmethod
+    def get_function_tokens(
+        top_functions: List[Dict[str, Any]], function_map: Dict[str, Any]
+    ) -> int:
+        """Prompt tokens spent on the function definitions sent to the model."""
+        return sum(
+            function_map[function["name"]].token_count
+            for function in top_functions
+            if function["name"] in function_map
+        )
+
+    def get_function_args(self, top_functions: List[Dict[str, Any]]) -> Dict[str, Any]:
+        if self.config.use_tools:
+            return dict(tools=self.format_tools(top_functions))
+        return dict(functions=top_functions)
+
+    @staticmethod
+    def format_tools(top_functions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [dict(type="function", function=function) for function in top_functions]
+
+    @staticmethod
+    def parse_tool_calls(openai_result) -> List[Dict[str, Any]]:
+        """Returns the tool calls of a completion message in call order. Calls
+        whose arguments are not valid JSON carry an `error` instead of `args`."""
+        if not openai_result.tool_calls:
+            raise Exception("No tool calls found in OpenAI response.")
+
+        tool_calls = []
+        for tool_call in openai_result.tool_calls:
+            call = dict(id=tool_call.id, name=tool_call.function.name)
+            try:
+                call["args"] = json.loads(tool_call.function.arguments)
+            except json.JSONDecodeError as e:
+                call["args"] = tool_call.function.arguments
+                call["error"] = f"Invalid function arguments: {e}"
+            tool_calls.append(call)
+        return tool_calls
+
+    @classmethod
+    def format_tool_calls_response(
+        cls,
+        tool_calls: List[Dict[str, Any]],
+        function_responses: List[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        return dict(
+            tool_calls=[
+                dict(
+                    id=call["id"],
+                    **cls.format_chat_response(call["name"], call["args"], response),
+                )
+                for call, response in zip(tool_calls, function_responses)
+            ]
+        )
+
+    def format_streamed_response(
+        self,
+        calls: List[Dict[str, Any]],
+        function_responses: List[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        if self.config.use_tools:
+            return self.format_tool_calls_response(calls, function_responses)
+        if len(calls) == 0:
+            raise Exception("No function call found in OpenAI response.")
+        return self.format_chat_response(
+            calls[0]["name"], calls[0]["args"], function_responses[0]
+        )
+
+    @classmethod
+    def format_result_event(
+        cls, index: int, call: Dict[str, Any], function_response: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        return dict(
+            type=StreamEventType.FUNCTION_RESULT,
+            index=index,
+            id=call["id"],
+            **cls.format_chat_response(call["name"], call["args"], function_response),
+        )
+
+    @staticmethod
+    def format_chat_response(
+        function_name: str,
+        function_args: Dict[str, Any],
+        function_response: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        base_return = dict(name=function_name, args=function_args)
+
+        if "error" in function_response:
+            base_return["error"] = function_response["error"]
+            if "error_type" in function_response:
+                base_return["error_type"] = function_response["error_type"]
+        else:
+            base_return["result"] = function_response
+
+        return base_return
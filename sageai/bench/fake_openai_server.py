@@ -0,0 +1,305 @@
+import base64
+import json
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+DEFAULT_DIMENSION = 1536
+MODEL_DIMENSIONS = {"text-embedding-3-large": 3072}
+
+SCHEMA_VALUES = {
+    "string": "bench",
+    "integer": 1,
+    "number": 1.0,
+    "boolean": True,
+    "array": [],
+    "object": {},
+}
+
+
+def embed_text(text: str, dimension: int) -> np.ndarray:
+    """Deterministic embedding hashing each word into a signed slot, so texts
+    sharing words are similar, the way real embeddings roughly behave."""
+    vector = np.zeros(dimension, dtype=np.float32)
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        hashed = zlib.crc32(token.encode("utf-8"))
+        vector[hashed % dimension] += 1.0 if hashed & 0x80000000 else -1.0
+    norm = np.linalg.norm(vector)
+    if norm == 0:
+        vector[0] = 1.0
+        norm = 1.0
+    return vector / norm
+
+
+def encode_embedding(
+    embedding: np.ndarray, encoding_format: Optional[str]
+) -> Union[str, List[float]]:
+    """The OpenAI client asks for base64 encoded float32 embeddings by default,
+    which are much cheaper to produce and parse than JSON floats."""
+    if encoding_format == "base64":
+        return base64.b64encode(embedding.astype(np.float32).tobytes()).decode()
+    return embedding.tolist()
+
+
+def get_arguments(parameters: Dict[str, Any]) -> Dict[str, Any]:
+    """Arguments satisfying the required properties of a function schema."""
+    properties = parameters.get("properties", {})
+    arguments = {}
+    for name in parameters.get("required", []):
+        schema = properties.get(name, {})
+        if "enum" in schema:
+            arguments[name] = schema["enum"][0]
+        else:
+            arguments[name] = SCHEMA_VALUES.get(schema.get("type"), "bench")
+    return arguments
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Send headers and body in one segment, so keep-alive requests don't stall
+    # on delayed ACKs.
+    wbufsize = -1
+    disable_nagle_algorithm = True
+    server: "FakeOpenAIHTTPServer"
+
+    def log_message(self, format: str, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("content-length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if self.path.endswith("/embeddings"):
+            time.sleep(self.server.embeddings_latency)
+            self.send_json(200, self.create_embeddings(body))
+        elif self.path.endswith("/chat/completions"):
+            time.sleep(self.server.chat_latency)
+            if body.get("stream"):
+                self.send_events(self.create_chat_completion_chunks(body))
+            else:
+                self.send_json(200, self.create_chat_completion(body))
+        else:
+            self.send_json(404, self.error(f"Unknown path {self.path}."))
+
+    def send_json(self, status: int, payload: Dict[str, Any]):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+        with self.server.lock:
+            self.server.requests[self.path.rsplit("/", 1)[-1]] += 1
+
+    def send_events(self, events: List[Dict[str, Any]]):
+        """Sends server-sent events the way the OpenAI streaming API does, in
+        a single response body."""
+        data = "".join(f"data: {json.dumps(event)}\n\n" for event in events)
+        data = (data + "data: [DONE]\n\n").encode("utf-8")
+        self.send_response(200)
+        self.send_header("content-type", "text/event-stream")
+        self.send_header("content-length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+        with self.server.lock:
+            self.server.requests[self.path.rsplit("/", 1)[-1]] += 1
+
+    @staticmethod
+    def error(message: str) -> Dict[str, Any]:
+        return {"error": {"message": message, "type": "invalid_request_error"}}
+
+    def create_embeddings(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        texts = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        dimension = body.get("dimensions") or MODEL_DIMENSIONS.get(
+            body.get("model"), DEFAULT_DIMENSION
+        )
+        return {
+            "object": "list",
+            "model": body.get("model"),
+            "data": [
+                {
+                    "object": "embedding",
+                    "index": index,
+                    "embedding": encode_embedding(
+                        embed_text(text, dimension), body.get("encoding_format")
+                    ),
+                }
+                for index, text in enumerate(texts)
+            ],
+            "usage": {"prompt_tokens": 0, "total_tokens": 0},
+        }
+
+    def create_chat_completion(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        message, finish_reason = self.create_message(body)
+        return {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model"),
+            "choices": [
+                {"index": 0, "message": message, "finish_reason": finish_reason}
+            ],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+    def create_chat_completion_chunks(
+        self, body: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """The message of `create_chat_completion` as streamed chunks, with the
+        function call arguments split in two deltas."""
+        message, finish_reason = self.create_message(body)
+        deltas: List[Dict[str, Any]] = []
+        if "tool_calls" in message:
+            for index, tool_call in enumerate(message["tool_calls"]):
+                arguments = tool_call["function"]["arguments"]
+                middle = len(arguments) // 2
+                deltas.append(
+                    {
+                        "tool_calls": [
+                            {
+                                "index": index,
+                                "id": tool_call["id"],
+                                "type": "function",
+                                "function": {
+                                    "name": tool_call["function"]["name"],
+                                    "arguments": arguments[:middle],
+                                },
+                            }
+                        ]
+                    }
+                )
+                deltas.append(
+                    {
+                        "tool_calls": [
+                            {
+                                "index": index,
+                                "function": {"arguments": arguments[middle:]},
+                            }
+                        ]
+                    }
+                )
+        elif "function_call" in message:
+            arguments = message["function_call"]["arguments"]
+            middle = len(arguments) // 2
+            deltas.append(
+                {
+                    "function_call": {
+                        "name": message["function_call"]["name"],
+                        "arguments": arguments[:middle],
+                    }
+                }
+            )
+            deltas.append({"function_call": {"arguments": arguments[middle:]}})
+        else:
+            deltas.append({"content": message["content"]})
+        deltas[0]["role"] = "assistant"
+
+        chunks = [(delta, None) for delta in deltas] + [({}, finish_reason)]
+        return [
+            {
+                "id": "chatcmpl-bench",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model"),
+                "choices": [
+                    {"index": 0, "delta": delta, "finish_reason": chunk_finish_reason}
+                ],
+            }
+            for delta, chunk_finish_reason in chunks
+        ]
+
+    def create_message(self, body: Dict[str, Any]) -> Tuple[Dict[str, Any], str]:
+        """Calls the first function offered, with placeholder arguments for its
+        required parameters."""
+        message: Dict[str, Any] = {"role": "assistant", "content": None}
+        if body.get("tools"):
+            function = body["tools"][0]["function"]
+            message["tool_calls"] = [
+                {
+                    "id": "call_0",
+                    "type": "function",
+                    "function": {
+                        "name": function["name"],
+                        "arguments": json.dumps(
+                            get_arguments(function.get("parameters", {}))
+                        ),
+                    },
+                }
+            ]
+            finish_reason = "tool_calls"
+        elif body.get("functions"):
+            function = body["functions"][0]
+            message["function_call"] = {
+                "name": function["name"],
+                "arguments": json.dumps(get_arguments(function.get("parameters", {}))),
+            }
+            finish_reason = "function_call"
+        else:
+            message["content"] = "bench"
+            finish_reason = "stop"
+        return message, finish_reason
+
+
+class FakeOpenAIHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, *, embeddings_latency: float, chat_latency: float):
+        super().__init__(address, FakeOpenAIHandler)
+        self.embeddings_latency = embeddings_latency
+        self.chat_latency = chat_latency
+        self.lock = threading.Lock()
+        self.requests = {"embeddings": 0, "completions": 0}
+
+
+class FakeOpenAIServer:
+    """Local stand-in for the OpenAI embeddings and chat completions endpoints,
+    including streamed completions, with deterministic responses and a
+    configurable latency in seconds. Point SageAI at it with
+    `openai_base_url=server.base_url`."""
+
+    def __init__(
+        self,
+        *,
+        embeddings_latency: float = 0.0,
+        chat_latency: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.server = FakeOpenAIHTTPServer(
+            (host, port),
+            embeddings_latency=embeddings_latency,
+            chat_latency=chat_latency,
+        )
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def requests(self) -> Dict[str, int]:
+        with self.server.lock:
+            return dict(self.server.requests)
+
+    def start(self) -> "FakeOpenAIServer":
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, name="sageai-fake-openai", daemon=True
+        )
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "FakeOpenAIServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,97 @@
+import argparse
+import json
+import timeit
+from enum import Enum
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel, Field
+
+from sageai.types.function import Function
+from sageai.utils.inspection_utilities import get_input_parameter_type
+
+
+class UnitTypes(str, Enum):
+    CELSIUS = "Celsius"
+    FAHRENHEIT = "Fahrenheit"
+
+
+class FunctionInput(BaseModel):
+    location: str = Field(..., description="The city, e.g. San Francisco")
+    unit: Optional[UnitTypes] = Field(
+        UnitTypes.CELSIUS, description="The unit of temperature."
+    )
+
+
+class FunctionOutput(BaseModel):
+    weather: str
+    temperature: int
+
+
+def get_current_weather(params: FunctionInput) -> FunctionOutput:
+    return FunctionOutput(weather=f"Sunny in {params.location}", temperature=22)
+
+
+function = Function(
+    function=get_current_weather,
+    description="Get the current weather in a given location.",
+)
+args = {"location": "Toronto", "unit": "Celsius"}
+
+
+def call_direct():
+    function.function(FunctionInput(**args))
+
+
+def call_legacy():
+    function_input_type = get_input_parameter_type(function.function)
+    func_args = function_input_type(**args)
+    function(func_args).dict()
+
+
+def call_plan():
+    function.invoke(args)
+
+
+def measure(callable_, iterations: int, repeat: int) -> float:
+    """Returns the best time per call in microseconds."""
+    timings = timeit.repeat(callable_, number=iterations, repeat=repeat)
+    return min(timings) / iterations * 1e6
+
+
+def run(iterations: int, repeat: int) -> Dict[str, Any]:
+    direct = measure(call_direct, iterations, repeat)
+    legacy = measure(call_legacy, iterations, repeat)
+    plan = measure(call_plan, iterations, repeat)
+    return dict(
+        iterations=iterations,
+        direct_us=direct,
+        legacy_us=legacy,
+        plan_us=plan,
+        legacy_overhead_us=legacy - direct,
+        plan_overhead_us=plan - direct,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Microbenchmark the per-call overhead of run_function."
+    )
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Output as JSON")
+    args_ = parser.parse_args()
+
+    result = run(args_.iterations, args_.repeat)
+    if args_.json:
+        print(json.dumps(result))
+        return
+
+    print(f"Direct call (validate + call):  {result['direct_us']:.2f} us")
+    print(f"Legacy run_function path:       {result['legacy_us']:.2f} us")
+    print(f"Invocation plan path:           {result['plan_us']:.2f} us")
+    print(f"Overhead per call (legacy):     {result['legacy_overhead_us']:.2f} us")
+    print(f"Overhead per call (plan):       {result['plan_overhead_us']:.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from sageai.bench import invocation, vectordb
+from sageai.bench.fake_openai_server import FakeOpenAIServer
+from sageai.bench.synthetic_functions import (
+    generate_functions_directory,
+    generate_queries,
+)
+
+MODEL = "gpt-3.5-turbo"
+SUITES = ["pipeline", "invocation", "vectordb"]
+
+
+def get_peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere.
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
+
+
+def summarize_latencies(prefix: str, latencies: List[float]) -> Dict[str, float]:
+    latencies_ms = np.asarray(latencies) * 1e3
+    return {
+        f"{prefix}_p50_ms": float(np.percentile(latencies_ms, 50)),
+        f"{prefix}_p95_ms": float(np.percentile(latencies_ms, 95)),
+        f"{prefix}_p99_ms": float(np.percentile(latencies_ms, 99)),
+    }
+
+
+def run_pipeline(
+    *,
+    functions_directory: str,
+    function_count: int,
+    base_url: str,
+    vectordb_name: str,
+    queries: int,
+    chats: int,
+    top_n: int,
+) -> Dict[str, Any]:
+    """Measures one SageAI instance end to end. Runs in a fresh process, so
+    module caches and peak memory of other sizes don't leak into it."""
+    from sageai import SageAI
+    from sageai.config import set_config
+    from sageai.services.defaultvectordb_service import DefaultVectorDBService
+    from sageai.services.numpyvectordb_service import NumpyVectorDBService
+
+    vectordbs = {"qdrant": DefaultVectorDBService, "numpy": NumpyVectorDBService}
+    config_args = dict(
+        openai_key="bench",
+        functions_directory=functions_directory,
+        openai_base_url=base_url,
+        vectordb=vectordbs[vectordb_name],
+    )
+
+    start = time.perf_counter()
+    set_config(**config_args)
+    set_config_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    sage = SageAI(**config_args)
+    startup_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    sage.index()
+    index_s = time.perf_counter() - start
+
+    search_latencies = []
+    for query in generate_queries(queries, function_count, seed=1):
+        start = time.perf_counter()
+        sage.get_top_n_functions(query=query, top_n=top_n)
+        search_latencies.append(time.perf_counter() - start)
+
+    chat_latencies = []
+    for query in generate_queries(chats, function_count, seed=2):
+        start = time.perf_counter()
+        response = sage.chat(
+            messages=[dict(role="user", content=query)], model=MODEL, top_n=top_n
+        )
+        chat_latencies.append(time.perf_counter() - start)
+        if "error" in response:
+            raise Exception(f"Chat failed: {response['error']}")
+
+    return dict(
+        functions=function_count,
+        vectordb=vectordb_name,
+        set_config_s=set_config_s,
+        startup_s=startup_s,
+        index_s=index_s,
+        **summarize_latencies("search", search_latencies),
+        **summarize_latencies("chat", chat_latencies),
+        peak_rss_mb=get_peak_rss_mb(),
+    )
+
+
+def run_pipeline_suite(
+    sizes: List[int],
+    *,
+    functions_root: str,
+    vectordb_names: List[str],
+    queries: int,
+    chats: int,
+    top_n: int,
+    embeddings_latency: float,
+    chat_latency: float,
+) -> List[Dict[str, Any]]:
+    context = multiprocessing.get_context("spawn")
+    results = []
+    with FakeOpenAIServer(
+        embeddings_latency=embeddings_latency, chat_latency=chat_latency
+    ) as server:
+        for size in sizes:
+            directory = generate_functions_directory(
+                os.path.join(functions_root, f"functions_{size}"), size
+            )
+            for vectordb_name in vectordb_names:
+                with context.Pool(1) as pool:
+                    result = pool.apply(
+                        run_pipeline,
+                        kwds=dict(
+                            functions_directory=directory,
+                            function_count=size,
+                            base_url=server.base_url,
+                            vectordb_name=vectordb_name,
+                            queries=queries,
+                            chats=chats,
+                            top_n=top_n,
+                        ),
+                    )
+                results.append(result)
+                print_pipeline_result(result)
+    return results
+
+
+def print_pipeline_result(result: Dict[str, Any]):
+    print(
+        f"{result['vectordb']:<8}{result['functions']:>8} functions  "
+        f"set_config {result['set_config_s']:.3f}s  "
+        f"startup {result['startup_s']:.3f}s  index {result['index_s']:.3f}s  "
+        f"search p50 {result['search_p50_ms']:.2f}ms  "
+        f"chat p50 {result['chat_p50_ms']:.2f}ms  "
+        f"rss {result['peak_rss_mb']:.0f}MB",
+        file=sys.stderr,
+    )
+
+
+def compare(
+    results: Dict[str, Any], baseline: Dict[str, Any], threshold: float
+) -> List[str]:
+    """Lists the pipeline metrics that changed by more than `threshold` (a
+    fraction) against a baseline run with the same sizes."""
+    previous = {
+        (entry["vectordb"], entry["functions"]): entry
+        for entry in baseline.get("pipeline", [])
+    }
+    changes = []
+    for entry in results.get("pipeline", []):
+        key = (entry["vectordb"], entry["functions"])
+        if key not in previous:
+            continue
+        for metric, value in entry.items():
+            before = previous[key].get(metric)
+            if not isinstance(value, float) or not before:
+                continue
+            change = (value - before) / before
+            if abs(change) > threshold:
+                changes.append(
+                    f"{key[0]} {key[1]} functions {metric}: "
+                    f"{before:.4g} -> {value:.4g} ({change:+.0%})"
+                )
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark SageAI offline against a local OpenAI stand-in."
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--suites", nargs="+", choices=SUITES, default=["pipeline"])
+    parser.add_argument(
+        "--vectordbs", nargs="+", choices=["qdrant", "numpy"], default=["qdrant"]
+    )
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--chats", type=int, default=50)
+    parser.add_argument("--top-n", type=int, default=5)
+    parser.add_argument("--embeddings-latency-ms", type=float, default=0.0)
+    parser.add_argument("--chat-latency-ms", type=float, default=0.0)
+    parser.add_argument(
+        "--functions-root",
+        type=str,
+        help="Directory to generate the synthetic functions in, a temporary one "
+        "if not set",
+    )
+    parser.add_argument("--output", type=str, help="Write the results JSON here")
+    parser.add_argument("--baseline", type=str, help="Results JSON to compare to")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Relative change reported when comparing to --baseline",
+    )
+    args = parser.parse_args()
+
+    results: Dict[str, Any] = dict(
+        created=time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        python=platform.python_version(),
+        platform=platform.platform(),
+        args=vars(args),
+    )
+
+    if "pipeline" in args.suites:
+        with tempfile.TemporaryDirectory() as temporary_directory:
+            results["pipeline"] = run_pipeline_suite(
+                args.sizes,
+                functions_root=args.functions_root or temporary_directory,
+                vectordb_names=args.vectordbs,
+                queries=args.queries,
+                chats=args.chats,
+                top_n=args.top_n,
+                embeddings_latency=args.embeddings_latency_ms / 1e3,
+                chat_latency=args.chat_latency_ms / 1e3,
+            )
+    if "invocation" in args.suites:
+        results["invocation"] = invocation.run(iterations=20000, repeat=5)
+    if "vectordb" in args.suites:
+        results["vectordb"] = vectordb.run(
+            args.sizes,
+            dimension=1536,
+            queries=args.queries,
+            top_n=args.top_n,
+            batch_size=32,
+            index_chunk_size=10000,
+            store_names=list(vectordb.stores),
+        )
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        changes = compare(results, baseline, args.threshold)
+        print(
+            "\n".join(changes) if changes else "No changes above the threshold.",
+            file=sys.stderr,
+        )
+
+
+if __name__ == "__main__":
+    main()
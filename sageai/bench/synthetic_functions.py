@@ -0,0 +1,127 @@
+import os
+import random
+from typing import List, Tuple
+
+ACTIONS = [
+    "get",
+    "list",
+    "create",
+    "update",
+    "delete",
+    "search",
+    "archive",
+    "export",
+    "schedule",
+    "cancel",
+    "summarize",
+    "validate",
+]
+OBJECTS = [
+    "invoice",
+    "order",
+    "ticket",
+    "user",
+    "report",
+    "payment",
+    "shipment",
+    "meeting",
+    "document",
+    "forecast",
+    "subscription",
+    "reservation",
+    "playlist",
+    "recipe",
+    "account",
+    "device",
+]
+DOMAINS = [
+    "billing",
+    "sales",
+    "support",
+    "travel",
+    "weather",
+    "music",
+    "cooking",
+    "finance",
+    "logistics",
+    "calendar",
+    "fitness",
+    "security",
+]
+FIELDS = [
+    ("identifier", "str", "The identifier of the {object}."),
+    ("limit", "int", "The maximum number of {object}s to return."),
+    ("include_archived", "bool", "Whether to include archived {object}s."),
+    ("amount", "float", "The amount of the {object}."),
+]
+
+FUNCTION_TEMPLATE = """from pydantic import BaseModel, Field
+
+from sageai.types.function import Function
+
+
+class FunctionInput(BaseModel):
+{fields}
+
+
+class FunctionOutput(BaseModel):
+    result: str
+
+
+def {name}(params: FunctionInput) -> FunctionOutput:
+    return FunctionOutput(result="{name}")
+
+
+function = Function(
+    function={name},
+    description="{description}",
+)
+"""
+
+
+def get_function_spec(index: int) -> Tuple[str, str, str, str]:
+    """Returns the deterministic (name, description, action, object) of the
+    `index`-th synthetic function."""
+    action = ACTIONS[index % len(ACTIONS)]
+    object_ = OBJECTS[(index // len(ACTIONS)) % len(OBJECTS)]
+    domain = DOMAINS[(index // (len(ACTIONS) * len(OBJECTS))) % len(DOMAINS)]
+    name = f"{action}_{domain}_{object_}_{index}"
+    description = f"{action.capitalize()} a {domain} {object_} for the user."
+    return name, description, action, object_
+
+
+def write_function(directory: str, index: int):
+    name, description, _, object_ = get_function_spec(index)
+    fields = [FIELDS[0]] + FIELDS[1 : 1 + index % len(FIELDS)]
+    field_lines = "\n".join(
+        f'    {field}: {type_} = Field(..., description="{text.format(object=object_)}")'
+        for field, type_, text in fields
+    )
+    function_directory = os.path.join(directory, name)
+    os.makedirs(function_directory, exist_ok=True)
+    with open(os.path.join(function_directory, "function.py"), "w") as f:
+        f.write(
+            FUNCTION_TEMPLATE.format(
+                fields=field_lines, name=name, description=description
+            )
+        )
+
+
+def generate_functions_directory(directory: str, count: int) -> str:
+    """Writes `count` synthetic function folders to `directory`. Functions
+    combine actions, objects and domains, so they are distinct but share
+    vocabulary the way a real catalog does."""
+    os.makedirs(directory, exist_ok=True)
+    for index in range(count):
+        write_function(directory, index)
+    return directory
+
+
+def generate_queries(count: int, function_count: int, seed: int = 0) -> List[str]:
+    """User messages each aimed at a random synthetic function."""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        _, _, action, object_ = get_function_spec(rng.randrange(function_count))
+        queries.append(f"Can you {action} my {object_}? Request {len(queries)}.")
+    return queries
@@ -0,0 +1,149 @@
+import argparse
+import json
+import time
+from typing import Any, Dict, List, Type
+
+import numpy as np
+
+from sageai.services.numpystore_service import NumpyStoreService
+from sageai.services.qdrantstore_service import QdrantStoreService
+from sageai.types.abstract_vector_store import AbstractVectorStore, IndexChanges
+from sageai.types.log_level import LogLevel
+from sageai.utils.logger import get_logger
+
+stores: Dict[str, Type[AbstractVectorStore]] = {
+    "qdrant": QdrantStoreService,
+    "numpy": NumpyStoreService,
+}
+
+
+def random_embeddings(count: int, dimension: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return rng.standard_normal((count, dimension), dtype=np.float32)
+
+
+def run_store(
+    store_class: Type[AbstractVectorStore],
+    embeddings: np.ndarray,
+    queries: np.ndarray,
+    *,
+    top_n: int,
+    batch_size: int,
+    index_chunk_size: int,
+) -> Dict[str, Any]:
+    store = store_class(
+        embeddings_model="bench",
+        embeddings_size=embeddings.shape[1],
+        logger=get_logger("Bench", LogLevel.ERROR),
+    )
+    queries_list: List[List[float]] = queries.tolist()
+
+    start = time.perf_counter()
+    store.plan_index({}, incremental=False)
+    # Embeddings arrive in batches when indexing, converting them all to lists
+    # at once would need gigabytes at 100k functions.
+    for chunk_start in range(0, len(embeddings), index_chunk_size):
+        chunk = range(chunk_start, min(chunk_start + index_chunk_size, len(embeddings)))
+        changes = IndexChanges(
+            upserts={f"function_{i}": f"function {i}" for i in chunk},
+            deletes=[],
+            unchanged=0,
+        )
+        store.apply_index(changes, embeddings[chunk.start : chunk.stop].tolist())
+    index_s = time.perf_counter() - start
+
+    store.search(query_embedding=queries_list[0], top_n=top_n)
+    latencies = []
+    for query in queries_list:
+        start = time.perf_counter()
+        store.search(query_embedding=query, top_n=top_n)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i in range(0, len(queries_list), batch_size):
+        store.search_batch(
+            query_embeddings=queries_list[i : i + batch_size], top_n=top_n
+        )
+    batch_s = time.perf_counter() - start
+
+    latencies_ms = np.asarray(latencies) * 1e3
+    return dict(
+        index_s=index_s,
+        search_p50_ms=float(np.percentile(latencies_ms, 50)),
+        search_p95_ms=float(np.percentile(latencies_ms, 95)),
+        batch_queries_per_s=len(queries_list) / batch_s,
+    )
+
+
+def run(
+    sizes: List[int],
+    *,
+    dimension: int,
+    queries: int,
+    top_n: int,
+    batch_size: int,
+    index_chunk_size: int,
+    store_names: List[str],
+) -> List[Dict[str, Any]]:
+    results = []
+    for size in sizes:
+        embeddings = random_embeddings(size, dimension, seed=size)
+        query_embeddings = random_embeddings(queries, dimension, seed=0)
+        for store_name in store_names:
+            result = run_store(
+                stores[store_name],
+                embeddings,
+                query_embeddings,
+                top_n=top_n,
+                batch_size=batch_size,
+                index_chunk_size=index_chunk_size,
+            )
+            results.append(dict(store=store_name, functions=size, **result))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark indexing and search of the vector stores."
+    )
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000]
+    )
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-n", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--index-chunk-size", type=int, default=10000)
+    parser.add_argument(
+        "--stores", nargs="+", choices=list(stores), default=list(stores)
+    )
+    parser.add_argument("--json", action="store_true", help="Output as JSON")
+    args = parser.parse_args()
+
+    results = run(
+        args.sizes,
+        dimension=args.dimension,
+        queries=args.queries,
+        top_n=args.top_n,
+        batch_size=args.batch_size,
+        index_chunk_size=args.index_chunk_size,
+        store_names=args.stores,
+    )
+    if args.json:
+        print(json.dumps(results))
+        return
+
+    print(
+        f"{'store':<8}{'functions':>10}{'index s':>10}{'p50 ms':>10}"
+        f"{'p95 ms':>10}{'batch q/s':>12}"
+    )
+    for result in results:
+        print(
+            f"{result['store']:<8}{result['functions']:>10}"
+            f"{result['index_s']:>10.3f}{result['search_p50_ms']:>10.3f}"
+            f"{result['search_p95_ms']:>10.3f}{result['batch_queries_per_s']:>12.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
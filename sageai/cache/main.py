@@ -0,0 +1,65 @@
+import argparse
+import json
+from datetime import datetime
+
+from sageai.services.embedding_cache_service import EmbeddingCacheService
+
+
+def format_size(size_bytes: int) -> str:
+    size = float(size_bytes)
+    for unit in ["B", "KB", "MB"]:
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect the embeddings cache.")
+    parser.add_argument(
+        "command",
+        choices=["stats", "list", "prune", "clear"],
+        help="Show cache stats, list entries, evict entries or clear the cache",
+    )
+    parser.add_argument(
+        "--directory", type=str, required=True, help="Embeddings cache directory"
+    )
+    parser.add_argument(
+        "--limit", type=int, default=20, help="Number of entries to list"
+    )
+    parser.add_argument(
+        "--max-size-mb", type=int, help="Size to prune the cache down to"
+    )
+    parser.add_argument("--json", action="store_true", help="Output as JSON")
+    args = parser.parse_args()
+
+    cache = EmbeddingCacheService(args.directory)
+
+    if args.command == "stats":
+        stats = cache.stats()
+        if args.json:
+            print(json.dumps(stats))
+        else:
+            print(f"Directory: {stats['directory']}")
+            print(f"Entries: {stats['entries']}")
+            print(f"Size: {format_size(stats['size_bytes'])}")
+    elif args.command == "list":
+        entries = cache.entries()[: args.limit]
+        if args.json:
+            print(json.dumps([entry.dict() for entry in entries]))
+        else:
+            for entry in entries:
+                last_access = datetime.fromtimestamp(entry.last_access)
+                print(
+                    f"{entry.key[:12]}  {entry.model}  dim={entry.dimension}  "
+                    f"{format_size(entry.size_bytes)}  "
+                    f"{last_access:%Y-%m-%d %H:%M:%S}  {entry.text[:60]!r}"
+                )
+    elif args.command == "prune":
+        if args.max_size_mb is None:
+            parser.error("prune requires --max-size-mb")
+        evicted = cache.prune(args.max_size_mb * 1024 * 1024)
+        print(f"Evicted {evicted} entries")
+    elif args.command == "clear":
+        cache.clear()
+        print(f"Cleared {cache.directory}")
@@ -1,12 +1,24 @@
-from typing import Optional, Type
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Type
 
 from pydantic import BaseModel, Field, ValidationError
 
+from sageai.services.async_defaultvectordb_service import AsyncDefaultVectorDBService
 from sageai.services.defaultvectordb_service import DefaultVectorDBService
+from sageai.services.function_catalog_service import FunctionCatalogService
+from sageai.services.hooks_service import HooksService
+from sageai.services.lru_result_cache_service import LRUResultCacheService
+from sageai.services.openai_embedder_service import OpenAIEmbedderService
+from sageai.types.abstract_async_vectordb import AbstractAsyncVectorDB
+from sageai.types.abstract_embedder import AbstractEmbedder
+from sageai.types.abstract_hooks import AbstractHooks
+from sageai.types.abstract_result_cache import AbstractResultCache
 from sageai.types.abstract_vectordb import AbstractVectorDB
+from sageai.types.index_mode import IndexMode
 from sageai.types.log_level import LogLevel
-from sageai.utils.file_utilities import generate_functions_map
 from sageai.utils.format_config_args import format_config_args
+from sageai.utils.function_catalog_utilities import get_function_catalog
 
 
 class Config(BaseModel):
@@ -17,35 +29,230 @@ class Config(BaseModel):
     vectordb: Optional[Type[AbstractVectorDB]] = Field(
         DefaultVectorDBService, description="VectorDB class reference."
     )
+    async_vectordb: Optional[Type[AbstractAsyncVectorDB]] = Field(
+        AsyncDefaultVectorDBService, description="Async VectorDB class reference."
+    )
+    openai_base_url: Optional[str] = Field(
+        None, description="The base URL of the OpenAI API, e.g. of a proxy."
+    )
+    http_max_connections: Optional[int] = Field(
+        1000, description="The maximum number of open connections to the API."
+    )
+    http_max_keepalive_connections: Optional[int] = Field(
+        100, description="The number of idle connections kept alive."
+    )
+    http_keepalive_expiry: Optional[float] = Field(
+        5.0, description="The number of seconds an idle connection is kept alive."
+    )
+    http_timeout: Optional[float] = Field(
+        600.0, description="The number of seconds a request may take."
+    )
+    http_connect_timeout: Optional[float] = Field(
+        5.0, description="The number of seconds opening a connection may take."
+    )
+    http2: Optional[bool] = Field(
+        False, description="Whether to use HTTP/2, which requires the h2 package."
+    )
+    chat_requests_per_minute: Optional[int] = Field(
+        None, description="The chat completions requests allowed per minute."
+    )
+    chat_tokens_per_minute: Optional[int] = Field(
+        None, description="The chat completions tokens allowed per minute."
+    )
+    embeddings_requests_per_minute: Optional[int] = Field(
+        None, description="The embeddings requests allowed per minute."
+    )
+    embeddings_tokens_per_minute: Optional[int] = Field(
+        None, description="The embeddings tokens allowed per minute."
+    )
+    openai_max_concurrency: Optional[int] = Field(
+        None, description="The maximum number of OpenAI requests in flight."
+    )
+    openai_min_concurrency: Optional[int] = Field(
+        1, description="The number of requests in flight kept when throttled."
+    )
+    embedder: Optional[Type[AbstractEmbedder]] = Field(
+        OpenAIEmbedderService, description="Embedder class reference."
+    )
+    embeddings_model: Optional[str] = Field(
+        "text-embedding-ada-002", description="The OpenAI embeddings model."
+    )
+    embeddings_dimension: Optional[int] = Field(
+        None, description="The embeddings size, detected from the model if not set."
+    )
+    result_cache: Optional[Type[AbstractResultCache]] = Field(
+        LRUResultCacheService, description="Result cache class reference."
+    )
+    hooks: Optional[List[Type[AbstractHooks]]] = Field(
+        [], description="Hook class references called around pipeline stages."
+    )
     log_level: Optional[LogLevel] = Field(
         LogLevel.ERROR, description="The desired log level for output."
     )
+    lazy_loading: Optional[bool] = Field(
+        False, description="Whether to import function modules on first use."
+    )
+    manifest_path: Optional[str] = Field(
+        None, description="The path of the functions manifest used by lazy loading."
+    )
+    watch: Optional[bool] = Field(
+        False, description="Whether to hot reload the functions directory."
+    )
+    watch_interval: Optional[float] = Field(
+        1.0, description="The number of seconds between functions directory scans."
+    )
+    use_tools: Optional[bool] = Field(
+        False, description="Whether to use the tools API for parallel function calls."
+    )
+    tool_calls_max_workers: Optional[int] = Field(
+        8, description="The number of threads running tool calls concurrently."
+    )
+    function_max_workers: Optional[int] = Field(
+        32, description="The number of threads running functions with a timeout."
+    )
+    function_timeout: Optional[float] = Field(
+        None, description="The timeout of functions that don't declare one."
+    )
+    function_max_processes: Optional[int] = Field(
+        None,
+        description="The number of worker processes running process functions. Defaults to the number of CPUs.",
+    )
+    function_process_start_method: Optional[str] = Field(
+        "spawn", description="The multiprocessing start method of the worker processes."
+    )
+    index_mode: Optional[IndexMode] = Field(
+        IndexMode.FULL, description="Whether index rebuilds or syncs the vector db."
+    )
+    hybrid_search: Optional[bool] = Field(
+        False, description="Whether to fuse BM25 and vector search rankings."
+    )
+    lexical_confidence_threshold: Optional[float] = Field(
+        0.5, description="The BM25 confidence at which vector search is skipped."
+    )
+    function_token_budget: Optional[int] = Field(
+        None, description="The number of prompt tokens available to functions."
+    )
+    function_budget_candidates: Optional[int] = Field(
+        32, description="The number of functions ranked when top_n is not given."
+    )
+    function_min_score: Optional[float] = Field(
+        None, description="The minimum similarity of a selected function."
+    )
+    semantic_cache: Optional[bool] = Field(
+        False, description="Whether to cache chat results by query similarity."
+    )
+    semantic_cache_threshold: Optional[float] = Field(
+        0.95, description="The query similarity at which a cached result is reused."
+    )
+    semantic_cache_ttl: Optional[float] = Field(
+        None, description="The number of seconds a chat result is cached."
+    )
+    semantic_cache_size: Optional[int] = Field(
+        1024, description="The number of chat results kept in the semantic cache."
+    )
+    query_embeddings_cache_size: Optional[int] = Field(
+        1024, description="The number of query embeddings kept in memory."
+    )
+    query_embeddings_cache_ttl: Optional[float] = Field(
+        None, description="The number of seconds a query embedding is cached."
+    )
+    embeddings_batch_size: Optional[int] = Field(
+        512, description="The number of texts sent per embeddings request."
+    )
+    embeddings_concurrency: Optional[int] = Field(
+        4, description="The number of embeddings requests run at once when indexing."
+    )
+    embeddings_max_retries: Optional[int] = Field(
+        3, description="The number of retries for a failed embeddings batch."
+    )
+    embeddings_cache_directory: Optional[str] = Field(
+        None, description="The directory of the on-disk embeddings cache."
+    )
+    embeddings_cache_max_size_mb: Optional[int] = Field(
+        512, description="The size at which the embeddings cache evicts entries."
+    )
 
     class Config:
         arbitrary_types_allowed = True
 
 
-_config = Config(openai_key="")
-function_map = {}
+class Registry:
+    """The config of a SageAI instance, with its hooks and function map. The
+    function map starts as the shared catalog's, and is swapped for the
+    instance's own on a hot reload."""
 
+    def __init__(
+        self,
+        config: Config,
+        hooks: HooksService,
+        catalog: FunctionCatalogService,
+    ):
+        self.config = config
+        self.hooks = hooks
+        self.catalog = catalog
+        self.function_map: Dict[str, Any] = catalog.function_map
 
-def set_config(**kwargs):
-    """Set the configuration parameters."""
-    global _config
-    global function_map
+
+_default_registry = Registry(
+    Config(openai_key=""), HooksService([]), FunctionCatalogService({}, "")
+)
+_active_registry: ContextVar[Optional[Registry]] = ContextVar(
+    "sageai_registry", default=None
+)
+
+
+def create_registry(**kwargs) -> Registry:
+    """Creates a registry from configuration parameters without touching the
+    global configuration. Functions are loaded through the process-wide catalog,
+    so registries of the same functions directory share them."""
     try:
         kwargs = format_config_args(**kwargs)
-        _config = Config(**kwargs)
-        function_map = generate_functions_map()
-        return _config
+        config = Config(**kwargs)
     except ValidationError as e:
         raise ValidationError(f"Invalid configuration: {e}")
+    return Registry(
+        config, HooksService.from_config(config), get_function_catalog(config)
+    )
+
+
+def get_registry() -> Registry:
+    """Retrieve the active registry, or the global one set by `set_config`."""
+    return _active_registry.get() or _default_registry
+
+
+@contextmanager
+def use_registry(registry: Registry) -> Iterator[Registry]:
+    """Makes `registry` the active one in the current context, e.g. while a
+    SageAI instance creates its services."""
+    token = _active_registry.set(registry)
+    try:
+        yield registry
+    finally:
+        _active_registry.reset(token)
+
+
+def set_config(**kwargs):
+    """Set the global configuration parameters."""
+    global _default_registry
+    _default_registry = create_registry(**kwargs)
+    return _default_registry.config
 
 
 def get_config():
     """Retrieve the configuration."""
-    return _config
+    return get_registry().config
+
+
+def get_hooks():
+    """Retrieve the hooks of the configuration."""
+    return get_registry().hooks
 
 
 def get_function_map():
-    return function_map
+    return get_registry().function_map
+
+
+def set_function_map(new_function_map):
+    """Swaps the function map. Readers holding the previous map keep a
+    consistent snapshot, since the map itself is never mutated."""
+    get_registry().function_map = new_function_map
@@ -1,103 +1,448 @@
 import json
-from typing import Any, Dict, Optional, Tuple, Type
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from concurrent.futures import as_completed, wait
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
-from sageai.config import LogLevel, get_config, get_function_map, set_config
+from sageai.base_sageai import BaseSageAI
+from sageai.config import get_registry
+from sageai.services.function_watcher_service import FunctionWatcherService
 from sageai.services.openai_service import OpenAIService
-from sageai.types.abstract_vectordb import AbstractVectorDB
-from sageai.utils.inspection_utilities import get_input_parameter_type
-from sageai.utils.openai_utilities import get_latest_user_message
+from sageai.types.function import Function
+from sageai.types.function_timeout_error import FunctionTimeoutError
+from sageai.types.stage import Stage
+from sageai.types.stream_event_type import StreamEventType
+from sageai.utils.batch_utilities import ResultsBuffer, iter_batches
+from sageai.utils.hybrid_method import hybridmethod
+from sageai.utils.logger import get_logger
+from sageai.utils.stream_utilities import StreamedFunctionCalls
 
 __all__ = ["SageAI"]
 
 
-class SageAI:
-    def __init__(
-        self,
-        *,
-        openai_key: str,
-        functions_directory: Optional[str] = None,
-        vectordb: Optional[Type[AbstractVectorDB]] = None,
-        log_level: Optional[LogLevel] = None,
-    ):
-        if openai_key is None:
-            raise Exception("No OpenAI key provided.")
-
-        config_args = {"openai_key": openai_key}
-
-        if functions_directory is not None:
-            config_args["functions_directory"] = functions_directory
-        if vectordb is not None:
-            config_args["vectordb"] = vectordb
-        if log_level is not None:
-            config_args["log_level"] = LogLevel(log_level)
-
-        set_config(**config_args)
-        self.config = get_config()
-
+class SageAI(BaseSageAI):
+    def init_services(self):
         self.openai = OpenAIService()
         self.vectordb = self.config.vectordb()
+        self.tool_calls_executor = ThreadPoolExecutor(
+            max_workers=self.config.tool_calls_max_workers,
+            thread_name_prefix="sageai-tool-call",
+        )
+        self.logger = get_logger("SageAI", self.config.log_level)
+
+        self.watcher = None
+        if self.config.watch:
+            self.start_watching()
 
     def index(self):
         self.vectordb.index()
 
-    def chat(self, *args, **kwargs) -> Dict[str, Any]:
-        merged = {i: v for i, v in enumerate(args)}
-        merged.update(kwargs)
+    def start_watching(self):
+        """Hot reloads functions added, changed or removed in the functions
+        directory, re-embedding only those functions."""
+        if self.watcher is None:
+            self.watcher = FunctionWatcherService(
+                self.config.functions_directory,
+                interval=self.config.watch_interval,
+                on_change=lambda changed, removed: self.reload_functions(
+                    changed=changed, removed=removed
+                ),
+                logger=self.logger,
+            )
+        self.watcher.start()
 
-        top_n = merged.pop("top_n") if "top_n" in merged else None
+    def stop_watching(self):
+        if self.watcher is not None:
+            self.watcher.stop()
 
-        if merged.get("model") is None:
-            raise Exception("No model provided.")
+    def close(self):
+        super().close()
+        self.tool_calls_executor.shutdown(wait=False, cancel_futures=True)
 
-        if merged.get("messages") is None:
-            raise Exception("No messages provided.")
+    def reload_functions(self, *, changed: List[str], removed: List[str]):
+        """Reloads the function folders in `changed`, drops those in `removed`
+        and atomically swaps in the new function map. In-flight chats keep
+        using the map they started with."""
+        function_map = self.function_map
+        new_function_map, changed_names, removed_names = self.load_changed_functions(
+            function_map, changed=changed, removed=removed
+        )
+        self.swap_function_map(
+            function_map, new_function_map, changed_names, removed_names
+        )
+        self.vectordb.reindex_functions(changed=changed_names, removed=removed_names)
+        self.log_reload(changed_names, removed_names)
 
-        if top_n is None:
-            raise Exception("No top_n provided.")
+    def chat(self, *args, **kwargs) -> Union[Dict[str, Any], Iterator[Dict[str, Any]]]:
+        merged, top_n, query = self.prepare_chat_args(args, kwargs)
+        return self.complete_chat(
+            merged, top_n=top_n, query=query, function_map=self.function_map
+        )
 
-        latest_user_message = get_latest_user_message(merged.get("messages"))
-        if latest_user_message is None:
-            raise Exception("No user message found.")
+    def complete_chat(
+        self,
+        merged: Dict[str, Any],
+        *,
+        top_n: int,
+        query: str,
+        function_map: Dict[str, Function],
+        top_functions: Optional[List[Dict[str, Any]]] = None,
+    ) -> Union[Dict[str, Any], Iterator[Dict[str, Any]]]:
+        """Runs a chat with prepared arguments. `top_functions` skips retrieval
+        when the functions were already retrieved, e.g. by `chat_many`."""
+        stream = merged.pop("stream", False)
+        if stream:
+            return self.stream_chat(
+                merged,
+                top_n=top_n,
+                query=query,
+                function_map=function_map,
+                top_functions=top_functions,
+            )
+
+        with self.hooks.stage(Stage.CHAT, model=merged.get("model")):
+            query_embedding, context = None, None
+            if self.use_semantic_cache(stream):
+                query_embedding = self.get_query_embedding(query)
+                context = self.get_semantic_cache_context(merged)
+                entry = self.lookup_semantic_cache(
+                    query_embedding,
+                    model=merged["model"],
+                    context=context,
+                    function_map=function_map,
+                )
+                if entry is not None:
+                    function_response = entry.result
+                    if function_response is None:
+                        function_response = self.run_function(
+                            name=entry.name, args=entry.args, function_map=function_map
+                        )
+                    return self.format_semantic_cache_response(entry, function_response)
+
+            if top_functions is None:
+                top_functions = self.get_top_n_functions(
+                    query=query, top_n=top_n, function_map=function_map
+                )
+
+            function_tokens = self.get_function_tokens(top_functions, function_map)
+            if self.config.use_tools:
+                tool_calls = self.call_openai_tools(
+                    merged, top_functions, function_tokens=function_tokens
+                )
+                function_responses = self.run_functions(
+                    tool_calls, function_map=function_map
+                )
+                response = self.format_tool_calls_response(
+                    tool_calls, function_responses
+                )
+            else:
+                function_name, function_args = self.call_openai(
+                    merged, top_functions, function_tokens=function_tokens
+                )
+                function_response = self.run_function(
+                    name=function_name, args=function_args, function_map=function_map
+                )
+                response = self.format_chat_response(
+                    function_name, function_args, function_response
+                )
+                if query_embedding is not None:
+                    self.store_semantic_cache(
+                        query_embedding,
+                        query=query,
+                        model=merged["model"],
+                        context=context,
+                        function_map=function_map,
+                        function_name=function_name,
+                        function_args=function_args,
+                        function_response=function_response,
+                    )
+
+            response["function_tokens"] = function_tokens
+            return response
+
+    def chat_many(
+        self,
+        conversations: Iterable[Dict[str, Any]],
+        *,
+        concurrency: int = 8,
+        ordered: bool = True,
+        batch_size: Optional[int] = None,
+        **kwargs,
+    ) -> Iterator[Dict[str, Any]]:
+        """Chats a batch of conversations, each given as `chat` keyword arguments
+        over the shared `kwargs`, e.g. `chat_many(({"messages": m} for m in
+        messages), model="gpt-3.5-turbo", top_n=5)`.
 
-        top_functions = self.get_top_n_functions(
-            query=latest_user_message["content"], top_n=top_n
+        Conversations are read `batch_size` at a time. The latest user messages
+        of a batch are embedded in batched requests and searched together, and
+        up to `concurrency` completions run at once. Results are yielded in input
+        order, or as they finish when `ordered` is False. Each result carries the
+        conversation's `index` and either its `response` or the `error` that
+        failed it, without aborting the rest of the batch.
+        """
+        if concurrency < 1:
+            raise Exception("Concurrency must be at least 1.")
+        function_map = self.function_map
+        batch_size = batch_size or self.config.embeddings_batch_size
+        buffer = ResultsBuffer(ordered=ordered)
+        pending: Dict[Future, int] = {}
+        executor = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="sageai-chat-many"
         )
 
-        function_name, function_args = self.call_openai(merged, top_functions)
-        function_response = self.run_function(name=function_name, args=function_args)
+        def wait_pending(max_pending: int):
+            while len(pending) > max_pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = pending.pop(future)
+                    try:
+                        result = self.format_batch_result(
+                            index, response=future.result()
+                        )
+                    except Exception as e:
+                        result = self.format_batch_result(index, error=e)
+                    buffer.add(result)
+
+        try:
+            for batch in iter_batches(conversations, batch_size):
+                prepared, failed = self.prepare_chat_batch(batch, kwargs)
+                for result in failed:
+                    buffer.add(result)
+
+                for top_n, conversations_by_index in prepared.items():
+                    try:
+                        top_functions = self.vectordb.search_impl_batch(
+                            queries=[
+                                query for _, query in conversations_by_index.values()
+                            ],
+                            top_n=top_n,
+                            function_map=function_map,
+                        )
+                    except Exception as e:
+                        for index in conversations_by_index:
+                            buffer.add(self.format_batch_result(index, error=e))
+                        continue
+
+                    for (index, (merged, query)), functions in zip(
+                        conversations_by_index.items(), top_functions
+                    ):
+                        future = executor.submit(
+                            self.complete_chat,
+                            merged,
+                            top_n=top_n,
+                            query=query,
+                            function_map=function_map,
+                            top_functions=functions,
+                        )
+                        pending[future] = index
 
-        base_return = dict(name=function_name, args=function_args)
+                # Keep the workers busy while the next batch is embedded.
+                wait_pending(concurrency)
+                yield from buffer.pop_ready()
 
-        if "error" in function_response:
-            base_return["error"] = function_response["error"]
-        else:
-            base_return["result"] = function_response
+            wait_pending(0)
+            yield from buffer.pop_ready()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
 
-        return base_return
+    def get_query_embedding(self, query: str) -> List[float]:
+        embedder = self.semantic_cache_embedder
+        if getattr(self.vectordb, "embedder", None) is embedder:
+            return self.vectordb.get_query_embedding(query, embedder.embed_query)
+        return embedder.embed_query(query)
 
-    def get_top_n_functions(self, *, query: str, top_n: int):
-        return self.vectordb.search_impl(query=query, top_n=top_n)
+    def get_top_n_functions(
+        self,
+        *,
+        query: str,
+        top_n: int,
+        function_map: Optional[Dict[str, Function]] = None,
+    ):
+        return self.vectordb.search_impl(
+            query=query, top_n=top_n, function_map=function_map
+        )
 
     def call_openai(
-        self, openai_args: Dict[str, Any], top_functions: list[Dict[str, Any]]
+        self,
+        openai_args: Dict[str, Any],
+        top_functions: list[Dict[str, Any]],
+        *,
+        function_tokens: Optional[int] = None,
     ) -> Tuple[str, Dict[str, Any]]:
-        openai_result = self.openai.chat(**openai_args, functions=top_functions)
+        with self.hooks.stage(Stage.COMPLETION, model=openai_args.get("model")):
+            openai_result = self.openai.chat(
+                **openai_args,
+                functions=top_functions,
+                function_tokens=function_tokens,
+            )
 
         if not openai_result.function_call:
             raise Exception("No function call found in OpenAI response.")
 
         function_name = openai_result.function_call.name
-        function_args = json.loads(openai_result.function_call.arguments)
+        with self.hooks.stage(Stage.PARSE_ARGUMENTS, function=function_name):
+            function_args = json.loads(openai_result.function_call.arguments)
         return function_name, function_args
 
-    @staticmethod
-    def run_function(*, name: str, args: Dict[str, Any]) -> Dict[str, Any]:
+    def stream_chat(
+        self,
+        openai_args: Dict[str, Any],
+        *,
+        top_n: int,
+        query: str,
+        function_map: Dict[str, Function],
+        top_functions: Optional[List[Dict[str, Any]]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Streams a chat with prepared arguments. The `CHAT` stage spans
+        producing the stream, so retrieval only runs, and raises, once iteration
+        starts. It is paused while the consumer holds an event."""
+        with self.hooks.stage(
+            Stage.CHAT, model=openai_args.get("model"), stream=True
+        ) as chat:
+            if top_functions is None:
+                top_functions = self.get_top_n_functions(
+                    query=query, top_n=top_n, function_map=function_map
+                )
+            for event in self.stream_completion(
+                openai_args, top_functions, function_map=function_map
+            ):
+                with chat.paused():
+                    yield event
+
+    def stream_completion(
+        self,
+        openai_args: Dict[str, Any],
+        top_functions: List[Dict[str, Any]],
+        function_map: Dict[str, Function],
+    ) -> Iterator[Dict[str, Any]]:
+        """Streams the completion and yields progress events. Each function call
+        is validated and dispatched as soon as its arguments are complete, while
+        the rest of the completion is still streaming."""
+        function_tokens = self.get_function_tokens(top_functions, function_map)
+        streamed_calls = StreamedFunctionCalls(hooks=self.hooks)
+        futures: Dict[int, Future] = {}
+        results: Dict[int, Dict[str, Any]] = {}
+
+        def dispatch(event: Dict[str, Any]):
+            if "error" in event:
+                future = Future()
+                future.set_result(dict(error=event["error"]))
+            else:
+                future = self.tool_calls_executor.submit(
+                    self.run_function,
+                    name=event["name"],
+                    args=event["args"],
+                    function_map=function_map,
+                )
+            futures[event["index"]] = future
+
+        def collect_results(timeout: Optional[float]) -> Iterator[Dict[str, Any]]:
+            pending = {
+                future: index
+                for index, future in futures.items()
+                if index not in results
+            }
+            try:
+                for future in as_completed(pending, timeout=timeout):
+                    index = pending[future]
+                    results[index] = future.result()
+                    yield self.format_result_event(
+                        index, streamed_calls.calls[index], results[index]
+                    )
+            except FuturesTimeoutError:
+                pass
+
+        # The stage spans the stream, paused while the events are consumed.
+        with self.hooks.stage(
+            Stage.COMPLETION, model=openai_args.get("model"), stream=True
+        ) as completion:
+            for delta in self.openai.stream_chat(
+                **openai_args,
+                **self.get_function_args(top_functions),
+                function_tokens=function_tokens,
+            ):
+                for event in streamed_calls.feed(delta):
+                    with completion.paused():
+                        yield event
+                    if event["type"] == StreamEventType.ARGUMENTS_COMPLETE:
+                        dispatch(event)
+                for event in collect_results(timeout=0):
+                    with completion.paused():
+                        yield event
+
+        for event in streamed_calls.finish():
+            yield event
+            dispatch(event)
+        yield from collect_results(timeout=None)
+
+        response = self.format_streamed_response(
+            streamed_calls.ordered_calls(),
+            [results[index] for index in sorted(results)],
+        )
+        response["function_tokens"] = function_tokens
+        yield dict(type=StreamEventType.DONE, response=response)
+
+    def call_openai_tools(
+        self,
+        openai_args: Dict[str, Any],
+        top_functions: List[Dict[str, Any]],
+        *,
+        function_tokens: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        with self.hooks.stage(Stage.COMPLETION, model=openai_args.get("model")):
+            openai_result = self.openai.chat(
+                **openai_args,
+                tools=self.format_tools(top_functions),
+                function_tokens=function_tokens,
+            )
+        with self.hooks.stage(Stage.PARSE_ARGUMENTS):
+            return self.parse_tool_calls(openai_result)
+
+    def run_functions(
+        self,
+        tool_calls: List[Dict[str, Any]],
+        function_map: Optional[Dict[str, Function]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Runs tool calls concurrently and returns their results in call order."""
+
+        def run_tool_call(tool_call: Dict[str, Any]) -> Dict[str, Any]:
+            if "error" in tool_call:
+                return dict(error=tool_call["error"])
+            return self.run_function(
+                name=tool_call["name"],
+                args=tool_call["args"],
+                function_map=function_map,
+            )
+
+        if len(tool_calls) == 1:
+            return [run_tool_call(tool_calls[0])]
+        return list(self.tool_calls_executor.map(run_tool_call, tool_calls))
+
+    @hybridmethod
+    def run_function(
+        self: Optional["SageAI"],
+        *,
+        name: str,
+        args: Dict[str, Any],
+        function_map: Optional[Dict[str, Function]] = None,
+    ) -> Dict[str, Any]:
+        """Runs a function of the instance. Called on the class, as
+        `SageAI.run_function(...)`, it runs a function of the global
+        configuration set with `set_config`, without the instance's executor
+        and memoization."""
         try:
-            function_map = get_function_map()
-            func = function_map[name]
-            function_input_type = get_input_parameter_type(func.function)
-            func_args = function_input_type(**args)
-            func_result = func(func_args)
-            return func_result.dict()
+            if self is None:
+                registry = get_registry()
+                if function_map is None:
+                    function_map = registry.function_map
+                with registry.hooks.stage(Stage.RUN_FUNCTION, function=name):
+                    return function_map[name].invoke(args)
+            if function_map is None:
+                function_map = self.function_map
+            with self.hooks.stage(Stage.RUN_FUNCTION, function=name):
+                return self.memoization.invoke(function_map[name], args)
+        except FunctionTimeoutError as e:
+            return dict(error=str(e), error_type=e.error_type)
         except Exception as e:
             return dict(error=str(e))
@@ -0,0 +1,76 @@
+import time
+from typing import List, Optional, Tuple
+
+from sageai.services.base_defaultvectordb_service import BaseDefaultVectorDBService
+from sageai.types.abstract_vector_store import IndexChanges
+from sageai.types.abstract_async_vectordb import AbstractAsyncVectorDB
+from sageai.utils.embedding_utilities import embed_in_batches_async
+
+
+class AsyncDefaultVectorDBService(BaseDefaultVectorDBService, AbstractAsyncVectorDB):
+    """Async version of `DefaultVectorDBService`. Embeddings are awaited on the
+    event loop, while the in-memory Qdrant collection is only CPU work and is
+    shared with the sync implementation through the vector store.
+    """
+
+    async def index(self):
+        await self.sync_index(incremental=self.is_incremental_index())
+
+    async def reindex_functions(self, *, changed: List[str], removed: List[str]):
+        start = time.perf_counter()
+        changes = self.plan_reindex(changed=changed, removed=removed)
+        await self.update_index(changes, start=start)
+
+    async def sync_index(self, *, incremental: bool):
+        start = time.perf_counter()
+        await self.update_index(self.plan_index(incremental=incremental), start=start)
+
+    async def update_index(self, changes: IndexChanges, *, start: float):
+        embeddings = await self.embed_functions(list(changes.upserts.values()))
+        self.apply_index(changes, embeddings, start=start)
+
+    async def embed_functions(self, texts: List[str]) -> List[List[float]]:
+        """Embeds function texts, reusing the embeddings of instances sharing
+        the same function catalog."""
+        cached, missing = self.get_cached_functions(texts)
+        new_embeddings = await self.embed_documents(missing) if len(missing) > 0 else []
+        return self.cache_functions(cached, missing, new_embeddings)
+
+    async def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embeds texts in batches, reusing on-disk cached embeddings if enabled."""
+        cached, missing = self.get_cached_documents(texts)
+        new_embeddings = await embed_in_batches_async(
+            self.embedder.aembed, missing, **self.get_batch_options()
+        )
+        return self.cache_documents(cached, missing, new_embeddings)
+
+    async def search(self, *, query: str, top_n: int) -> List[str]:
+        query_embedding = await self.get_query_embedding(
+            query, self.embedder.aembed_query
+        )
+        return self.store.search(query_embedding=query_embedding, top_n=top_n)
+
+    async def search_batch(self, *, queries: List[str], top_n: int) -> List[List[str]]:
+        query_embeddings = await self.embed_queries(queries)
+        return self.store.search_batch(query_embeddings=query_embeddings, top_n=top_n)
+
+    async def warm_query_embeddings(self, queries: List[str]):
+        await self.embed_queries(queries)
+
+    async def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embeds queries missing from the query embeddings cache in concurrent
+        batches."""
+        return await self.get_query_embeddings(
+            queries,
+            lambda missing: embed_in_batches_async(
+                self.embedder.aembed, missing, **self.get_batch_options()
+            ),
+        )
+
+    async def search_scored(
+        self, *, query: str, top_n: int
+    ) -> List[Tuple[str, Optional[float]]]:
+        query_embedding = await self.get_query_embedding(
+            query, self.embedder.aembed_query
+        )
+        return self.store.search_scored(query_embedding=query_embedding, top_n=top_n)
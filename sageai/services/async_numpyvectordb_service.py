@@ -0,0 +1,14 @@
+from sageai.services.async_defaultvectordb_service import AsyncDefaultVectorDBService
+from sageai.services.numpystore_service import NumpyStoreService
+from sageai.types.abstract_vector_store import AbstractVectorStore
+
+
+class AsyncNumpyVectorDBService(AsyncDefaultVectorDBService):
+    """Async version of `NumpyVectorDBService`."""
+
+    def create_store(self) -> AbstractVectorStore:
+        return NumpyStoreService(
+            embeddings_model=self.embeddings_model,
+            embeddings_size=self.embedder.get_dimension(),
+            logger=self.logger,
+        )
@@ -0,0 +1,124 @@
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional, Union
+
+from openai import AsyncOpenAI
+from openai._types import NOT_GIVEN
+
+from sageai.services.base_openai_service import BaseOpenAIService
+from sageai.utils.http_client_utilities import get_async_openai_client
+
+
+class AsyncOpenAIService(BaseOpenAIService):
+    @property
+    def client(self) -> AsyncOpenAI:
+        """The client of the running event loop."""
+        return get_async_openai_client(self.config)
+
+    async def create_embeddings(
+        self,
+        *,
+        input: Union[str, List[str], List[int], List[List[int]]],
+        model: Union[str, Literal["text-embedding-ada-002"]],
+        encoding_format: Optional[Literal["float", "base64"]] = NOT_GIVEN,
+        user: Optional[str] = NOT_GIVEN,
+        **kwargs,
+    ) -> List[float]:
+        async with self.rate_limiter.alimit(
+            "embeddings", tokens=self.get_embedding_tokens(input)
+        ):
+            response = await self.client.embeddings.create(
+                input=input,
+                model=model,
+                encoding_format=encoding_format,
+                user=user,
+                **kwargs,
+            )
+        embeddings = response.data[0].embedding
+        return embeddings
+
+    async def create_embeddings_batch(
+        self,
+        *,
+        input: List[str],
+        model: Union[str, Literal["text-embedding-ada-002"]],
+        user: Optional[str] = NOT_GIVEN,
+        **kwargs,
+    ) -> List[List[float]]:
+        async with self.rate_limiter.alimit(
+            "embeddings", tokens=self.get_embedding_tokens(input)
+        ):
+            response = await self.client.embeddings.create(
+                input=input,
+                model=model,
+                user=user,
+                **kwargs,
+            )
+        data = sorted(response.data, key=lambda item: item.index)
+        return [item.embedding for item in data]
+
+    async def chat(
+        self,
+        *,
+        messages: List[Dict[str, str]],
+        model: str,
+        function_call: Optional[Dict[str, Any]] = NOT_GIVEN,
+        functions: Dict[str, Any] = NOT_GIVEN,
+        tools: List[Dict[str, Any]] = NOT_GIVEN,
+        tool_choice: Optional[Union[str, Dict[str, Any]]] = NOT_GIVEN,
+        max_tokens: Optional[int] = NOT_GIVEN,
+        response_format: Optional[Literal["string", "json"]] = NOT_GIVEN,
+        temperature: Optional[float] = NOT_GIVEN,
+        function_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> Dict[str, Any]:
+        """`function_tokens` are the tokens of the function definitions, when
+        already known, for the tokens per minute limit."""
+        tokens = self.get_chat_tokens(
+            messages,
+            functions=functions,
+            tools=tools,
+            max_tokens=max_tokens,
+            function_tokens=function_tokens,
+        )
+        async with self.rate_limiter.alimit("chat", tokens=tokens):
+            response = await self.client.chat.completions.create(
+                messages=messages,
+                model=model,
+                function_call=function_call,
+                functions=functions,
+                tools=tools,
+                tool_choice=tool_choice,
+                max_tokens=max_tokens,
+                response_format=response_format,
+                temperature=temperature,
+                **kwargs,
+            )
+        response_message = response.choices[0].message
+        return response_message
+
+    async def stream_chat(
+        self,
+        *,
+        messages: List[Dict[str, str]],
+        model: str,
+        function_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> AsyncIterator[Any]:
+        """Streams a completion, yielding the message delta of each chunk."""
+        tokens = self.get_chat_tokens(
+            messages,
+            functions=kwargs.get("functions"),
+            tools=kwargs.get("tools"),
+            max_tokens=kwargs.get("max_tokens"),
+            function_tokens=function_tokens,
+        )
+        # The slot is held until the stream is consumed.
+        async with self.rate_limiter.alimit("chat", tokens=tokens):
+            response = await self.client.chat.completions.create(
+                messages=messages,
+                model=model,
+                stream=True,
+                **kwargs,
+            )
+            async for chunk in response:
+                if chunk.choices:
+                    yield chunk.choices[0].delta
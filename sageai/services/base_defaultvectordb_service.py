@@ -0,0 +1,115 @@
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from sageai.services.embedding_cache_service import EmbeddingCacheService
+from sageai.services.qdrantstore_service import QdrantStoreService
+from sageai.types.abstract_vector_store import AbstractVectorStore, IndexChanges
+from sageai.types.base_vectordb import BaseVectorDB
+from sageai.types.index_mode import IndexMode
+from sageai.utils.embedding_utilities import merge_cached_embeddings
+from sageai.utils.logger import get_logger
+
+CachedEmbeddings = Tuple[List[Optional[List[float]]], List[str]]
+
+
+class BaseDefaultVectorDBService(BaseVectorDB):
+    """Index planning and embedding caches shared by `DefaultVectorDBService`
+    and `AsyncDefaultVectorDBService`, which only differ in how they call the
+    embedder."""
+
+    def __init__(self):
+        super().__init__()
+        self.config = self.registry.config
+        self.logger = get_logger("VectorDB", self.config.log_level)
+        self.embedder = self.config.embedder()
+        self.embeddings_model = self.embedder.name
+        self.embeddings_cache = EmbeddingCacheService.from_config(self.config)
+        self.store = self.create_store()
+
+    def create_store(self) -> AbstractVectorStore:
+        store = QdrantStoreService(
+            embeddings_model=self.embeddings_model,
+            embeddings_size=self.embedder.get_dimension(),
+            logger=self.logger,
+        )
+        self.client = store.client
+        self.collection = store.collection
+        return store
+
+    def is_incremental_index(self) -> bool:
+        return self.config.index_mode == IndexMode.INCREMENTAL
+
+    def get_batch_options(self) -> Dict[str, Any]:
+        """Keyword arguments of `embed_in_batches` and its async counterpart."""
+        return dict(
+            batch_size=self.config.embeddings_batch_size,
+            concurrency=self.config.embeddings_concurrency,
+            max_retries=self.config.embeddings_max_retries,
+            logger=self.logger,
+        )
+
+    def plan_index(self, *, incremental: bool) -> IndexChanges:
+        return self.store.plan_index(self.function_map, incremental=incremental)
+
+    def plan_reindex(self, *, changed: List[str], removed: List[str]) -> IndexChanges:
+        if len(self.store.point_ids) == 0:
+            # Nothing was indexed yet, so the reload indexes every function.
+            return self.plan_index(incremental=True)
+        return self.store.plan_reindex(
+            self.function_map, changed=changed, removed=removed
+        )
+
+    def apply_index(
+        self, changes: IndexChanges, embeddings: List[List[float]], *, start: float
+    ):
+        self.store.apply_index(changes, embeddings)
+        self.logger.info(
+            f"Indexed {len(self.function_map)} functions in "
+            f"{time.perf_counter() - start:.3f}s: {len(changes.upserts)} upserted, "
+            f"{len(changes.deletes)} deleted, {changes.unchanged} unchanged"
+        )
+
+    def get_cached_functions(self, texts: List[str]) -> CachedEmbeddings:
+        """Looks function texts up in the embeddings of the instances sharing
+        the same function catalog. Returns the embedding of each text, None on
+        a miss, and the texts missing."""
+        cached = self.registry.catalog.get_many(self.embeddings_model, texts)
+        return cached, get_missing(texts, cached)
+
+    def cache_functions(
+        self,
+        cached: List[Optional[List[float]]],
+        missing: List[str],
+        new_embeddings: List[List[float]],
+    ) -> List[List[float]]:
+        self.registry.catalog.set_many(self.embeddings_model, missing, new_embeddings)
+        return merge_cached_embeddings(cached, new_embeddings)
+
+    def get_cached_documents(self, texts: List[str]) -> CachedEmbeddings:
+        """Looks texts up in the on-disk embeddings cache, if enabled."""
+        if self.embeddings_cache is None:
+            return [None] * len(texts), list(texts)
+
+        cached = self.embeddings_cache.get_many(self.embeddings_model, texts)
+        missing = get_missing(texts, cached)
+        self.logger.info(
+            f"Embeddings cache: {len(texts) - len(missing)} hits, "
+            f"{len(missing)} misses"
+        )
+        return cached, missing
+
+    def cache_documents(
+        self,
+        cached: List[Optional[List[float]]],
+        missing: List[str],
+        new_embeddings: List[List[float]],
+    ) -> List[List[float]]:
+        if self.embeddings_cache is not None and len(missing) > 0:
+            self.embeddings_cache.set_many(
+                self.embeddings_model, missing, new_embeddings
+            )
+        return merge_cached_embeddings(cached, new_embeddings)
+
+
+def get_missing(texts: List[str], cached: List[Optional[List[float]]]) -> List[str]:
+    return [text for text, embedding in zip(texts, cached) if embedding is None]
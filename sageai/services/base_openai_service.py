@@ -0,0 +1,27 @@
+from typing import Any, Dict, List
+
+from sageai.utils.http_client_utilities import get_rate_limiter
+from sageai.utils.token_utilities import estimate_chat_tokens, estimate_embedding_tokens
+
+
+class BaseOpenAIService:
+    """Rate limiting shared by `OpenAIService` and `AsyncOpenAIService`, which
+    only differ in their client."""
+
+    def __init__(self):
+        from sageai.config import get_config
+
+        self.config = get_config()
+        self.rate_limiter = get_rate_limiter(self.config)
+
+    def get_embedding_tokens(self, input) -> int:
+        if not self.rate_limiter.counts_tokens("embeddings"):
+            return 0
+        return estimate_embedding_tokens(input)
+
+    def get_chat_tokens(self, messages: List[Dict[str, Any]], **kwargs) -> int:
+        """Estimated tokens of a chat request, only when a tokens per minute
+        limit needs them."""
+        if not self.rate_limiter.counts_tokens("chat"):
+            return 0
+        return estimate_chat_tokens(messages, **kwargs)
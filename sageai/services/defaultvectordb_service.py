@@ -1,57 +1,67 @@
-from typing import List
+import time
+from typing import List, Optional, Tuple
 
-from qdrant_client import QdrantClient
-from qdrant_client.http.models import models
-
-from sageai.services.openai_service import OpenAIService
+from sageai.services.base_defaultvectordb_service import BaseDefaultVectorDBService
+from sageai.types.abstract_vector_store import IndexChanges
 from sageai.types.abstract_vectordb import AbstractVectorDB
-from sageai.types.function import Function
+from sageai.utils.embedding_utilities import embed_in_batches
 
 
-class DefaultVectorDBService(AbstractVectorDB):
-    def __init__(self):
-        super().__init__()
+class DefaultVectorDBService(BaseDefaultVectorDBService, AbstractVectorDB):
+    def index(self):
+        self.sync_index(incremental=self.is_incremental_index())
 
-        self.openai = OpenAIService()
-        self.client = QdrantClient(":memory:")
-        self.collection = "functions"
+    def reindex_functions(self, *, changed: List[str], removed: List[str]):
+        start = time.perf_counter()
+        changes = self.plan_reindex(changed=changed, removed=removed)
+        self.update_index(changes, start=start)
 
-    def index(self):
-        self.client.recreate_collection(
-            collection_name=self.collection,
-            vectors_config=models.VectorParams(
-                size=self.openai.get_embeddings_size(),
-                distance=models.Distance.COSINE,
-            ),
-        )
+    def sync_index(self, *, incremental: bool):
+        start = time.perf_counter()
+        self.update_index(self.plan_index(incremental=incremental), start=start)
+
+    def update_index(self, changes: IndexChanges, *, start: float):
+        embeddings = self.embed_functions(list(changes.upserts.values()))
+        self.apply_index(changes, embeddings, start=start)
+
+    def embed_functions(self, texts: List[str]) -> List[List[float]]:
+        """Embeds function texts, reusing the embeddings of instances sharing
+        the same function catalog."""
+        cached, missing = self.get_cached_functions(texts)
+        new_embeddings = self.embed_documents(missing) if len(missing) > 0 else []
+        return self.cache_functions(cached, missing, new_embeddings)
 
-        def format_func_embedding(func: Function) -> str:
-            return func.name.replace("_", " ") + " - " + func.description
-
-        records = [
-            models.Record(
-                id=idx,
-                vector=self.openai.create_embeddings(
-                    model="text-embedding-ada-002", input=format_func_embedding(func)
-                ),
-                payload={"func_name": func_name},
-            )
-            for idx, (func_name, func) in enumerate(self.function_map.items())
-        ]
-        self.client.upload_records(
-            collection_name=self.collection,
-            records=records,
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embeds texts in batches, reusing on-disk cached embeddings if enabled."""
+        cached, missing = self.get_cached_documents(texts)
+        new_embeddings = embed_in_batches(
+            self.embedder.embed, missing, **self.get_batch_options()
         )
+        return self.cache_documents(cached, missing, new_embeddings)
 
     def search(self, *, query: str, top_n: int) -> List[str]:
-        query_embedding = self.openai.create_embeddings(
-            model="text-embedding-ada-002",
-            input=query,
-        )
-        hits = self.client.search(
-            collection_name=self.collection,
-            query_vector=query_embedding,
-            limit=top_n,
+        query_embedding = self.get_query_embedding(query, self.embedder.embed_query)
+        return self.store.search(query_embedding=query_embedding, top_n=top_n)
+
+    def search_batch(self, *, queries: List[str], top_n: int) -> List[List[str]]:
+        query_embeddings = self.embed_queries(queries)
+        return self.store.search_batch(query_embeddings=query_embeddings, top_n=top_n)
+
+    def warm_query_embeddings(self, queries: List[str]):
+        self.embed_queries(queries)
+
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embeds queries missing from the query embeddings cache in concurrent
+        batches."""
+        return self.get_query_embeddings(
+            queries,
+            lambda missing: embed_in_batches(
+                self.embedder.embed, missing, **self.get_batch_options()
+            ),
         )
-        func_names = [hit.payload["func_name"] for hit in hits]
-        return func_names
+
+    def search_scored(
+        self, *, query: str, top_n: int
+    ) -> List[Tuple[str, Optional[float]]]:
+        query_embedding = self.get_query_embedding(query, self.embedder.embed_query)
+        return self.store.search_scored(query_embedding=query_embedding, top_n=top_n)
@@ -0,0 +1,170 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from array import array
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from sageai.utils.file_utilities import replace_file
+
+
+class EmbeddingCacheEntry(BaseModel):
+    key: str
+    model: str
+    text: str
+    dimension: int
+    size_bytes: int
+    last_access: float
+
+
+class EmbeddingCacheService:
+    """Content-addressed on-disk cache of embeddings.
+
+    Entries are keyed by a hash of (embedding model, embedding text) and stored
+    as one file each, so concurrent processes can share a cache directory.
+    Eviction removes the least recently used entries once the cache grows past
+    `max_size_bytes`.
+    """
+
+    suffix = ".emb"
+
+    def __init__(self, directory: str, max_size_bytes: Optional[int] = None):
+        self.directory = os.path.abspath(directory)
+        self.max_size_bytes = max_size_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    @classmethod
+    def from_config(cls, config) -> Optional["EmbeddingCacheService"]:
+        if config.embeddings_cache_directory is None:
+            return None
+        max_size_mb = config.embeddings_cache_max_size_mb
+        return cls(
+            config.embeddings_cache_directory,
+            max_size_bytes=max_size_mb * 1024 * 1024
+            if max_size_mb is not None
+            else None,
+        )
+
+    @staticmethod
+    def get_key(model: str, text: str) -> str:
+        return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+    def get_path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + self.suffix)
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        path = self.get_path(self.get_key(model, text))
+        try:
+            with open(path, "rb") as f:
+                f.readline()
+                vector = array("f")
+                vector.frombytes(f.read())
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return vector.tolist()
+
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[List[float]]]:
+        return [self.get(model, text) for text in texts]
+
+    def set(self, model: str, text: str, embedding: List[float]) -> None:
+        path = self.get_path(self.get_key(model, text))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        meta = json.dumps({"model": model, "text": text, "dimension": len(embedding)})
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(meta.encode("utf-8") + b"\n")
+                f.write(array("f", embedding).tobytes())
+            replace_file(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def set_many(
+        self, model: str, texts: List[str], embeddings: List[List[float]]
+    ) -> None:
+        for text, embedding in zip(texts, embeddings):
+            self.set(model, text, embedding)
+        if self.max_size_bytes is not None:
+            self.prune(self.max_size_bytes)
+
+    def get_paths(self) -> List[str]:
+        paths = []
+        for dirpath, _, filenames in os.walk(self.directory):
+            paths.extend(
+                os.path.join(dirpath, filename)
+                for filename in filenames
+                if filename.endswith(self.suffix)
+            )
+        return paths
+
+    def entries(self) -> List[EmbeddingCacheEntry]:
+        """Returns all entries, most recently used first."""
+        entries = []
+        for path in self.get_paths():
+            try:
+                with open(path, "rb") as f:
+                    meta = json.loads(f.readline())
+                stat = os.stat(path)
+            except (OSError, ValueError):
+                continue
+            entries.append(
+                EmbeddingCacheEntry(
+                    key=os.path.basename(path)[: -len(self.suffix)],
+                    model=meta["model"],
+                    text=meta["text"],
+                    dimension=meta["dimension"],
+                    size_bytes=stat.st_size,
+                    last_access=stat.st_mtime,
+                )
+            )
+        return sorted(entries, key=lambda entry: entry.last_access, reverse=True)
+
+    def stats(self) -> Dict[str, Any]:
+        sizes = []
+        for path in self.get_paths():
+            try:
+                sizes.append(os.path.getsize(path))
+            except OSError:
+                continue
+        return dict(
+            directory=self.directory,
+            entries=len(sizes),
+            size_bytes=sum(sizes),
+            max_size_bytes=self.max_size_bytes,
+        )
+
+    def prune(self, max_size_bytes: int) -> int:
+        """Evicts least recently used entries until the cache fits in
+        `max_size_bytes`. Returns the number of evicted entries.
+        """
+        files = []
+        for path in self.get_paths():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+
+        total_size = sum(size for _, size, _ in files)
+        evicted = 0
+        for _, size, path in sorted(files):
+            if total_size <= max_size_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total_size -= size
+            evicted += 1
+        return evicted
+
+    def clear(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory, exist_ok=True)
@@ -0,0 +1,35 @@
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class FunctionCatalogService:
+    """Functions loaded from one functions directory, shared by every SageAI
+    instance using that directory, along with the embeddings of their
+    descriptions. Function maps are never mutated, so instances can swap in
+    their own map on a hot reload without affecting the others."""
+
+    def __init__(self, function_map: Dict[str, Any], fingerprint: str):
+        self.function_map = function_map
+        self.fingerprint = fingerprint
+        self.embeddings: Dict[Tuple[str, str], np.ndarray] = {}
+        self.lock = Lock()
+
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[List[float]]]:
+        with self.lock:
+            embeddings = [self.embeddings.get((model, text)) for text in texts]
+        return [
+            embedding.tolist() if embedding is not None else None
+            for embedding in embeddings
+        ]
+
+    def set_many(
+        self, model: str, texts: List[str], embeddings: List[List[float]]
+    ) -> None:
+        # Stored as float32 arrays, which take a fraction of the memory of
+        # lists of Python floats.
+        arrays = [np.asarray(embedding, dtype=np.float32) for embedding in embeddings]
+        with self.lock:
+            for text, array in zip(texts, arrays):
+                self.embeddings[(model, text)] = array
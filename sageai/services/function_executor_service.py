@@ -0,0 +1,320 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from typing import Any, Callable, Dict, List, Optional
+
+from sageai.services.function_process_service import FunctionProcessService
+from sageai.types.execution_mode import ExecutionMode
+from sageai.types.function_timeout_error import FunctionTimeoutError
+from sageai.utils.prometheus_utilities import format_labels
+from sageai.utils.slot_limiter import SlotLimiter
+
+METRIC_PREFIX = "sageai_function_executor"
+
+
+class FunctionExecutorService:
+    """Runs functions under their `max_concurrency` and `timeout`.
+
+    Calls beyond a function's `max_concurrency` wait for a slot in FIFO order,
+    and a slot is only freed once the call returns, so a function stuck on a
+    slow upstream can't take more than its share of threads. Sync functions
+    with a timeout run on a bounded worker pool, and the caller gets a
+    `FunctionTimeoutError` once it expires; a call that is still queued is
+    cancelled, while one that is already running finishes in the background.
+    Async functions are cancelled when they time out. Sync functions called
+    from `AsyncSageAI` always run on the worker pool, and
+    `ExecutionMode.PROCESS` functions always run on the process pool.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_workers: int,
+        default_timeout: Optional[float],
+        processes: FunctionProcessService,
+    ):
+        self.max_workers = max_workers
+        self.default_timeout = default_timeout
+        self.processes = processes
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="sageai-function"
+        )
+        self.limits: Dict[str, SlotLimiter] = {}
+        self.queued = 0
+        self.running = 0
+        self.metrics: Dict[str, Dict[str, float]] = {}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config) -> "FunctionExecutorService":
+        return cls(
+            max_workers=config.function_max_workers,
+            default_timeout=config.function_timeout,
+            processes=FunctionProcessService.from_config(config),
+        )
+
+    def get_timeout(self, function) -> Optional[float]:
+        return (
+            function.timeout if function.timeout is not None else self.default_timeout
+        )
+
+    def get_limit(self, function) -> Optional[SlotLimiter]:
+        """The function's concurrency slots, recreated if a hot reload changed
+        its `max_concurrency`."""
+        max_concurrency = function.max_concurrency
+        if max_concurrency is None:
+            return None
+        with self.lock:
+            limit = self.limits.get(function.name)
+            if limit is None or limit.maximum != max_concurrency:
+                limit = SlotLimiter(max_concurrency)
+                self.limits[function.name] = limit
+            return limit
+
+    def get_metrics(self, name: str) -> Dict[str, float]:
+        metrics = self.metrics.get(name)
+        if metrics is None:
+            metrics = self.metrics[name] = dict(
+                calls=0, timeouts=0, queue_delay_total=0.0, queue_delay_max=0.0
+            )
+        return metrics
+
+    def record_call(self, name: str, queue_delay: float):
+        with self.lock:
+            metrics = self.get_metrics(name)
+            metrics["calls"] += 1
+            metrics["queue_delay_total"] += queue_delay
+            metrics["queue_delay_max"] = max(metrics["queue_delay_max"], queue_delay)
+
+    def record_timeout(self, name: str):
+        with self.lock:
+            self.get_metrics(name)["timeouts"] += 1
+
+    def submit(
+        self, name: str, call: Callable[[], Dict[str, Any]], *, start: float
+    ) -> Future:
+        """Queues `call` on the worker pool. `start` is when the call began
+        waiting, for its queue delay."""
+
+        def task() -> Dict[str, Any]:
+            with self.lock:
+                self.queued -= 1
+                self.running += 1
+            self.record_call(name, time.perf_counter() - start)
+            try:
+                return call()
+            finally:
+                with self.lock:
+                    self.running -= 1
+
+        def on_done(future: Future):
+            if future.cancelled():
+                with self.lock:
+                    self.queued -= 1
+
+        with self.lock:
+            self.queued += 1
+        try:
+            future = self.executor.submit(task)
+        except BaseException:
+            with self.lock:
+                self.queued -= 1
+            raise
+        future.add_done_callback(on_done)
+        return future
+
+    def submit_call(self, function, func_args, *, start: float) -> Future:
+        if function.execution_mode == ExecutionMode.PROCESS:
+            self.record_call(function.name, time.perf_counter() - start)
+            return self.processes.submit(function, func_args)
+        return self.submit(
+            function.name, lambda: function.invoke_validated(func_args), start=start
+        )
+
+    def run(self, function, func_args) -> Dict[str, Any]:
+        """Runs `function` on its validated input: inline when it has no
+        timeout, on the worker pool when it has one, and on the process pool
+        for `ExecutionMode.PROCESS`."""
+        timeout = self.get_timeout(function)
+        limit = self.get_limit(function)
+        start = time.perf_counter()
+        if limit is not None and not limit.acquire(timeout):
+            self.record_timeout(function.name)
+            raise FunctionTimeoutError(function.name, timeout)
+
+        if timeout is None and function.execution_mode != ExecutionMode.PROCESS:
+            self.record_call(function.name, time.perf_counter() - start)
+            try:
+                return function.invoke_validated(func_args)
+            finally:
+                if limit is not None:
+                    limit.release()
+
+        try:
+            future = self.submit_call(function, func_args, start=start)
+        except BaseException:
+            if limit is not None:
+                limit.release()
+            raise
+        if limit is not None:
+            future.add_done_callback(lambda _: limit.release())
+        if timeout is None:
+            return future.result()
+        try:
+            return future.result(
+                timeout=max(0.0, timeout - (time.perf_counter() - start))
+            )
+        except FuturesTimeoutError:
+            future.cancel()
+            self.record_timeout(function.name)
+            raise FunctionTimeoutError(function.name, timeout)
+
+    async def arun(self, function, func_args) -> Dict[str, Any]:
+        """Async `run`. Async functions are awaited and cancelled on timeout,
+        while sync functions run on the worker pool."""
+        timeout = self.get_timeout(function)
+        try:
+            return await asyncio.wait_for(
+                self.arun_limited(function, func_args), timeout
+            )
+        except asyncio.TimeoutError:
+            self.record_timeout(function.name)
+            raise FunctionTimeoutError(function.name, timeout)
+
+    async def arun_limited(self, function, func_args) -> Dict[str, Any]:
+        limit = self.get_limit(function)
+        start = time.perf_counter()
+        if limit is not None:
+            await limit.aacquire()
+
+        if function.execution_mode != ExecutionMode.PROCESS and function.plan.is_async:
+            self.record_call(function.name, time.perf_counter() - start)
+            try:
+                return await function.ainvoke_validated(func_args)
+            finally:
+                if limit is not None:
+                    limit.release()
+
+        try:
+            future = self.submit_call(function, func_args, start=start)
+        except BaseException:
+            if limit is not None:
+                limit.release()
+            raise
+        if limit is not None:
+            future.add_done_callback(lambda _: limit.release())
+        # Cancelling the wrapping future, e.g. on timeout, cancels the call if
+        # it is still queued.
+        return await asyncio.wrap_future(future)
+
+    def close(self):
+        """Shuts down the thread and process pools. Queued calls are cancelled,
+        while calls that are already running finish in the background."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.processes.shutdown()
+
+    def stats(self) -> Dict[str, Any]:
+        """Worker pool saturation and queue depth, and per function the calls
+        waiting for a slot, timeouts and queue delays."""
+        with self.lock:
+            functions = {}
+            for name in sorted(set(self.metrics) | set(self.limits)):
+                metrics = dict(self.get_metrics(name))
+                calls = metrics["calls"]
+                metrics["queue_delay_avg"] = (
+                    metrics["queue_delay_total"] / calls if calls else 0.0
+                )
+                limit = self.limits.get(name)
+                if limit is not None:
+                    metrics.update(
+                        max_concurrency=limit.maximum,
+                        in_flight=limit.in_flight,
+                        waiting=len(limit.waiters),
+                    )
+                functions[name] = metrics
+            stats = dict(
+                workers=self.max_workers,
+                running=self.running,
+                queued=self.queued,
+                saturation=self.running / self.max_workers,
+                functions=functions,
+            )
+        stats["processes"] = self.processes.stats()
+        return stats
+
+    def export_prometheus(self) -> str:
+        """Exports the stats as gauges and counters in the Prometheus text
+        exposition format."""
+        stats = self.stats()
+        lines: List[str] = []
+
+        def add(name: str, kind: str, help: str, samples: List[tuple]):
+            lines.append(f"# HELP {METRIC_PREFIX}_{name} {help}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} {kind}")
+            for labels, value in samples:
+                formatted = format_labels(labels) if len(labels) > 0 else ""
+                lines.append(f"{METRIC_PREFIX}_{name}{formatted} {value}")
+
+        add("workers", "gauge", "Size of the worker pool.", [({}, stats["workers"])])
+        add("running", "gauge", "Busy workers.", [({}, stats["running"])])
+        add("queued", "gauge", "Calls waiting for a worker.", [({}, stats["queued"])])
+        add(
+            "saturation",
+            "gauge",
+            "Fraction of busy workers.",
+            [({}, stats["saturation"])],
+        )
+        processes = stats["processes"]
+        add(
+            "process_workers",
+            "gauge",
+            "Size of the process pool.",
+            [({}, processes["workers"])],
+        )
+        add(
+            "process_in_flight",
+            "gauge",
+            "Calls submitted to the process pool and not done yet.",
+            [({}, processes["in_flight"])],
+        )
+        add(
+            "process_saturation",
+            "gauge",
+            "Fraction of busy worker processes.",
+            [({}, processes["saturation"])],
+        )
+        functions = stats["functions"].items()
+        add(
+            "waiting",
+            "gauge",
+            "Calls waiting for a slot under the function's max_concurrency.",
+            [
+                (dict(function=name), metrics["waiting"])
+                for name, metrics in functions
+                if "waiting" in metrics
+            ],
+        )
+        add(
+            "calls_total",
+            "counter",
+            "Function calls started.",
+            [(dict(function=name), metrics["calls"]) for name, metrics in functions],
+        )
+        add(
+            "timeouts_total",
+            "counter",
+            "Function calls that timed out.",
+            [(dict(function=name), metrics["timeouts"]) for name, metrics in functions],
+        )
+        add(
+            "queue_delay_seconds_total",
+            "counter",
+            "Time calls spent waiting for a worker or a slot.",
+            [
+                (dict(function=name), metrics["queue_delay_total"])
+                for name, metrics in functions
+            ],
+        )
+        return "\n".join(lines) + "\n"
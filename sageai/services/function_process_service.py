@@ -0,0 +1,197 @@
+import multiprocessing
+import os
+import pickle
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple
+
+from sageai.types.execution_mode import ExecutionMode
+from sageai.types.log_level import LogLevel
+from sageai.utils.file_utilities import load_function_from_file
+from sageai.utils.logger import get_logger
+
+# The module name and source path of a function, which a worker needs to
+# import it.
+FunctionSource = Tuple[str, str]
+
+_worker_functions: Dict[str, Any] = {}
+
+
+def get_function_source(function) -> FunctionSource:
+    if function.source_path is None:
+        raise Exception(
+            f"Function {function.name} was not loaded from the functions "
+            f"directory, so it can't run in a worker process."
+        )
+    return os.path.basename(os.path.dirname(function.source_path)), function.source_path
+
+
+def load_worker_function(source: FunctionSource):
+    module_name, source_path = source
+    function = _worker_functions.get(source_path)
+    if function is None:
+        function = load_function_from_file(module_name, source_path)
+        _worker_functions[source_path] = function
+    return function
+
+
+def init_worker(sources: List[FunctionSource]):
+    """Imports the process functions once, when a worker starts."""
+    for source in sources:
+        try:
+            load_worker_function(source)
+        except Exception:
+            # Reported by the calls of the function instead.
+            pass
+
+
+def warm_up() -> int:
+    return os.getpid()
+
+
+def run_in_worker(source: FunctionSource, payload: bytes) -> Dict[str, Any]:
+    """Runs a function on its pickled validated input and returns the
+    serialized output. The input is only unpickled once the function's module
+    is imported, since its model is defined there."""
+    function = load_worker_function(source)
+    return function.invoke_validated(pickle.loads(payload))
+
+
+class FunctionProcessService:
+    """Warm pool of worker processes running `ExecutionMode.PROCESS` functions,
+    so CPU-bound functions don't hold the GIL of the SageAI process.
+
+    The pool is created by the first call, rather than with the SageAI
+    instance, so importing a script that creates an instance doesn't start
+    processes. All workers are started then, and import the modules of the
+    registered process functions, so later calls don't pay for process startup
+    or imports. Function modules are registered under a name unique to their
+    file in both processes, which lets their input models be pickled.
+
+    The pool belongs to one SageAI instance, so every instance with process
+    functions runs its own `max_workers` processes. A pool broken by a worker
+    dying, e.g. killed by the OS, is replaced on the next call.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_workers: Optional[int],
+        start_method: str,
+        log_level: LogLevel = LogLevel.WARNING,
+    ):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.start_method = start_method
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self.pool_broken = False
+        self.sources: List[FunctionSource] = []
+        self.in_flight = 0
+        self.lock = threading.Lock()
+        self.logger = get_logger("FunctionProcessService", log_level)
+
+    @classmethod
+    def from_config(cls, config) -> "FunctionProcessService":
+        return cls(
+            max_workers=config.function_max_processes,
+            start_method=config.function_process_start_method,
+            log_level=config.log_level,
+        )
+
+    @staticmethod
+    def get_sources(function_map: Dict[str, Any]) -> List[FunctionSource]:
+        return [
+            get_function_source(function)
+            for function in function_map.values()
+            if function.execution_mode == ExecutionMode.PROCESS
+        ]
+
+    def create_pool(self, sources: List[FunctionSource]) -> ProcessPoolExecutor:
+        pool = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context(self.start_method),
+            initializer=init_worker,
+            initargs=(sources,),
+        )
+        # Workers are otherwise only started as calls come in.
+        for _ in range(self.max_workers):
+            pool.submit(warm_up)
+        return pool
+
+    def register(self, function_map: Dict[str, Any]):
+        """Registers the functions of `function_map` that run in a process, for
+        the workers to import when they start."""
+        sources = self.get_sources(function_map)
+        with self.lock:
+            self.sources = sources
+
+    def restart(self, function_map: Dict[str, Any]):
+        """Stops the workers after a hot reload, since they hold the previous
+        modules, and the next call starts new ones. Calls already running
+        finish on the old workers."""
+        with self.lock:
+            pool, self.pool = self.pool, None
+            self.pool_broken = False
+        if pool is not None:
+            pool.shutdown(wait=False)
+        self.register(function_map)
+
+    def submit(self, function, func_args) -> Future:
+        """Runs a function on its validated input in a worker, the future
+        resolving to its serialized output."""
+        source = get_function_source(function)
+        payload = pickle.dumps(func_args)
+        with self.lock:
+            if source not in self.sources:
+                self.sources.append(source)
+            if self.pool is None:
+                self.pool = self.create_pool(self.sources)
+            elif self.pool_broken:
+                self.replace_broken_pool()
+            pool = self.pool
+            try:
+                future = pool.submit(run_in_worker, source, payload)
+            except BrokenProcessPool:
+                # A worker died before a failed call of the pool was seen.
+                self.replace_broken_pool()
+                pool = self.pool
+                future = pool.submit(run_in_worker, source, payload)
+            self.in_flight += 1
+        future.add_done_callback(partial(self.on_done, pool))
+        return future
+
+    def replace_broken_pool(self):
+        """Replaces a pool whose worker died. The calls it was running already
+        failed with `BrokenProcessPool`. Called with the lock held."""
+        self.logger.warning(
+            f"Lost the worker processes of a broken pool, starting "
+            f"{self.max_workers} new ones."
+        )
+        self.pool.shutdown(wait=False)
+        self.pool = self.create_pool(self.sources)
+        self.pool_broken = False
+
+    def on_done(self, pool: ProcessPoolExecutor, future: Future):
+        broken = not future.cancelled() and isinstance(
+            future.exception(), BrokenProcessPool
+        )
+        with self.lock:
+            self.in_flight -= 1
+            if broken and pool is self.pool:
+                self.pool_broken = True
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return dict(
+                workers=self.max_workers,
+                in_flight=self.in_flight,
+                saturation=min(1.0, self.in_flight / self.max_workers),
+            )
+
+    def shutdown(self):
+        with self.lock:
+            pool, self.pool = self.pool, None
+            self.pool_broken = False
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,80 @@
+import os
+from threading import Event, Thread
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sageai.utils.file_utilities import get_functions_directories, get_source_mtime
+
+OnChange = Callable[[List[str], List[str]], None]
+
+
+class FunctionWatcherService:
+    """Polls the functions directory on a background thread and reports added
+    or changed function folders and removed ones to `on_change`. Without a
+    thread, `get_changes` returns them since the previous scan."""
+
+    def __init__(
+        self,
+        functions_directory: str,
+        *,
+        interval: float,
+        on_change: Optional[OnChange] = None,
+        logger,
+    ):
+        self.functions_directory = functions_directory
+        self.interval = interval
+        self.on_change = on_change
+        self.logger = logger
+        self.snapshot = self.scan()
+        self._stop = Event()
+        self._thread: Optional[Thread] = None
+
+    def scan(self) -> Dict[str, float]:
+        snapshot = {}
+        for dirpath in get_functions_directories(self.logger, self.functions_directory):
+            try:
+                snapshot[os.path.abspath(dirpath)] = get_source_mtime(dirpath)
+            except (OSError, ValueError):
+                continue
+        return snapshot
+
+    def get_changes(self) -> Tuple[List[str], List[str]]:
+        snapshot = self.scan()
+        changed = [
+            dirpath
+            for dirpath, mtime in snapshot.items()
+            if self.snapshot.get(dirpath) != mtime
+        ]
+        removed = [dirpath for dirpath in self.snapshot if dirpath not in snapshot]
+        self.snapshot = snapshot
+
+        if len(changed) > 0 or len(removed) > 0:
+            self.logger.info(
+                f"Functions directory changed: {len(changed)} added or changed, "
+                f"{len(removed)} removed"
+            )
+        return changed, removed
+
+    def poll(self):
+        changed, removed = self.get_changes()
+        if len(changed) > 0 or len(removed) > 0:
+            self.on_change(changed, removed)
+
+    def run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                self.logger.error(f"Failed to reload functions: {e}")
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = Thread(target=self.run, name="sageai-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,95 @@
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, ContextManager, Dict, List, Optional, Type
+
+from sageai.types.abstract_hooks import AbstractHooks
+from sageai.types.stage import Stage
+
+
+class RunningStage:
+    """A stage being run. Streaming stages yield their events within `paused`,
+    so the stage only measures producing the stream, and hooks can step out of
+    its context while the consumer holds an event."""
+
+    def __init__(
+        self,
+        hooks: List[AbstractHooks],
+        stage: Optional[Stage],
+        attributes: Dict[str, Any],
+        contexts: List[Any],
+    ):
+        self.hooks = hooks
+        self.stage = stage
+        self.attributes = attributes
+        self.contexts = contexts
+        self.paused_duration = 0.0
+
+    def paused(self) -> ContextManager:
+        if len(self.hooks) == 0:
+            return NO_PAUSE
+        return self.run_paused()
+
+    @contextmanager
+    def run_paused(self):
+        self.contexts = [
+            hook.on_stage_pause(self.stage, self.attributes, context=context)
+            for hook, context in zip(reversed(self.hooks), reversed(self.contexts))
+        ][::-1]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.paused_duration += time.perf_counter() - start
+            self.contexts = [
+                hook.on_stage_resume(self.stage, self.attributes, context=context)
+                for hook, context in zip(self.hooks, self.contexts)
+            ]
+
+
+NO_PAUSE = nullcontext()
+NO_HOOKS = nullcontext(RunningStage([], None, {}, []))
+
+
+class HooksService:
+    """Runs the configured hooks around the stages of the chat pipeline."""
+
+    def __init__(self, hooks: List[AbstractHooks]):
+        self.hooks = hooks
+
+    @classmethod
+    def from_config(cls, config) -> "HooksService":
+        return cls([hook() for hook in config.hooks])
+
+    def stage(self, stage: Stage, **attributes) -> ContextManager[RunningStage]:
+        if len(self.hooks) == 0:
+            return NO_HOOKS
+        return self.run_stage(stage, attributes)
+
+    @contextmanager
+    def run_stage(self, stage: Stage, attributes):
+        contexts = [hook.on_stage_start(stage, attributes) for hook in self.hooks]
+        running = RunningStage(self.hooks, stage, attributes, contexts)
+        error = None
+        start = time.perf_counter()
+        try:
+            yield running
+        except GeneratorExit:
+            # A stream that is closed before its end isn't a failure.
+            raise
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            duration = time.perf_counter() - start - running.paused_duration
+            for hook, context in zip(reversed(self.hooks), reversed(running.contexts)):
+                hook.on_stage_end(
+                    stage, attributes, context=context, duration=duration, error=error
+                )
+
+    def get(self, hook_class: Type[AbstractHooks]) -> Optional[AbstractHooks]:
+        """Returns the configured hook of `hook_class`, e.g. to export the
+        metrics of `LatencyCollectorService`."""
+        for hook in self.hooks:
+            if isinstance(hook, hook_class):
+                return hook
+        return None
@@ -0,0 +1,117 @@
+import math
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from sageai.types.abstract_hooks import AbstractHooks
+from sageai.types.stage import Stage
+from sageai.utils.prometheus_utilities import format_labels
+
+METRIC_NAME = "sageai_stage_duration_seconds"
+ERRORS_METRIC_NAME = "sageai_stage_errors_total"
+
+
+class LatencySeries:
+    def __init__(self, window: int):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.sum = 0.0
+        self.errors = 0
+
+
+def get_quantile(sorted_samples: List[float], quantile: float) -> float:
+    """Nearest-rank quantile of non-empty sorted samples."""
+    rank = max(1, math.ceil(quantile * len(sorted_samples)))
+    return sorted_samples[rank - 1]
+
+
+class LatencyCollectorService(AbstractHooks):
+    """In-memory latency collector. Keeps the latest `window` durations of each
+    stage, and of each function for the function stages, and reports their
+    p50/p95/p99 along with running counts, sums and errors."""
+
+    quantiles = (0.5, 0.95, 0.99)
+
+    def __init__(self, window: int = 10000):
+        self.window = window
+        self.series: Dict[Tuple[str, Optional[str]], LatencySeries] = {}
+        self.lock = threading.Lock()
+
+    def on_stage_start(self, stage: Stage, attributes: Dict[str, Any]) -> Any:
+        return None
+
+    def on_stage_end(
+        self,
+        stage: Stage,
+        attributes: Dict[str, Any],
+        *,
+        context: Any,
+        duration: float,
+        error: Optional[BaseException],
+    ) -> None:
+        key = (stage.value, attributes.get("function"))
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = LatencySeries(self.window)
+            series.samples.append(duration)
+            series.count += 1
+            series.sum += duration
+            if error is not None:
+                series.errors += 1
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Returns one dict per stage, and per function, with its `count`,
+        `sum`, `errors` and p50/p95/p99 durations in seconds."""
+        with self.lock:
+            series = [
+                (key, sorted(value.samples), value.count, value.sum, value.errors)
+                for key, value in sorted(
+                    self.series.items(), key=lambda item: (item[0][0], item[0][1] or "")
+                )
+            ]
+
+        snapshot = []
+        for (stage, function), samples, count, total, errors in series:
+            entry = dict(stage=stage, function=function)
+            for quantile in self.quantiles:
+                entry[f"p{round(quantile * 100)}"] = get_quantile(samples, quantile)
+            entry.update(count=count, sum=total, errors=errors)
+            snapshot.append(entry)
+        return snapshot
+
+    def export_prometheus(self) -> str:
+        """Exports the durations as a Prometheus summary, and the errors as a
+        counter, in the text exposition format."""
+        snapshot = self.snapshot()
+        lines = [
+            f"# HELP {METRIC_NAME} Duration of SageAI chat pipeline stages.",
+            f"# TYPE {METRIC_NAME} summary",
+        ]
+        for entry in snapshot:
+            labels = dict(stage=entry["stage"])
+            if entry["function"] is not None:
+                labels["function"] = entry["function"]
+            for quantile in self.quantiles:
+                value = entry[f"p{round(quantile * 100)}"]
+                lines.append(
+                    f"{METRIC_NAME}"
+                    f"{format_labels(dict(labels, quantile=str(quantile)))} {value}"
+                )
+            lines.append(f"{METRIC_NAME}_sum{format_labels(labels)} {entry['sum']}")
+            lines.append(f"{METRIC_NAME}_count{format_labels(labels)} {entry['count']}")
+
+        lines.append(f"# HELP {ERRORS_METRIC_NAME} Failed SageAI chat pipeline stages.")
+        lines.append(f"# TYPE {ERRORS_METRIC_NAME} counter")
+        for entry in snapshot:
+            labels = dict(stage=entry["stage"])
+            if entry["function"] is not None:
+                labels["function"] = entry["function"]
+            lines.append(
+                f"{ERRORS_METRIC_NAME}{format_labels(labels)} {entry['errors']}"
+            )
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        with self.lock:
+            self.series = {}
@@ -0,0 +1,93 @@
+import re
+import zlib
+from functools import lru_cache
+from typing import List, Tuple
+
+import numpy as np
+
+from sageai.types.abstract_embedder import AbstractEmbedder
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+class LocalEmbedderService(AbstractEmbedder):
+    """Offline embedder that hashes words, word pairs and character trigrams
+    into a fixed size vector with NumPy. It needs no network access or API key,
+    and embeds a query in well under a millisecond, at the cost of only
+    matching on shared vocabulary rather than meaning."""
+
+    default_dimension = 512
+    char_ngram_size = 3
+    word_weight = 2.0
+
+    def __init__(self):
+        super().__init__()
+        from sageai.config import get_config
+
+        config = get_config()
+        self._dimension = config.embeddings_dimension or self.default_dimension
+        self.name = f"local-hashed-ngrams-{self._dimension}"
+
+        self.get_token_features = lru_cache(maxsize=65536)(self._get_token_features)
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_matrix(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_vector(text).tolist()
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        return self.embed(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return self.embed_query(text)
+
+    def embed_matrix(self, texts: List[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self._dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            matrix[row] = self.embed_vector(text)
+        return matrix
+
+    def embed_vector(self, text: str) -> np.ndarray:
+        tokens = TOKEN_PATTERN.findall(text.lower())
+        indices, weights = [], []
+        for token in tokens:
+            token_indices, token_weights = self.get_token_features(token)
+            indices.extend(token_indices)
+            weights.extend(token_weights)
+        for first, second in zip(tokens, tokens[1:]):
+            index, sign = self.hash_feature(f"{first} {second}")
+            indices.append(index)
+            weights.append(sign * self.word_weight)
+
+        vector = np.bincount(
+            np.asarray(indices, dtype=np.intp),
+            weights=np.asarray(weights, dtype=np.float64),
+            minlength=self._dimension,
+        )
+        # Sublinear term frequency, so repeated words don't dominate.
+        vector = np.sign(vector) * np.log1p(np.abs(vector))
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector.astype(np.float32)
+
+    def _get_token_features(self, token: str) -> Tuple[List[int], List[float]]:
+        index, sign = self.hash_feature(token)
+        indices, weights = [index], [sign * self.word_weight]
+
+        padded = f"<{token}>"
+        for start in range(max(1, len(padded) - self.char_ngram_size + 1)):
+            index, sign = self.hash_feature(
+                padded[start : start + self.char_ngram_size]
+            )
+            indices.append(index)
+            weights.append(sign)
+        return indices, weights
+
+    def hash_feature(self, feature: str) -> Tuple[int, float]:
+        """Stable hash of a feature to a vector index and a sign. The sign keeps
+        colliding features from only ever adding up."""
+        feature_hash = zlib.crc32(feature.encode("utf-8"))
+        sign = 1.0 if (feature_hash // self._dimension) % 2 == 0 else -1.0
+        return feature_hash % self._dimension, sign
@@ -0,0 +1,61 @@
+from threading import Lock
+from typing import Any, Dict, Optional
+
+from sageai.types.abstract_result_cache import AbstractResultCache
+from sageai.utils.lru_cache import LRUCache
+
+
+class LRUResultCacheService(AbstractResultCache):
+    """In-process result cache with one LRU cache per function, sized by the
+    function's `max_entries`."""
+
+    default_max_entries = 1024
+
+    def __init__(self):
+        self.caches: Dict[str, LRUCache] = {}
+        self._lock = Lock()
+
+    def get_cache(
+        self, namespace: str, ttl: float, max_entries: Optional[int]
+    ) -> LRUCache:
+        cache = self.caches.get(namespace)
+        if cache is None:
+            with self._lock:
+                cache = self.caches.get(namespace)
+                if cache is None:
+                    cache = LRUCache(
+                        max_entries
+                        if max_entries is not None
+                        else self.default_max_entries,
+                        ttl=ttl,
+                    )
+                    self.caches[namespace] = cache
+        return cache
+
+    def get(self, namespace: str, key: str) -> Optional[Dict[str, Any]]:
+        cache = self.caches.get(namespace)
+        if cache is None:
+            return None
+        return cache.get(key)
+
+    def set(
+        self,
+        namespace: str,
+        key: str,
+        value: Dict[str, Any],
+        *,
+        ttl: float,
+        max_entries: Optional[int],
+    ) -> None:
+        self.get_cache(namespace, ttl, max_entries).set(key, value)
+
+    def invalidate(self, namespace: str) -> None:
+        with self._lock:
+            self.caches.pop(namespace, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.caches.clear()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {namespace: cache.stats() for namespace, cache in self.caches.items()}
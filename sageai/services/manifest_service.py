@@ -0,0 +1,188 @@
+import json
+import os
+import tempfile
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from pydantic import BaseModel
+
+from sageai.types.execution_mode import ExecutionMode
+from sageai.types.function import Function
+from sageai.types.lazy_function import LazyFunction
+from sageai.types.semantic_cache_mode import SemanticCacheMode
+from sageai.utils.file_utilities import (
+    get_functions_directories,
+    get_source_hash,
+    get_source_mtime,
+    load_function_from_file,
+    replace_file,
+)
+from sageai.utils.token_utilities import count_schema_tokens
+
+
+class ManifestEntry(BaseModel):
+    name: str
+    description: str
+    parameters: Dict[str, Any]
+    source_path: str
+    mtime: float
+    hash: str
+    # missing from manifests written before token counting was added
+    token_count: Optional[int] = None
+    semantic_cache: Optional[SemanticCacheMode] = None
+    execution_mode: ExecutionMode = ExecutionMode.THREAD
+
+
+class ManifestService:
+    """Reads and maintains a manifest of the functions directory, so the
+    function map can be served without importing every function module.
+
+    Entries whose sources changed since the manifest was written are rebuilt by
+    importing their modules. Imports hold the GIL and the import lock, so they
+    run one after the other.
+    """
+
+    version = 1
+
+    def __init__(
+        self,
+        functions_directory: str,
+        *,
+        manifest_path: Optional[str] = None,
+        logger,
+    ):
+        self.functions_directory = os.path.abspath(functions_directory)
+        self.manifest_path = manifest_path or os.path.join(
+            self.functions_directory, ".sageai_manifest.json"
+        )
+        self.logger = logger
+
+    @classmethod
+    def from_config(cls, config, logger) -> "ManifestService":
+        return cls(
+            config.functions_directory,
+            manifest_path=config.manifest_path,
+            logger=logger,
+        )
+
+    def load(self) -> Dict[str, ManifestEntry]:
+        """Returns the manifest entries keyed by their source path."""
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if manifest.get("version") != self.version:
+            return {}
+        entries = [ManifestEntry(**entry) for entry in manifest["functions"]]
+        return {entry.source_path: entry for entry in entries}
+
+    def save(self, entries: List[ManifestEntry]):
+        manifest = dict(
+            version=self.version,
+            functions=[entry.dict() for entry in sorted(entries, key=lambda e: e.name)],
+        )
+        directory = os.path.dirname(self.manifest_path)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(manifest, f, indent=2)
+            replace_file(tmp_path, self.manifest_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def generate_functions_map(self) -> Dict[str, Union[Function, LazyFunction]]:
+        manifest = self.load()
+        directories = get_functions_directories(self.logger, self.functions_directory)
+
+        fresh_entries, stale_directories = [], []
+        dirty = False
+        for dirpath in directories:
+            entry = manifest.get(self.get_source_path(dirpath))
+            if entry is None:
+                stale_directories.append(dirpath)
+                continue
+
+            mtime = get_source_mtime(dirpath)
+            if mtime == entry.mtime:
+                fresh_entries.append(entry)
+            elif get_source_hash(dirpath) == entry.hash:
+                entry.mtime = mtime
+                fresh_entries.append(entry)
+                dirty = True
+            else:
+                stale_directories.append(dirpath)
+
+        self.logger.info(
+            f"Manifest: {len(fresh_entries)} fresh, "
+            f"{len(stale_directories)} stale entries"
+        )
+
+        rebuilt = [self.build_entry(dirpath) for dirpath in stale_directories]
+
+        entries = fresh_entries + [entry for entry, _ in rebuilt]
+        if dirty or len(rebuilt) > 0 or len(fresh_entries) != len(manifest):
+            self.save(entries)
+
+        available_functions = {
+            entry.name: self.get_lazy_function(entry) for entry in fresh_entries
+        }
+        available_functions.update({function.name: function for _, function in rebuilt})
+
+        if len(available_functions) == 0:
+            raise Exception("No functions found")
+        return dict(sorted(available_functions.items()))
+
+    def build_entry(self, dirpath: str) -> Tuple[ManifestEntry, Function]:
+        function_file = os.path.join(dirpath, "function.py")
+        mtime = get_source_mtime(dirpath)
+        function = load_function_from_file(os.path.basename(dirpath), function_file)
+        return self.create_entry(function, dirpath, mtime), function
+
+    def create_entry(
+        self, function: Function, dirpath: str, mtime: float
+    ) -> ManifestEntry:
+        return ManifestEntry(
+            name=function.name,
+            description=function.description,
+            parameters=function.parameters,
+            token_count=function.token_count,
+            semantic_cache=function.semantic_cache,
+            execution_mode=function.execution_mode,
+            source_path=self.get_source_path(dirpath),
+            mtime=mtime,
+            hash=get_source_hash(dirpath),
+        )
+
+    def get_source_path(self, dirpath: str) -> str:
+        return os.path.relpath(
+            os.path.join(dirpath, "function.py"), self.functions_directory
+        )
+
+    def refresh(self, functions: List[Tuple[str, Function, float]], removed: List[str]):
+        """Updates the entries of functions reloaded from their folders, given as
+        (folder, function, source mtime before the import), and drops those of
+        the `removed` folders, e.g. after a hot reload."""
+        entries = self.load()
+        for dirpath in removed:
+            entries.pop(self.get_source_path(dirpath), None)
+        for dirpath, function, mtime in functions:
+            entry = self.create_entry(function, dirpath, mtime)
+            entries[entry.source_path] = entry
+        self.save(list(entries.values()))
+
+    def get_lazy_function(self, entry: ManifestEntry) -> LazyFunction:
+        source_path = os.path.join(self.functions_directory, entry.source_path)
+        return LazyFunction(
+            name=entry.name,
+            description=entry.description,
+            parameters=entry.parameters,
+            token_count=entry.token_count
+            if entry.token_count is not None
+            else count_schema_tokens(entry.parameters),
+            source_path=source_path,
+            module_name=os.path.basename(os.path.dirname(source_path)),
+            semantic_cache=entry.semantic_cache,
+            execution_mode=entry.execution_mode,
+        )
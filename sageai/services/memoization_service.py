@@ -0,0 +1,92 @@
+import copy
+from typing import Any, Dict, List
+
+from sageai.services.function_executor_service import FunctionExecutorService
+from sageai.services.hooks_service import HooksService
+from sageai.types.abstract_result_cache import AbstractResultCache
+from sageai.types.stage import Stage
+from sageai.utils.single_flight import AsyncSingleFlight, SingleFlight
+
+
+class MemoizationService:
+    """Memoizes the results of functions declared with a `cache_ttl`, keyed on
+    their validated input, so equivalent arguments share a cache entry.
+    Concurrent identical calls run the function only once. Functions run
+    through `executor`, which applies their concurrency limit and timeout."""
+
+    def __init__(
+        self,
+        result_cache: AbstractResultCache,
+        hooks: HooksService,
+        executor: FunctionExecutorService,
+    ):
+        self.result_cache = result_cache
+        self.hooks = hooks
+        self.executor = executor
+        self.single_flight = SingleFlight()
+        self.async_single_flight = AsyncSingleFlight()
+
+    @staticmethod
+    def get_key(func_args) -> str:
+        return func_args.json(sort_keys=True)
+
+    def invoke(self, function, args: Dict[str, Any]) -> Dict[str, Any]:
+        func_args = self.validate(function, args)
+        if function.cache_ttl is None:
+            return self.execute(function, func_args)
+
+        key = self.get_key(func_args)
+        cached = self.result_cache.get(function.name, key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+
+        def call() -> Dict[str, Any]:
+            result = self.execute(function, func_args)
+            self.store(function, key, result)
+            return result
+
+        return copy.deepcopy(self.single_flight.do((function.name, key), call))
+
+    async def ainvoke(self, function, args: Dict[str, Any]) -> Dict[str, Any]:
+        func_args = self.validate(function, args)
+        if function.cache_ttl is None:
+            return await self.aexecute(function, func_args)
+
+        key = self.get_key(func_args)
+        cached = self.result_cache.get(function.name, key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+
+        async def call() -> Dict[str, Any]:
+            result = await self.aexecute(function, func_args)
+            self.store(function, key, result)
+            return result
+
+        result = await self.async_single_flight.do((function.name, key), call)
+        return copy.deepcopy(result)
+
+    def validate(self, function, args: Dict[str, Any]):
+        with self.hooks.stage(Stage.VALIDATION, function=function.name):
+            return function.plan.validate_input(args)
+
+    def execute(self, function, func_args) -> Dict[str, Any]:
+        with self.hooks.stage(Stage.EXECUTION, function=function.name):
+            return self.executor.run(function, func_args)
+
+    async def aexecute(self, function, func_args) -> Dict[str, Any]:
+        with self.hooks.stage(Stage.EXECUTION, function=function.name):
+            return await self.executor.arun(function, func_args)
+
+    def invalidate(self, names: List[str]):
+        """Drops the memoized results of functions that were reloaded."""
+        for name in names:
+            self.result_cache.invalidate(name)
+
+    def store(self, function, key: str, result: Dict[str, Any]):
+        self.result_cache.set(
+            function.name,
+            key,
+            copy.deepcopy(result),
+            ttl=function.cache_ttl,
+            max_entries=function.max_entries,
+        )
@@ -0,0 +1,110 @@
+from typing import List, Tuple
+
+import numpy as np
+
+from sageai.types.abstract_vector_store import AbstractVectorStore, IndexChanges
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class NumpyStoreService(AbstractVectorStore):
+    """Function embeddings kept pre-normalized in one contiguous float32
+    matrix. A search is a single matrix product followed by `argpartition`.
+
+    Index updates build new arrays and swap them in as one tuple, so searches
+    running concurrently always see a consistent set of points.
+    """
+
+    def __init__(self, *, embeddings_model: str, embeddings_size: int, logger):
+        super().__init__(
+            embeddings_model=embeddings_model,
+            embeddings_size=embeddings_size,
+            logger=logger,
+        )
+        self.points: Tuple[List[str], List[str], np.ndarray] = self.empty_points()
+
+    def empty_points(self) -> Tuple[List[str], List[str], np.ndarray]:
+        return [], [], np.empty((0, self.embeddings_size), dtype=np.float32)
+
+    def apply_index(self, changes: IndexChanges, embeddings: List[List[float]]):
+        ids, names, matrix = self.points
+        if len(changes.deletes) > 0:
+            deletes = set(changes.deletes)
+            keep = [i for i, point_id in enumerate(ids) if point_id not in deletes]
+            ids = [ids[i] for i in keep]
+            names = [names[i] for i in keep]
+            matrix = matrix[keep]
+
+        if len(changes.upserts) > 0:
+            new_ids = [
+                self.get_point_id(func_name, text)
+                for func_name, text in changes.upserts.items()
+            ]
+            # An upsert of an existing id replaces the stored point.
+            replaced = set(new_ids)
+            keep = [i for i, point_id in enumerate(ids) if point_id not in replaced]
+            ids = [ids[i] for i in keep] + new_ids
+            names = [names[i] for i in keep] + list(changes.upserts.keys())
+            matrix = np.vstack(
+                [matrix[keep], normalize_rows(np.asarray(embeddings, dtype=np.float32))]
+            )
+
+        self.points = (ids, names, np.ascontiguousarray(matrix, dtype=np.float32))
+        self.record_index(changes)
+
+    def search_scored(
+        self, *, query_embedding: List[float], top_n: int
+    ) -> List[Tuple[str, float]]:
+        return self.search_batch_scored(
+            query_embeddings=[query_embedding], top_n=top_n
+        )[0]
+
+    def search_batch(
+        self, *, query_embeddings: List[List[float]], top_n: int
+    ) -> List[List[str]]:
+        return [
+            [func_name for func_name, _ in results]
+            for results in self.search_batch_scored(
+                query_embeddings=query_embeddings, top_n=top_n
+            )
+        ]
+
+    def search_batch_scored(
+        self, *, query_embeddings: List[List[float]], top_n: int
+    ) -> List[List[Tuple[str, float]]]:
+        _, names, matrix = self.points
+        top_n = min(top_n, len(names))
+        if top_n <= 0 or len(query_embeddings) == 0:
+            return [[] for _ in query_embeddings]
+
+        queries = normalize_rows(np.asarray(query_embeddings, dtype=np.float32))
+        scores = queries @ matrix.T
+        if top_n < len(names):
+            top = np.argpartition(-scores, top_n - 1, axis=1)[:, :top_n]
+        else:
+            top = np.broadcast_to(np.arange(len(names)), scores.shape)
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        return [
+            [(names[i], score) for i, score in zip(row, row_scores)]
+            for row, row_scores in zip(top.tolist(), top_scores.tolist())
+        ]
+
+    def get_stored_ids(self) -> set:
+        return set(self.points[0])
+
+    def ensure_collection(self):
+        if self.points[2].shape[1] == self.embeddings_size:
+            return
+        self.logger.info("Embeddings size changed, recreating collection")
+        self.recreate_collection()
+
+    def recreate_collection(self):
+        self.point_ids = {}
+        self.points = self.empty_points()
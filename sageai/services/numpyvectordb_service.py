@@ -0,0 +1,16 @@
+from sageai.services.defaultvectordb_service import DefaultVectorDBService
+from sageai.services.numpystore_service import NumpyStoreService
+from sageai.types.abstract_vector_store import AbstractVectorStore
+
+
+class NumpyVectorDBService(DefaultVectorDBService):
+    """`DefaultVectorDBService` backed by a brute-force NumPy matrix instead of
+    in-memory Qdrant, which is faster for catalogs of up to tens of thousands
+    of functions."""
+
+    def create_store(self) -> AbstractVectorStore:
+        return NumpyStoreService(
+            embeddings_model=self.embeddings_model,
+            embeddings_size=self.embedder.get_dimension(),
+            logger=self.logger,
+        )
@@ -0,0 +1,61 @@
+from typing import Any, Dict, List
+
+from sageai.services.async_openai_service import AsyncOpenAIService
+from sageai.services.openai_service import OpenAIService
+from sageai.types.abstract_embedder import AbstractEmbedder
+
+
+class OpenAIEmbedderService(AbstractEmbedder):
+    """Embeds texts with the OpenAI embeddings endpoint and `embeddings_model`.
+    Setting `embeddings_dimension` shortens the embeddings of models that
+    support it."""
+
+    known_dimensions = {
+        "text-embedding-ada-002": 1536,
+        "text-embedding-3-small": 1536,
+        "text-embedding-3-large": 3072,
+    }
+
+    def __init__(self):
+        super().__init__()
+        from sageai.config import get_config
+
+        config = get_config()
+        self.model = config.embeddings_model
+        self.dimensions = config.embeddings_dimension
+        self.name = (
+            self.model if self.dimensions is None else f"{self.model}:{self.dimensions}"
+        )
+        self.openai = OpenAIService()
+        self.async_openai = AsyncOpenAIService()
+
+    def get_request_args(self) -> Dict[str, Any]:
+        args = dict(model=self.model)
+        if self.dimensions is not None:
+            args["dimensions"] = self.dimensions
+        return args
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        return self.openai.create_embeddings_batch(
+            input=texts, **self.get_request_args()
+        )
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.openai.create_embeddings(input=text, **self.get_request_args())
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        return await self.async_openai.create_embeddings_batch(
+            input=texts, **self.get_request_args()
+        )
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self.async_openai.create_embeddings(
+            input=text, **self.get_request_args()
+        )
+
+    def get_dimension(self) -> int:
+        if self.dimensions is not None:
+            return self.dimensions
+        if self.model in self.known_dimensions:
+            return self.known_dimensions[self.model]
+        return super().get_dimension()
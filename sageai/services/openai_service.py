@@ -1,16 +1,15 @@
-from typing import Any, Dict, List, Literal, Optional, Union
+from typing import Any, Dict, Iterator, List, Literal, Optional, Union
 
-from openai import OpenAI
 from openai._types import NOT_GIVEN
 
+from sageai.services.base_openai_service import BaseOpenAIService
+from sageai.utils.http_client_utilities import get_openai_client
 
-class OpenAIService:
-    def __init__(self):
-        from sageai.config import get_config
-
-        config = get_config()
 
-        self.client = OpenAI(api_key=config.openai_key)
+class OpenAIService(BaseOpenAIService):
+    def __init__(self):
+        super().__init__()
+        self.client = get_openai_client(self.config)
 
     def create_embeddings(
         self,
@@ -21,16 +20,39 @@ class OpenAIService:
         user: Optional[str] = NOT_GIVEN,
         **kwargs,
     ) -> List[float]:
-        response = self.client.embeddings.create(
-            input=input,
-            model=model,
-            encoding_format=encoding_format,
-            user=user,
-            **kwargs,
-        )
+        with self.rate_limiter.limit(
+            "embeddings", tokens=self.get_embedding_tokens(input)
+        ):
+            response = self.client.embeddings.create(
+                input=input,
+                model=model,
+                encoding_format=encoding_format,
+                user=user,
+                **kwargs,
+            )
         embeddings = response.data[0].embedding
         return embeddings
 
+    def create_embeddings_batch(
+        self,
+        *,
+        input: List[str],
+        model: Union[str, Literal["text-embedding-ada-002"]],
+        user: Optional[str] = NOT_GIVEN,
+        **kwargs,
+    ) -> List[List[float]]:
+        with self.rate_limiter.limit(
+            "embeddings", tokens=self.get_embedding_tokens(input)
+        ):
+            response = self.client.embeddings.create(
+                input=input,
+                model=model,
+                user=user,
+                **kwargs,
+            )
+        data = sorted(response.data, key=lambda item: item.index)
+        return [item.embedding for item in data]
+
     def chat(
         self,
         *,
@@ -38,24 +60,63 @@ class OpenAIService:
         model: str,
         function_call: Optional[Dict[str, Any]] = NOT_GIVEN,
         functions: Dict[str, Any] = NOT_GIVEN,
+        tools: List[Dict[str, Any]] = NOT_GIVEN,
+        tool_choice: Optional[Union[str, Dict[str, Any]]] = NOT_GIVEN,
         max_tokens: Optional[int] = NOT_GIVEN,
         response_format: Optional[Literal["string", "json"]] = NOT_GIVEN,
         temperature: Optional[float] = NOT_GIVEN,
+        function_tokens: Optional[int] = None,
         **kwargs,
     ) -> Dict[str, Any]:
-        response = self.client.chat.completions.create(
-            messages=messages,
-            model=model,
-            function_call=function_call,
+        """`function_tokens` are the tokens of the function definitions, when
+        already known, for the tokens per minute limit."""
+        tokens = self.get_chat_tokens(
+            messages,
             functions=functions,
+            tools=tools,
             max_tokens=max_tokens,
-            response_format=response_format,
-            temperature=temperature,
-            **kwargs,
+            function_tokens=function_tokens,
         )
+        with self.rate_limiter.limit("chat", tokens=tokens):
+            response = self.client.chat.completions.create(
+                messages=messages,
+                model=model,
+                function_call=function_call,
+                functions=functions,
+                tools=tools,
+                tool_choice=tool_choice,
+                max_tokens=max_tokens,
+                response_format=response_format,
+                temperature=temperature,
+                **kwargs,
+            )
         response_message = response.choices[0].message
         return response_message
 
-    @staticmethod
-    def get_embeddings_size():
-        return 1536
+    def stream_chat(
+        self,
+        *,
+        messages: List[Dict[str, str]],
+        model: str,
+        function_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> Iterator[Any]:
+        """Streams a completion, yielding the message delta of each chunk."""
+        tokens = self.get_chat_tokens(
+            messages,
+            functions=kwargs.get("functions"),
+            tools=kwargs.get("tools"),
+            max_tokens=kwargs.get("max_tokens"),
+            function_tokens=function_tokens,
+        )
+        # The slot is held until the stream is consumed.
+        with self.rate_limiter.limit("chat", tokens=tokens):
+            response = self.client.chat.completions.create(
+                messages=messages,
+                model=model,
+                stream=True,
+                **kwargs,
+            )
+            for chunk in response:
+                if chunk.choices:
+                    yield chunk.choices[0].delta
@@ -0,0 +1,66 @@
+from typing import Any, Dict, Optional
+
+from sageai.types.abstract_hooks import AbstractHooks
+from sageai.types.stage import Stage
+
+try:
+    from opentelemetry import context as otel_context
+    from opentelemetry import trace
+    from opentelemetry.trace import Status, StatusCode
+except ImportError:  # pragma: no cover - optional dependency
+    trace = None
+
+
+class OpenTelemetryHooksService(AbstractHooks):
+    """Records each stage as an OpenTelemetry span named `sageai.<stage>`,
+    nested under the span that is current when the stage starts. Spans go to
+    the globally configured tracer provider. A paused streaming stage detaches
+    its span, so the consumer's own spans aren't nested under it."""
+
+    def __init__(self):
+        if trace is None:
+            raise Exception(
+                "OpenTelemetryHooksService requires the opentelemetry-api package."
+            )
+        self.tracer = trace.get_tracer("sageai")
+
+    def on_stage_start(self, stage: Stage, attributes: Dict[str, Any]) -> Any:
+        span = self.tracer.start_span(
+            f"sageai.{stage.value.lower()}",
+            attributes={
+                f"sageai.{name}": value
+                for name, value in attributes.items()
+                if value is not None
+            },
+        )
+        token = otel_context.attach(trace.set_span_in_context(span))
+        return span, token
+
+    def on_stage_end(
+        self,
+        stage: Stage,
+        attributes: Dict[str, Any],
+        *,
+        context: Any,
+        duration: float,
+        error: Optional[BaseException],
+    ) -> None:
+        span, token = context
+        otel_context.detach(token)
+        if error is not None:
+            span.record_exception(error)
+            span.set_status(Status(StatusCode.ERROR, str(error)))
+        span.end()
+
+    def on_stage_pause(
+        self, stage: Stage, attributes: Dict[str, Any], *, context: Any
+    ) -> Any:
+        span, token = context
+        otel_context.detach(token)
+        return span, None
+
+    def on_stage_resume(
+        self, stage: Stage, attributes: Dict[str, Any], *, context: Any
+    ) -> Any:
+        span, _ = context
+        return span, otel_context.attach(trace.set_span_in_context(span))
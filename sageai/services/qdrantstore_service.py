@@ -0,0 +1,92 @@
+from typing import List, Tuple
+
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import models
+
+from sageai.types.abstract_vector_store import AbstractVectorStore, IndexChanges
+
+
+class QdrantStoreService(AbstractVectorStore):
+    """In-memory Qdrant collection of function embeddings."""
+
+    def __init__(self, *, embeddings_model: str, embeddings_size: int, logger):
+        super().__init__(
+            embeddings_model=embeddings_model,
+            embeddings_size=embeddings_size,
+            logger=logger,
+        )
+        self.client = QdrantClient(":memory:")
+        self.collection = "functions"
+
+    def apply_index(self, changes: IndexChanges, embeddings: List[List[float]]):
+        if len(changes.deletes) > 0:
+            self.client.delete(
+                collection_name=self.collection,
+                points_selector=models.PointIdsList(points=changes.deletes),
+            )
+        if len(changes.upserts) == 0:
+            self.record_index(changes)
+            return
+
+        # The embeddings come from the embedder, so skip validating every
+        # float, which takes longer than the upsert itself.
+        points = [
+            models.PointStruct.construct(
+                id=self.get_point_id(func_name, text),
+                vector=embedding,
+                payload={
+                    "func_name": func_name,
+                    "fingerprint": self.get_fingerprint(text),
+                },
+            )
+            for (func_name, text), embedding in zip(changes.upserts.items(), embeddings)
+        ]
+        self.client.upsert(collection_name=self.collection, points=points)
+        self.record_index(changes)
+
+    def search_scored(
+        self, *, query_embedding: List[float], top_n: int
+    ) -> List[Tuple[str, float]]:
+        hits = self.client.search(
+            collection_name=self.collection,
+            query_vector=query_embedding,
+            limit=top_n,
+        )
+        return [(hit.payload["func_name"], hit.score) for hit in hits]
+
+    def get_stored_ids(self) -> set:
+        stored_ids = set()
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.collection,
+                limit=1000,
+                offset=offset,
+                with_payload=False,
+                with_vectors=False,
+            )
+            stored_ids.update(str(point.id) for point in points)
+            if offset is None:
+                return stored_ids
+
+    def ensure_collection(self):
+        collections = self.client.get_collections().collections
+        if any(collection.name == self.collection for collection in collections):
+            vectors_config = self.client.get_collection(
+                self.collection
+            ).config.params.vectors
+            if vectors_config.size == self.embeddings_size:
+                return
+            self.logger.info("Embeddings size changed, recreating collection")
+
+        self.recreate_collection()
+
+    def recreate_collection(self):
+        self.point_ids = {}
+        self.client.recreate_collection(
+            collection_name=self.collection,
+            vectors_config=models.VectorParams(
+                size=self.embeddings_size,
+                distance=models.Distance.COSINE,
+            ),
+        )
@@ -0,0 +1,245 @@
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+import httpx
+
+from sageai.utils.slot_limiter import SlotLimiter
+
+ENDPOINTS = ("chat", "embeddings")
+DEFAULT_RETRY_AFTER = 1.0
+
+# The rate limiter of the request being sent, so the response hook of a client
+# shared by several configs reports to the limiter the request went through.
+_current_rate_limiter: ContextVar[Optional["RateLimiterService"]] = ContextVar(
+    "current_rate_limiter", default=None
+)
+
+
+def get_endpoint(url: httpx.URL) -> Optional[str]:
+    if url.path.endswith("/chat/completions"):
+        return "chat"
+    if url.path.endswith("/embeddings"):
+        return "embeddings"
+    return None
+
+
+def get_retry_after(response: httpx.Response) -> float:
+    """Seconds to wait according to the `retry-after-ms` or `retry-after`
+    header of a throttled response."""
+    for header, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        try:
+            return float(response.headers[header]) * scale
+        except (KeyError, ValueError):
+            continue
+    return DEFAULT_RETRY_AFTER
+
+
+def on_response(response: httpx.Response):
+    """Response hook of the shared HTTP clients."""
+    rate_limiter = _current_rate_limiter.get()
+    if rate_limiter is not None:
+        rate_limiter.on_response(response)
+
+
+async def aon_response(response: httpx.Response):
+    on_response(response)
+
+
+class TokenBucket:
+    """Refills `per_minute` units evenly over a minute. Reservations may take
+    the level below zero, and the returned delay is how long the caller has to
+    wait for the units it reserved."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    def reserve(self, amount: int, now: float) -> float:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+        # A request larger than the bucket waits for a full bucket, not forever.
+        self.level -= min(amount, self.capacity)
+        return 0.0 if self.level >= 0 else -self.level / self.rate
+
+
+class AdaptiveConcurrency(SlotLimiter):
+    """Bounds in-flight requests with an AIMD limit: it grows by about one slot
+    per limit's worth of successful requests, and halves when a request is
+    throttled."""
+
+    def __init__(self, *, maximum: Optional[int], minimum: int):
+        super().__init__(maximum)
+        self.minimum = minimum
+        self.limit = self.maximum
+
+    def has_slot(self) -> bool:
+        return self.in_flight + 1 <= max(self.minimum, self.limit)
+
+    def on_success(self):
+        with self.lock:
+            if self.limit < self.maximum:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+                self.wake_waiters()
+
+    def on_throttle(self):
+        with self.lock:
+            current = min(self.limit, max(self.in_flight, self.minimum))
+            self.limit = max(self.minimum, current / 2)
+
+
+class RateLimiterService:
+    """Client-side rate limits for the OpenAI chat and embeddings endpoints.
+
+    Each endpoint has optional requests and tokens per minute buckets, with the
+    token cost of a request estimated before it is sent. All endpoints share an
+    adaptive concurrency limit, and a throttled response pauses new requests
+    for its `retry-after` time. `on_response` is called from a response hook
+    of the shared HTTP client, for requests sent within `limit` or `alimit`, so
+    it also sees the client's own retries.
+    """
+
+    def __init__(
+        self,
+        *,
+        requests_per_minute: Dict[str, Optional[int]],
+        tokens_per_minute: Dict[str, Optional[int]],
+        max_concurrency: Optional[int],
+        min_concurrency: int,
+    ):
+        self.request_buckets = {
+            endpoint: TokenBucket(limit)
+            for endpoint, limit in requests_per_minute.items()
+            if limit is not None
+        }
+        self.token_buckets = {
+            endpoint: TokenBucket(limit)
+            for endpoint, limit in tokens_per_minute.items()
+            if limit is not None
+        }
+        self.concurrency = AdaptiveConcurrency(
+            maximum=max_concurrency, minimum=min_concurrency
+        )
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+        self.metrics = {
+            endpoint: dict(
+                requests=0,
+                throttled=0,
+                queue_delay_total=0.0,
+                queue_delay_max=0.0,
+            )
+            for endpoint in ENDPOINTS
+        }
+
+    @classmethod
+    def from_config(cls, config) -> "RateLimiterService":
+        return cls(
+            requests_per_minute=dict(
+                chat=config.chat_requests_per_minute,
+                embeddings=config.embeddings_requests_per_minute,
+            ),
+            tokens_per_minute=dict(
+                chat=config.chat_tokens_per_minute,
+                embeddings=config.embeddings_tokens_per_minute,
+            ),
+            max_concurrency=config.openai_max_concurrency,
+            min_concurrency=config.openai_min_concurrency,
+        )
+
+    def counts_tokens(self, endpoint: str) -> bool:
+        """Whether requests to `endpoint` draw from a tokens per minute bucket,
+        so their tokens need to be estimated."""
+        return endpoint in self.token_buckets
+
+    def reserve(self, endpoint: str, tokens: int) -> float:
+        """Reserves a request and `tokens` in the endpoint's buckets, returning
+        the number of seconds to wait before sending it."""
+        with self.lock:
+            now = time.monotonic()
+            delay = max(0.0, self.paused_until - now)
+            if endpoint in self.request_buckets:
+                delay = max(delay, self.request_buckets[endpoint].reserve(1, now))
+            if endpoint in self.token_buckets:
+                delay = max(delay, self.token_buckets[endpoint].reserve(tokens, now))
+            return delay
+
+    def record_queue_delay(self, endpoint: str, delay: float):
+        with self.lock:
+            metrics = self.metrics[endpoint]
+            metrics["requests"] += 1
+            metrics["queue_delay_total"] += delay
+            metrics["queue_delay_max"] = max(metrics["queue_delay_max"], delay)
+
+    @contextmanager
+    def limit(self, endpoint: str, *, tokens: int):
+        """Holds a rate limited slot for one request to `endpoint`."""
+        start = time.monotonic()
+        delay = self.reserve(endpoint, tokens)
+        if delay > 0:
+            time.sleep(delay)
+        self.concurrency.acquire()
+        self.record_queue_delay(endpoint, time.monotonic() - start)
+        token = _current_rate_limiter.set(self)
+        try:
+            yield
+        finally:
+            _current_rate_limiter.reset(token)
+            self.concurrency.release()
+
+    @asynccontextmanager
+    async def alimit(self, endpoint: str, *, tokens: int):
+        """Async counterpart of `limit`."""
+        start = time.monotonic()
+        delay = self.reserve(endpoint, tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await self.concurrency.aacquire()
+        self.record_queue_delay(endpoint, time.monotonic() - start)
+        token = _current_rate_limiter.set(self)
+        try:
+            yield
+        finally:
+            _current_rate_limiter.reset(token)
+            self.concurrency.release()
+
+    def on_response(self, response: httpx.Response):
+        endpoint = get_endpoint(response.request.url)
+        if endpoint is None:
+            return
+        if response.status_code == 429:
+            now = time.monotonic()
+            with self.lock:
+                self.metrics[endpoint]["throttled"] += 1
+                # A burst of 429s, or the client's retries, back off only once.
+                backing_off = self.paused_until > now
+                self.paused_until = max(
+                    self.paused_until, now + get_retry_after(response)
+                )
+            if not backing_off:
+                self.concurrency.on_throttle()
+        elif response.status_code < 400:
+            self.concurrency.on_success()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self.lock:
+            stats = {}
+            for endpoint, metrics in self.metrics.items():
+                requests = metrics["requests"]
+                stats[endpoint] = dict(
+                    metrics,
+                    queue_delay_avg=(
+                        metrics["queue_delay_total"] / requests if requests else 0.0
+                    ),
+                )
+            stats["concurrency"] = dict(
+                limit=self.concurrency.limit,
+                in_flight=self.concurrency.in_flight,
+                waiting=len(self.concurrency.waiters),
+            )
+            return stats
@@ -0,0 +1,154 @@
+import itertools
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+
+class SemanticCacheEntry(BaseModel):
+    model: str
+    context: str
+    query: str
+    name: str
+    args: Dict[str, Any]
+    result: Optional[Dict[str, Any]] = None
+    expires_at: float
+
+
+class SemanticCacheService:
+    """Bounded cache of chat results keyed by the query embedding. A lookup
+    hits when a cached query for the same model and context, e.g. a hash of the
+    earlier messages and request arguments, is at least `threshold` cosine
+    similar. Entries expire after `ttl` seconds, and the least recently used
+    ones are evicted beyond `max_size`."""
+
+    def __init__(self, *, max_size: int, threshold: float, ttl: Optional[float]):
+        self.max_size = max_size
+        self.threshold = threshold
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[int, Tuple[np.ndarray, SemanticCacheEntry]]" = (
+            OrderedDict()
+        )
+        self._ids = itertools.count()
+        self._matrix: Optional[Tuple[List[int], np.ndarray]] = None
+        self._lock = Lock()
+
+    @classmethod
+    def from_config(cls, config) -> Optional["SemanticCacheService"]:
+        if not config.semantic_cache:
+            return None
+        return cls(
+            max_size=config.semantic_cache_size,
+            threshold=config.semantic_cache_threshold,
+            ttl=config.semantic_cache_ttl,
+        )
+
+    @staticmethod
+    def normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def get_matrix(self) -> Tuple[List[int], np.ndarray]:
+        if self._matrix is None:
+            keys = list(self._entries.keys())
+            vectors = [self._entries[key][0] for key in keys]
+            self._matrix = (keys, np.vstack(vectors) if vectors else None)
+        return self._matrix
+
+    def lookup(
+        self,
+        embedding: List[float],
+        *,
+        model: str,
+        context: str,
+        accept: Optional[Callable[[SemanticCacheEntry], bool]] = None,
+    ) -> Optional[Tuple[SemanticCacheEntry, float]]:
+        """Returns the most similar live entry for `model` and `context` and its
+        similarity, if it reaches the threshold. `accept` can reject entries,
+        e.g. of functions that were removed since."""
+        query = self.normalize(embedding)
+        now = time.monotonic()
+        with self._lock:
+            keys, matrix = self.get_matrix()
+            best = None
+            if matrix is not None and matrix.shape[1] == query.shape[0]:
+                similarities = matrix @ query
+                for index in np.argsort(-similarities):
+                    similarity = float(similarities[index])
+                    if similarity < self.threshold:
+                        break
+                    key = keys[index]
+                    entry = self._entries[key][1]
+                    if (
+                        entry.model == model
+                        and entry.context == context
+                        and entry.expires_at >= now
+                        and (accept is None or accept(entry))
+                    ):
+                        self._entries.move_to_end(key)
+                        best = (entry, similarity)
+                        break
+
+            if best is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return best
+
+    def store(self, embedding: List[float], entry: SemanticCacheEntry) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[next(self._ids)] = (self.normalize(embedding), entry)
+            now = time.monotonic()
+            for key in [
+                key
+                for key, (_, cached) in self._entries.items()
+                if cached.expires_at < now
+            ]:
+                del self._entries[key]
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._matrix = None
+
+    def get_expires_at(self) -> float:
+        return time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+
+    def invalidate(self, names: List[str]) -> None:
+        """Drops the entries of functions that were reloaded."""
+        names = set(names)
+        with self._lock:
+            for key in [
+                key
+                for key, (_, cached) in self._entries.items()
+                if cached.name in names
+            ]:
+                del self._entries[key]
+            self._matrix = None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return dict(
+            size=len(self._entries),
+            max_size=self.max_size,
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            hit_rate=self.hits / lookups if lookups > 0 else 0.0,
+        )
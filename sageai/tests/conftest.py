@@ -0,0 +1,19 @@
+import pytest
+
+from sageai.bench.synthetic_functions import generate_functions_directory
+from sageai.services.local_embedder_service import LocalEmbedderService
+
+
+@pytest.fixture
+def functions_directory(tmp_path) -> str:
+    return generate_functions_directory(str(tmp_path / "functions"), 12)
+
+
+@pytest.fixture
+def offline_args(functions_directory):
+    """SageAI arguments that need neither network access nor an API key."""
+    return dict(
+        openai_key="",
+        functions_directory=functions_directory,
+        embedder=LocalEmbedderService,
+    )
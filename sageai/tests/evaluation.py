@@ -0,0 +1,227 @@
+import json
+import math
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from pydantic import BaseModel
+
+from sageai.types.abstract_vectordb import AbstractVectorDB
+from sageai.types.log_level import LogLevel
+from sageai.utils.batch_utilities import iter_batches
+from sageai.utils.logger import get_logger
+
+logger = get_logger("Evaluation", LogLevel.INFO)
+
+
+class RetrievalMetrics(BaseModel):
+    messages: int
+    recall: Dict[int, float]
+    mrr: float
+    min_top_n: Optional[int]
+
+
+class FunctionRetrievalMetrics(RetrievalMetrics):
+    name: str
+    misses: List[str]
+
+
+class RetrievalEvaluation(BaseModel):
+    target_recall: float
+    max_top_n: int
+    overall: RetrievalMetrics
+    functions: List[FunctionRetrievalMetrics]
+
+
+def load_test_messages(function_map: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """Returns (function name, message) pairs from the `test.json` next to each
+    function's source file."""
+    messages = []
+    for func_name, func in function_map.items():
+        test_file = os.path.join(os.path.dirname(func.source_path), "test.json")
+        if not os.path.exists(test_file):
+            logger.warning(f"Missing test.json for {func_name}, skipping it")
+            continue
+        with open(test_file) as f:
+            test_cases = json.load(f)
+        messages.extend((func_name, test_case["message"]) for test_case in test_cases)
+    return messages
+
+
+def warm_query_embeddings(vectordb: AbstractVectorDB, queries: List[str]):
+    """Embeds a batch of messages at once. When the vector db has an on-disk
+    embeddings cache, the embeddings go through it, so repeated evaluations
+    only embed new or changed messages."""
+    if getattr(vectordb, "embeddings_cache", None) is None:
+        vectordb.warm_query_embeddings(queries)
+        return
+    unique_queries = list(dict.fromkeys(queries))
+    for query, embedding in zip(
+        unique_queries, vectordb.embed_documents(unique_queries)
+    ):
+        vectordb.query_embeddings_cache.set(query, embedding)
+
+
+def rank_messages(
+    vectordb: AbstractVectorDB,
+    messages: List[Tuple[str, str]],
+    *,
+    max_top_n: int,
+    batch_size: int,
+) -> List[Optional[int]]:
+    """Returns the 1-based rank of the expected function for each message, or
+    None when it isn't among the top `max_top_n` results."""
+    ranks: List[Optional[int]] = []
+    for batch in iter_batches(messages, batch_size):
+        queries = [message for _, (_, message) in batch]
+        warm_query_embeddings(vectordb, queries)
+        results = vectordb.search_impl_batch(queries=queries, top_n=max_top_n)
+        for (_, (func_name, _)), result in zip(batch, results):
+            names = [parameters["name"] for parameters in result]
+            ranks.append(names.index(func_name) + 1 if func_name in names else None)
+    return ranks
+
+
+def get_min_top_n(
+    ranks: Sequence[Optional[int]], target_recall: float
+) -> Optional[int]:
+    """Smallest top_n whose recall reaches `target_recall`, or None when even
+    the largest evaluated top_n doesn't."""
+    needed = math.ceil(target_recall * len(ranks))
+    if needed == 0:
+        return 1
+    found = sorted(rank for rank in ranks if rank is not None)
+    if len(found) < needed:
+        return None
+    return found[needed - 1]
+
+
+def get_metrics(
+    ranks: Sequence[Optional[int]], *, top_ns: Sequence[int], target_recall: float
+) -> Dict[str, Any]:
+    count = len(ranks)
+    return dict(
+        messages=count,
+        recall={
+            top_n: sum(1 for rank in ranks if rank is not None and rank <= top_n)
+            / count
+            for top_n in top_ns
+        },
+        mrr=sum(1 / rank for rank in ranks if rank is not None) / count,
+        min_top_n=get_min_top_n(ranks, target_recall),
+    )
+
+
+def evaluate_retrieval(
+    vectordb: AbstractVectorDB,
+    *,
+    top_ns: Sequence[int] = (1, 3, 5, 10),
+    max_top_n: int = 20,
+    target_recall: float = 0.95,
+    batch_size: int = 512,
+) -> RetrievalEvaluation:
+    """Searches every test message of the indexed functions and reports
+    recall@top_n, MRR and the smallest top_n reaching `target_recall`, per
+    function and overall. Each message is searched once with `max_top_n`, so
+    with hybrid search, `function_min_score` or `function_token_budget` the
+    rankings of smaller top_n values are approximated."""
+    top_ns = sorted(top_n for top_n in set(top_ns) if top_n <= max_top_n)
+    messages = load_test_messages(vectordb.function_map)
+    if len(messages) == 0:
+        raise Exception("No test messages found")
+
+    logger.info(f"Evaluating retrieval of {len(messages)} test messages")
+    ranks = rank_messages(
+        vectordb, messages, max_top_n=max_top_n, batch_size=batch_size
+    )
+
+    ranks_by_function: Dict[str, List[Optional[int]]] = {}
+    misses_by_function: Dict[str, List[str]] = {}
+    for (func_name, message), rank in zip(messages, ranks):
+        ranks_by_function.setdefault(func_name, []).append(rank)
+        misses = misses_by_function.setdefault(func_name, [])
+        if rank is None:
+            misses.append(message)
+
+    return RetrievalEvaluation(
+        target_recall=target_recall,
+        max_top_n=max_top_n,
+        overall=RetrievalMetrics(
+            **get_metrics(ranks, top_ns=top_ns, target_recall=target_recall)
+        ),
+        functions=[
+            FunctionRetrievalMetrics(
+                name=func_name,
+                misses=misses_by_function[func_name],
+                **get_metrics(
+                    function_ranks, top_ns=top_ns, target_recall=target_recall
+                ),
+            )
+            for func_name, function_ranks in ranks_by_function.items()
+        ],
+    )
+
+
+def format_metrics(label: str, metrics: RetrievalMetrics) -> str:
+    recall = "  ".join(
+        f"recall@{top_n} {value:.3f}" for top_n, value in metrics.recall.items()
+    )
+    min_top_n = "-" if metrics.min_top_n is None else str(metrics.min_top_n)
+    return (
+        f"{label}: {metrics.messages} messages  {recall}  "
+        f"mrr {metrics.mrr:.3f}  min top_n {min_top_n}"
+    )
+
+
+def log_evaluation(evaluation: RetrievalEvaluation):
+    for metrics in evaluation.functions:
+        log = logger.info if metrics.min_top_n is not None else logger.warning
+        log(format_metrics(metrics.name, metrics))
+        for message in metrics.misses:
+            log(f"  Not in top {evaluation.max_top_n}: {message}")
+    logger.info(format_metrics("Overall", evaluation.overall))
+    if evaluation.overall.min_top_n is None:
+        logger.warning(
+            f"Recall {evaluation.target_recall} is not reached within top_n "
+            f"{evaluation.max_top_n}"
+        )
+    else:
+        logger.info(
+            f"top_n {evaluation.overall.min_top_n} reaches recall "
+            f"{evaluation.target_recall}"
+        )
+
+
+def run_evaluation(
+    *,
+    functions_directory: str,
+    openai_key: str,
+    top_ns: Sequence[int] = (1, 3, 5, 10),
+    max_top_n: int = 20,
+    target_recall: float = 0.95,
+    batch_size: int = 512,
+    **config_args,
+) -> RetrievalEvaluation:
+    """Loads and indexes the functions once with the given config, then runs
+    `evaluate_retrieval`."""
+    from sageai.config import set_config
+
+    config = set_config(
+        openai_key=openai_key,
+        functions_directory=functions_directory,
+        query_embeddings_cache_size=max(
+            batch_size, config_args.pop("query_embeddings_cache_size", 0) or 0
+        ),
+        **config_args,
+    )
+    vectordb = config.vectordb()
+    vectordb.index()
+
+    evaluation = evaluate_retrieval(
+        vectordb,
+        top_ns=top_ns,
+        max_top_n=max_top_n,
+        target_recall=target_recall,
+        batch_size=batch_size,
+    )
+    log_evaluation(evaluation)
+    return evaluation
@@ -1,4 +1,5 @@
 import argparse
+import json
 import os
 
 import pytest
@@ -14,6 +15,33 @@ def main():
     parser.add_argument(
         "--integration", action="store_true", help="Run only the integration tests"
     )
+    parser.add_argument(
+        "--evaluate",
+        action="store_true",
+        help="Only evaluate the retrieval of the test messages",
+    )
+    parser.add_argument(
+        "--top-n",
+        type=int,
+        nargs="+",
+        default=[1, 3, 5, 10],
+        help="top_n values to report the recall of",
+    )
+    parser.add_argument(
+        "--max-top-n", type=int, default=20, help="Number of functions retrieved"
+    )
+    parser.add_argument(
+        "--target-recall",
+        type=float,
+        default=0.95,
+        help="Recall the smallest sufficient top_n is reported for",
+    )
+    parser.add_argument(
+        "--embeddings-cache-directory",
+        type=str,
+        help="Directory of the on-disk embeddings cache",
+    )
+    parser.add_argument("--output", type=str, help="Write the evaluation JSON here")
     args = parser.parse_args()
 
     if args.directory:
@@ -21,6 +49,25 @@ def main():
     if args.apikey:
         os.environ["OPENAI_KEY"] = args.apikey
 
+    if args.evaluate:
+        from sageai.tests.evaluation import run_evaluation
+
+        config_args = {}
+        if args.embeddings_cache_directory is not None:
+            config_args["embeddings_cache_directory"] = args.embeddings_cache_directory
+        evaluation = run_evaluation(
+            functions_directory=os.path.abspath(args.directory or "functions"),
+            openai_key=os.environ["OPENAI_KEY"],
+            top_ns=args.top_n,
+            max_top_n=args.max_top_n,
+            target_recall=args.target_recall,
+            **config_args,
+        )
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(evaluation.dict(), f, indent=2)
+        return
+
     current_directory = os.path.dirname(os.path.abspath(__file__))
 
     if not args.integration or args.unit:
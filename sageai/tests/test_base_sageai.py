@@ -0,0 +1,28 @@
+import pytest
+
+from sageai.async_sageai import AsyncSageAI
+from sageai.config import Config
+from sageai.sageai import SageAI
+from sageai.services.numpyvectordb_service import NumpyVectorDBService
+from sageai.types.index_mode import IndexMode
+
+
+def test_unset_arguments_keep_the_config_defaults(offline_args):
+    sage = SageAI(**offline_args, index_mode="FULL", semantic_cache_ttl=None)
+
+    defaults = Config(openai_key="")
+    assert sage.config.index_mode == IndexMode.FULL
+    assert sage.config.semantic_cache_ttl == defaults.semantic_cache_ttl
+    assert sage.config.embeddings_batch_size == defaults.embeddings_batch_size
+
+
+def test_the_vectordb_goes_to_the_vectordb_of_the_instance_type(offline_args):
+    sage = SageAI(**offline_args, vectordb=NumpyVectorDBService)
+
+    assert sage.config.vectordb is NumpyVectorDBService
+    assert isinstance(sage.vectordb, NumpyVectorDBService)
+
+
+def test_an_openai_key_is_required(offline_args):
+    with pytest.raises(Exception, match="No OpenAI key provided."):
+        AsyncSageAI(**{**offline_args, "openai_key": None})
@@ -0,0 +1,94 @@
+from types import SimpleNamespace
+
+import pytest
+
+from sageai.types.abstract_vectordb import AbstractVectorDB
+from sageai.utils.bm25_index import BM25Index, reciprocal_rank_fusion
+
+DOCUMENTS = dict(
+    get_weather="get weather Gets the current weather forecast of a city.",
+    get_stock="get stock Gets the current price of a stock ticker.",
+    send_email="send email Sends an email to a recipient.",
+)
+
+
+class RecordingVectorDB(AbstractVectorDB):
+    def __init__(self, ranking):
+        super().__init__()
+        self.ranking = ranking
+        self.searched = []
+        self.hybrid_search = True
+        self.function_min_score = None
+        self.function_map = {
+            name: SimpleNamespace(
+                description=text.split(" ", 2)[2], parameters=dict(name=name)
+            )
+            for name, text in DOCUMENTS.items()
+        }
+
+    def index(self):
+        pass
+
+    def search(self, *, query, top_n):
+        self.searched.append(query)
+        return self.ranking[:top_n]
+
+
+def test_search_ranks_documents_sharing_query_terms():
+    index = BM25Index(DOCUMENTS)
+
+    results, _ = index.search("weather forecast of paris", top_n=5)
+
+    assert [name for name, _ in results] == ["get_weather", "get_stock"]
+    assert results[0][1] > results[1][1] > 0
+
+
+def test_search_without_matching_terms_is_empty():
+    assert BM25Index(DOCUMENTS).search("translate this text", top_n=5) == ([], 0.0)
+    assert BM25Index({}).search("weather", top_n=5) == ([], 0.0)
+
+
+def test_confidence_is_the_lead_scaled_by_the_matched_terms():
+    index = BM25Index(DOCUMENTS)
+
+    _, decisive = index.search("weather forecast", top_n=5)
+    _, partial = index.search("weather in tokyo tomorrow", top_n=5)
+    _, tied = index.search("current", top_n=5)
+
+    assert decisive == pytest.approx(1.0)
+    # Only one of four query terms matches, so the lead is scaled down.
+    assert partial == pytest.approx(0.25)
+    assert tied == pytest.approx(0.0)
+
+
+def test_search_keeps_the_top_n_results():
+    results, _ = BM25Index(DOCUMENTS).search("gets current", top_n=1)
+
+    assert [name for name, _ in results] == ["get_weather"]
+
+
+def test_reciprocal_rank_fusion_rewards_names_in_both_rankings():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d"]], top_n=3)
+
+    assert fused == ["b", "a", "d"]
+    assert reciprocal_rank_fusion([["a"], ["b"]], top_n=1) == ["a"]
+
+
+def test_decisive_lexical_matches_skip_the_vector_search():
+    vectordb = RecordingVectorDB(ranking=["send_email", "get_stock"])
+
+    result = vectordb.search_impl(query="weather forecast", top_n=2)
+
+    assert result == [dict(name="get_weather")]
+    assert vectordb.searched == []
+    assert vectordb.hybrid_search_stats == dict(lexical=1, fused=0)
+
+
+def test_undecisive_lexical_matches_are_fused_with_the_vector_search():
+    vectordb = RecordingVectorDB(ranking=["send_email", "get_stock"])
+
+    result = vectordb.search_impl(query="current email", top_n=2)
+
+    assert vectordb.searched == ["current email"]
+    assert result == [dict(name="send_email"), dict(name="get_stock")]
+    assert vectordb.hybrid_search_stats == dict(lexical=0, fused=1)
@@ -0,0 +1,132 @@
+import asyncio
+import time
+
+import pytest
+
+from sageai.async_sageai import AsyncSageAI
+from sageai.bench.fake_openai_server import FakeOpenAIServer
+from sageai.sageai import SageAI
+
+MODEL = "gpt-3.5-turbo-0613"
+QUERIES = [
+    "create a billing invoice",
+    "slow: list the billing invoices",
+    "fail: get a billing invoice",
+    "get the billing invoice",
+]
+
+
+@pytest.fixture
+def server():
+    with FakeOpenAIServer() as server:
+        yield server
+
+
+@pytest.fixture
+def sage_args(offline_args, server):
+    return {**offline_args, "openai_key": "test", "openai_base_url": server.base_url}
+
+
+def get_conversations():
+    conversations = [dict(messages=[dict(role="user", content=q)]) for q in QUERIES]
+    conversations.append(dict(messages=[dict(role="system", content="No user.")]))
+    return conversations
+
+
+def check_query(openai_args):
+    content = openai_args["messages"][-1]["content"]
+    if content.startswith("fail:"):
+        raise Exception("Completion failed.")
+    return content.startswith("slow:")
+
+
+def test_results_are_yielded_in_input_order(sage_args, server):
+    sage = SageAI(**sage_args)
+    sage.index()
+    call_openai = sage.call_openai
+
+    def checked_call_openai(openai_args, *args, **kwargs):
+        if check_query(openai_args):
+            time.sleep(0.2)
+        return call_openai(openai_args, *args, **kwargs)
+
+    sage.call_openai = checked_call_openai
+
+    results = list(
+        sage.chat_many(get_conversations(), model=MODEL, top_n=3, concurrency=4)
+    )
+
+    assert [result["index"] for result in results] == [0, 1, 2, 3, 4]
+    expected = sage.chat(
+        messages=get_conversations()[0]["messages"], model=MODEL, top_n=3
+    )
+    assert results[0]["response"] == expected
+    assert results[1]["response"]["result"] == dict(
+        result=results[1]["response"]["name"]
+    )
+    assert results[2] == dict(index=2, error="Completion failed.")
+    assert "response" in results[3]
+    assert results[4] == dict(index=4, error="No user message found.")
+    assert server.requests["completions"] == 4
+
+
+def test_unordered_results_are_yielded_as_they_finish(sage_args):
+    sage = SageAI(**sage_args)
+    sage.index()
+    call_openai = sage.call_openai
+
+    def checked_call_openai(openai_args, *args, **kwargs):
+        if check_query(openai_args):
+            time.sleep(0.2)
+        return call_openai(openai_args, *args, **kwargs)
+
+    sage.call_openai = checked_call_openai
+
+    results = list(
+        sage.chat_many(
+            get_conversations(), model=MODEL, top_n=3, concurrency=4, ordered=False
+        )
+    )
+
+    assert sorted(result["index"] for result in results) == [0, 1, 2, 3, 4]
+    assert results[-1]["index"] == 1
+
+
+def test_conversations_override_the_shared_arguments(sage_args):
+    sage = SageAI(**sage_args)
+    sage.index()
+
+    [result] = sage.chat_many(
+        [dict(messages=[dict(role="user", content=QUERIES[0])], model=None)],
+        model=MODEL,
+        top_n=3,
+    )
+
+    assert result == dict(index=0, error="No model provided.")
+
+
+def test_async_results_are_yielded_in_input_order(sage_args):
+    async def run():
+        sage = AsyncSageAI(**sage_args)
+        await sage.aindex()
+        acall_openai = sage.acall_openai
+
+        async def checked_acall_openai(openai_args, *args, **kwargs):
+            if check_query(openai_args):
+                await asyncio.sleep(0.2)
+            return await acall_openai(openai_args, *args, **kwargs)
+
+        sage.acall_openai = checked_acall_openai
+        return [
+            result
+            async for result in sage.achat_many(
+                get_conversations(), model=MODEL, top_n=3, concurrency=4
+            )
+        ]
+
+    results = asyncio.run(run())
+
+    assert [result["index"] for result in results] == [0, 1, 2, 3, 4]
+    assert "response" in results[1]
+    assert results[2] == dict(index=2, error="Completion failed.")
+    assert results[4] == dict(index=4, error="No user message found.")
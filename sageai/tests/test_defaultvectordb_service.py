@@ -0,0 +1,104 @@
+import asyncio
+import logging
+
+import pytest
+
+from sageai.async_sageai import AsyncSageAI
+from sageai.sageai import SageAI
+from sageai.types.index_mode import IndexMode
+
+QUERIES = ["create a billing invoice", "delete my billing order"]
+
+
+def count_embedded(embedder, method_name):
+    embedded = []
+    embed = getattr(embedder, method_name)
+
+    def counting_embed(texts):
+        embedded.extend(texts)
+        return embed(texts)
+
+    setattr(embedder, method_name, counting_embed)
+    return embedded
+
+
+def count_aembedded(embedder):
+    embedded = []
+    aembed = embedder.aembed
+
+    async def counting_aembed(texts):
+        embedded.extend(texts)
+        return await aembed(texts)
+
+    embedder.aembed = counting_aembed
+    return embedded
+
+
+def search_names(results):
+    return [[function["name"] for function in functions] for functions in results]
+
+
+def test_sync_and_async_indexes_return_the_same_results(offline_args):
+    sage = SageAI(**offline_args)
+    sage.index()
+    expected = search_names(sage.vectordb.search_impl_batch(queries=QUERIES, top_n=3))
+
+    async def search():
+        async_sage = AsyncSageAI(**offline_args)
+        await async_sage.aindex()
+        return search_names(
+            await async_sage.vectordb.search_impl_batch(queries=QUERIES, top_n=3)
+        )
+
+    assert asyncio.run(search()) == expected
+    assert expected[0][0] == "create_billing_invoice_2"
+
+
+def test_embed_documents_reuses_the_on_disk_cache(offline_args, tmp_path, caplog):
+    cache_directory = str(tmp_path / "cache")
+    sage = SageAI(**offline_args, embeddings_cache_directory=cache_directory)
+    embedded = count_embedded(sage.vectordb.embedder, "embed")
+
+    first = sage.vectordb.embed_documents(["a", "b"])
+    with caplog.at_level(logging.INFO, logger="VectorDB"):
+        second = sage.vectordb.embed_documents(["b", "c", "a"])
+
+    assert embedded == ["a", "b", "c"]
+    assert second == [first[1], sage.vectordb.embedder.embed(["c"])[0], first[0]]
+    assert "Embeddings cache: 2 hits, 1 misses" in caplog.text
+
+
+def test_async_embed_documents_reuses_the_on_disk_cache(offline_args, tmp_path, caplog):
+    cache_directory = str(tmp_path / "cache")
+    sage = SageAI(**offline_args, embeddings_cache_directory=cache_directory)
+    expected = sage.vectordb.embed_documents(["a", "b"])
+
+    async def embed():
+        async_sage = AsyncSageAI(
+            **offline_args, embeddings_cache_directory=cache_directory
+        )
+        embedded = count_aembedded(async_sage.vectordb.embedder)
+        with caplog.at_level(logging.INFO, logger="VectorDB"):
+            embeddings = await async_sage.vectordb.embed_documents(["a", "b", "c"])
+        return embeddings, embedded
+
+    embeddings, embedded = asyncio.run(embed())
+
+    assert embeddings[:2] == expected
+    assert embedded == ["c"]
+    assert "Embeddings cache: 2 hits, 1 misses" in caplog.text
+
+
+@pytest.mark.parametrize("index_mode", [IndexMode.FULL, IndexMode.INCREMENTAL])
+def test_instances_of_a_catalog_share_function_embeddings(offline_args, index_mode):
+    first = SageAI(**offline_args, index_mode=index_mode)
+    first.index()
+
+    second = SageAI(**offline_args, index_mode=index_mode)
+    embedded = count_embedded(second.vectordb.embedder, "embed")
+    second.index()
+
+    assert embedded == []
+    assert search_names(
+        second.vectordb.search_impl_batch(queries=QUERIES, top_n=3)
+    ) == search_names(first.vectordb.search_impl_batch(queries=QUERIES, top_n=3))
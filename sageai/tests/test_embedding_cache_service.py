@@ -0,0 +1,57 @@
+import os
+import stat
+
+import pytest
+
+from sageai.services.embedding_cache_service import EmbeddingCacheService
+from sageai.utils.file_utilities import get_umask
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return EmbeddingCacheService(str(tmp_path / "cache"))
+
+
+def test_get_many_returns_hits_and_misses_in_order(cache):
+    cache.set_many("model", ["a", "c"], [[1.0, 2.0], [3.0, 4.0]])
+
+    assert cache.get_many("model", ["a", "b", "c"]) == [[1.0, 2.0], None, [3.0, 4.0]]
+
+
+def test_entries_are_keyed_by_model_and_text(cache):
+    cache.set("model", "text", [1.0])
+
+    assert cache.get("other-model", "text") is None
+    assert cache.get("model", "text ") is None
+    assert cache.get_path(cache.get_key("model", "text")).startswith(cache.directory)
+    assert [entry.text for entry in cache.entries()] == ["text"]
+
+
+def test_corrupt_entries_are_misses(cache):
+    cache.set("model", "text", [1.0])
+    path = cache.get_path(cache.get_key("model", "text"))
+    with open(path, "wb") as f:
+        f.write(b"{}\nabc")
+
+    assert cache.get("model", "text") is None
+
+
+def test_entries_respect_the_umask(cache):
+    cache.set("model", "text", [1.0])
+    path = cache.get_path(cache.get_key("model", "text"))
+
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o666 & ~get_umask()
+
+
+def test_prune_evicts_the_least_recently_used_entries(cache):
+    for index, text in enumerate(["old", "used", "new"]):
+        cache.set("model", text, [1.0] * 100)
+        path = cache.get_path(cache.get_key("model", text))
+        os.utime(path, (index, index))
+    # Reading an entry marks it as recently used.
+    assert cache.get("model", "old") is not None
+
+    entry_size = cache.stats()["size_bytes"] // 3
+    assert cache.prune(entry_size * 2) == 1
+    assert cache.get_many("model", ["old", "used", "new"])[1] is None
+    assert cache.stats()["entries"] == 2
@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+
+import pytest
+
+from sageai.utils import embedding_utilities
+from sageai.utils.embedding_utilities import (
+    chunk_texts,
+    embed_in_batches,
+    embed_in_batches_async,
+    merge_cached_embeddings,
+)
+
+logger = logging.getLogger("EmbeddingUtilitiesTest")
+
+
+def embed(texts):
+    return [[float(len(text)), float(int(text))] for text in texts]
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(embedding_utilities.time, "sleep", lambda _: None)
+
+
+def test_chunk_texts_splits_in_order():
+    assert chunk_texts(["a", "b", "c", "d", "e"], 2) == [["a", "b"], ["c", "d"], ["e"]]
+    with pytest.raises(Exception):
+        chunk_texts(["a"], 0)
+
+
+def test_embed_in_batches_keeps_the_order_of_concurrent_batches():
+    texts = [str(i) for i in range(50)]
+    batches = []
+    lock = threading.Lock()
+
+    def slow_embed(batch):
+        time.sleep(random.uniform(0, 0.01))
+        with lock:
+            batches.append(batch)
+        return embed(batch)
+
+    embeddings = embed_in_batches(
+        slow_embed, texts, batch_size=4, concurrency=8, max_retries=0, logger=logger
+    )
+
+    assert embeddings == embed(texts)
+    assert sorted(len(batch) for batch in batches) == [2] + [4] * 12
+
+
+def test_embed_in_batches_retries_failed_batches(no_backoff):
+    attempts = []
+
+    def flaky_embed(batch):
+        attempts.append(batch)
+        if len(attempts) == 1:
+            raise Exception("rate limited")
+        return embed(batch)
+
+    embeddings = embed_in_batches(
+        flaky_embed,
+        ["1", "2"],
+        batch_size=2,
+        concurrency=1,
+        max_retries=1,
+        logger=logger,
+    )
+
+    assert embeddings == embed(["1", "2"])
+    assert attempts == [["1", "2"], ["1", "2"]]
+
+
+def test_embed_in_batches_raises_after_the_last_retry(no_backoff):
+    def short_embed(batch):
+        return embed(batch)[:-1]
+
+    with pytest.raises(Exception, match="after 3 attempts"):
+        embed_in_batches(
+            short_embed,
+            ["1", "2"],
+            batch_size=2,
+            concurrency=1,
+            max_retries=2,
+            logger=logger,
+        )
+
+
+def test_embed_in_batches_async_keeps_the_order_and_bounds_concurrency():
+    texts = [str(i) for i in range(30)]
+    running = 0
+    max_running = 0
+
+    async def aembed(batch):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(random.uniform(0, 0.01))
+        running -= 1
+        return embed(batch)
+
+    embeddings = asyncio.run(
+        embed_in_batches_async(
+            aembed, texts, batch_size=3, concurrency=4, max_retries=0, logger=logger
+        )
+    )
+
+    assert embeddings == embed(texts)
+    assert max_running == 4
+
+
+def test_merge_cached_embeddings_fills_misses_in_order():
+    cached = [[1.0], None, [3.0], None]
+
+    assert merge_cached_embeddings(cached, [[2.0], [4.0]]) == [
+        [1.0],
+        [2.0],
+        [3.0],
+        [4.0],
+    ]
@@ -0,0 +1,178 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from sageai.services.function_executor_service import FunctionExecutorService
+from sageai.services.function_process_service import FunctionProcessService
+from sageai.types.execution_mode import ExecutionMode
+from sageai.types.function_timeout_error import FunctionTimeoutError
+
+
+def create_executor(max_workers: int = 4) -> FunctionExecutorService:
+    return FunctionExecutorService(
+        max_workers=max_workers,
+        default_timeout=None,
+        processes=FunctionProcessService(max_workers=1, start_method="spawn"),
+    )
+
+
+def create_function(name: str, invoke, *, timeout=None, max_concurrency=None):
+    async def ainvoke(func_args):
+        return invoke(func_args)
+
+    return SimpleNamespace(
+        name=name,
+        timeout=timeout,
+        max_concurrency=max_concurrency,
+        execution_mode=ExecutionMode.THREAD,
+        plan=SimpleNamespace(is_async=False),
+        invoke_validated=invoke,
+        ainvoke_validated=ainvoke,
+    )
+
+
+def wait_until(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.005)
+
+
+def test_runs_inline_without_timeout():
+    executor = create_executor()
+    function = create_function("echo", lambda func_args: dict(args=func_args))
+
+    assert executor.run(function, 1) == dict(args=1)
+    assert executor.stats()["functions"]["echo"]["calls"] == 1
+    executor.close()
+
+
+def test_timed_out_call_keeps_its_slot_until_it_finishes():
+    executor = create_executor()
+    finish = threading.Event()
+    finished = threading.Event()
+
+    def invoke(func_args):
+        if func_args == "slow":
+            finish.wait(5)
+            finished.set()
+        return dict(args=func_args)
+
+    function = create_function("slow", invoke, timeout=0.05, max_concurrency=1)
+
+    with pytest.raises(FunctionTimeoutError):
+        executor.run(function, "slow")
+    limit = executor.limits["slow"]
+    assert limit.in_flight == 1
+
+    # The timed out call is still running, so the next one can't get a slot.
+    with pytest.raises(FunctionTimeoutError):
+        executor.run(function, "fast")
+    assert executor.stats()["functions"]["slow"]["timeouts"] == 2
+
+    finish.set()
+    assert finished.wait(5)
+    wait_until(lambda: limit.in_flight == 0)
+    assert executor.run(function, "fast") == dict(args="fast")
+    executor.close()
+
+
+def test_timed_out_queued_call_is_cancelled():
+    executor = create_executor(max_workers=1)
+    finish = threading.Event()
+    calls = []
+
+    def invoke(func_args):
+        calls.append(func_args)
+        if func_args == "blocking":
+            finish.wait(5)
+        return dict(args=func_args)
+
+    blocking = create_function("blocking", invoke, timeout=5)
+    queued = create_function("queued", invoke, timeout=0.05)
+
+    thread = threading.Thread(target=executor.run, args=(blocking, "blocking"))
+    thread.start()
+    wait_until(lambda: executor.stats()["running"] == 1)
+
+    with pytest.raises(FunctionTimeoutError):
+        executor.run(queued, "queued")
+    assert executor.stats()["queued"] == 0
+
+    finish.set()
+    thread.join(5)
+    wait_until(lambda: executor.stats()["running"] == 0)
+    assert calls == ["blocking"]
+    executor.close()
+
+
+def test_async_timeout_releases_the_slot_once_the_call_finishes():
+    executor = create_executor()
+    finish = threading.Event()
+    function = create_function(
+        "slow",
+        lambda func_args: finish.wait(5) and dict(args=func_args),
+        timeout=0.05,
+        max_concurrency=1,
+    )
+
+    async def main():
+        with pytest.raises(FunctionTimeoutError):
+            await executor.arun(function, "slow")
+        return executor.limits["slow"].in_flight
+
+    assert asyncio.run(main()) == 1
+    finish.set()
+    wait_until(lambda: executor.limits["slow"].in_flight == 0)
+    executor.close()
+
+
+def test_async_call_cancelled_while_waiting_for_a_slot_leaves_the_queue():
+    executor = create_executor()
+    finish = threading.Event()
+    function = create_function(
+        "slow",
+        lambda func_args: finish.wait(5) and dict(args=func_args),
+        max_concurrency=1,
+    )
+
+    async def main():
+        running = asyncio.create_task(executor.arun(function, "running"))
+        while executor.limits.get("slow") is None or (
+            executor.limits["slow"].in_flight == 0
+        ):
+            await asyncio.sleep(0.005)
+        waiting = asyncio.create_task(executor.arun(function, "waiting"))
+        await asyncio.sleep(0.01)
+        limit = executor.limits["slow"]
+        assert len(limit.waiters) == 1
+
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        assert len(limit.waiters) == 0
+
+        finish.set()
+        assert await running == dict(args="running")
+        return limit.in_flight
+
+    assert asyncio.run(main()) == 0
+    executor.close()
+
+
+def test_close_cancels_queued_calls():
+    executor = create_executor(max_workers=1)
+    finish = threading.Event()
+    future = executor.submit("blocking", lambda: finish.wait(5), start=0.0)
+    queued = executor.submit("queued", lambda: dict(), start=0.0)
+
+    executor.close()
+    assert queued.cancelled()
+    assert executor.stats()["queued"] == 0
+    finish.set()
+    assert future.result(5) is True
+    with pytest.raises(RuntimeError):
+        executor.submit("closed", lambda: dict(), start=0.0)
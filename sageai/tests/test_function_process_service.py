@@ -0,0 +1,62 @@
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from sageai.services.function_process_service import FunctionProcessService
+from sageai.utils.file_utilities import load_function_from_file
+
+CRASH_FUNCTION = """
+import os
+from pydantic import BaseModel
+from sageai.types.execution_mode import ExecutionMode
+from sageai.types.function import Function
+
+class FunctionInput(BaseModel):
+    die: bool
+
+class FunctionOutput(BaseModel):
+    pid: int
+
+def crash(params: FunctionInput) -> FunctionOutput:
+    if params.die:
+        os._exit(1)
+    return FunctionOutput(pid=os.getpid())
+
+function = Function(
+    function=crash,
+    description="Exits the worker or returns its pid.",
+    execution_mode=ExecutionMode.PROCESS,
+)
+"""
+
+
+@pytest.fixture
+def crash_function(tmp_path):
+    function_directory = tmp_path / "crash"
+    function_directory.mkdir()
+    source_path = function_directory / "function.py"
+    source_path.write_text(CRASH_FUNCTION)
+    return load_function_from_file("crash", str(source_path))
+
+
+def test_submit_replaces_a_pool_broken_by_a_dead_worker(crash_function):
+    processes = FunctionProcessService(max_workers=1, start_method="spawn")
+    processes.register(dict(crash=crash_function))
+    assert processes.pool is None
+    validate = crash_function.plan.validate_input
+
+    pid = processes.submit(crash_function, validate(dict(die=False))).result(30)
+    assert pid["pid"] != os.getpid()
+
+    with pytest.raises(BrokenProcessPool):
+        processes.submit(crash_function, validate(dict(die=True))).result(30)
+    broken_pool = processes.pool
+
+    result = processes.submit(crash_function, validate(dict(die=False))).result(30)
+    assert processes.pool is not broken_pool
+    assert result["pid"] != pid["pid"]
+    assert processes.stats()["in_flight"] == 0
+
+    processes.shutdown()
+    assert processes.pool is None
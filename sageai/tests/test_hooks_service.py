@@ -0,0 +1,139 @@
+import asyncio
+import time
+from contextvars import ContextVar
+
+import pytest
+
+from sageai.async_sageai import AsyncSageAI
+from sageai.bench.fake_openai_server import FakeOpenAIServer
+from sageai.sageai import SageAI
+from sageai.services.hooks_service import HooksService
+from sageai.types.abstract_hooks import AbstractHooks
+from sageai.types.stage import Stage
+
+MODEL = "gpt-3.5-turbo-0613"
+MESSAGES = [dict(role="user", content="create a billing invoice")]
+
+# Stands in for the OpenTelemetry context, which hooks attach on start.
+current_stage: ContextVar = ContextVar("current_stage", default=None)
+
+
+class ContextHooks(AbstractHooks):
+    def __init__(self):
+        self.durations = {}
+        self.calls = []
+
+    def on_stage_start(self, stage, attributes):
+        self.calls.append(("start", stage))
+        return current_stage.set(stage)
+
+    def on_stage_pause(self, stage, attributes, *, context):
+        self.calls.append(("pause", stage))
+        current_stage.reset(context)
+        return None
+
+    def on_stage_resume(self, stage, attributes, *, context):
+        self.calls.append(("resume", stage))
+        return current_stage.set(stage)
+
+    def on_stage_end(self, stage, attributes, *, context, duration, error):
+        self.calls.append(("end", stage))
+        current_stage.reset(context)
+        self.durations[stage] = duration
+
+
+def produce(hooks, count):
+    with hooks.stage(Stage.CHAT) as chat:
+        with hooks.stage(Stage.COMPLETION) as completion:
+            for index in range(count):
+                with completion.paused():
+                    with chat.paused():
+                        yield index
+
+
+def test_paused_time_is_not_part_of_the_duration():
+    hooks = HooksService([ContextHooks()])
+    seen = []
+
+    for _ in produce(hooks, 3):
+        seen.append(current_stage.get())
+        time.sleep(0.05)
+
+    assert seen == [None] * 3
+    assert current_stage.get() is None
+    recorded = hooks.get(ContextHooks)
+    assert recorded.durations[Stage.CHAT] < 0.05
+    assert recorded.calls[:6] == [
+        ("start", Stage.CHAT),
+        ("start", Stage.COMPLETION),
+        ("pause", Stage.COMPLETION),
+        ("pause", Stage.CHAT),
+        ("resume", Stage.CHAT),
+        ("resume", Stage.COMPLETION),
+    ]
+
+
+def test_closing_a_paused_stream_ends_its_stages():
+    hooks = HooksService([ContextHooks()])
+    events = produce(hooks, 3)
+
+    next(events)
+    events.close()
+
+    assert current_stage.get() is None
+    assert hooks.get(ContextHooks).calls[-2:] == [
+        ("end", Stage.COMPLETION),
+        ("end", Stage.CHAT),
+    ]
+
+
+def test_stages_without_hooks_can_be_paused():
+    hooks = HooksService([])
+
+    assert list(produce(hooks, 2)) == [0, 1]
+
+
+@pytest.fixture
+def sage_args(offline_args):
+    with FakeOpenAIServer() as server:
+        yield {
+            **offline_args,
+            "openai_key": "test",
+            "openai_base_url": server.base_url,
+            "hooks": [ContextHooks],
+        }
+
+
+def test_streamed_chats_only_time_the_producer(sage_args):
+    sage = SageAI(**sage_args)
+    sage.index()
+    seen = []
+
+    for event in sage.chat(messages=MESSAGES, model=MODEL, top_n=3, stream=True):
+        seen.append(current_stage.get())
+        time.sleep(0.05)
+
+    assert len(seen) > 3
+    assert set(seen) == {None}
+    durations = sage.hooks.get(ContextHooks).durations
+    assert durations[Stage.CHAT] < 0.05 * len(seen) / 2
+    assert durations[Stage.COMPLETION] <= durations[Stage.CHAT]
+
+
+def test_async_streamed_chats_only_time_the_producer(sage_args):
+    async def run():
+        sage = AsyncSageAI(**sage_args)
+        await sage.aindex()
+        seen = []
+        events = await sage.achat(messages=MESSAGES, model=MODEL, top_n=3, stream=True)
+        async for event in events:
+            seen.append(current_stage.get())
+            await asyncio.sleep(0.05)
+        return sage, seen
+
+    sage, seen = asyncio.run(run())
+
+    assert len(seen) > 3
+    assert set(seen) == {None}
+    durations = sage.hooks.get(ContextHooks).durations
+    assert durations[Stage.CHAT] < 0.05 * len(seen) / 2
@@ -0,0 +1,82 @@
+import asyncio
+
+import httpx
+import pytest
+
+from sageai.async_sageai import AsyncSageAI
+from sageai.bench.fake_openai_server import FakeOpenAIServer
+from sageai.config import Config
+from sageai.services.rate_limiter_service import on_response
+from sageai.utils.http_client_utilities import (
+    get_async_openai_client,
+    get_openai_client,
+    get_rate_limiter,
+)
+
+
+def create_config(**kwargs) -> Config:
+    return Config(openai_key="test", openai_base_url="http://127.0.0.1:1/v1", **kwargs)
+
+
+def create_response(status_code: int) -> httpx.Response:
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    return httpx.Response(status_code, request=request)
+
+
+def test_configs_with_other_rate_limits_share_the_client():
+    config = create_config()
+    limited = create_config(chat_requests_per_minute=60)
+
+    assert get_openai_client(config) is get_openai_client(limited)
+    assert get_rate_limiter(config) is not get_rate_limiter(limited)
+    assert get_openai_client(config) is not get_openai_client(
+        create_config(http_timeout=1)
+    )
+
+
+def test_responses_are_reported_to_the_limiter_of_the_request():
+    rate_limiter = get_rate_limiter(create_config())
+    other = get_rate_limiter(create_config(chat_requests_per_minute=60))
+
+    with rate_limiter.limit("chat", tokens=0):
+        on_response(create_response(429))
+    on_response(create_response(429))
+
+    assert rate_limiter.metrics["chat"]["throttled"] == 1
+    assert other.metrics["chat"]["throttled"] == 0
+
+
+def test_async_clients_are_shared_per_event_loop():
+    config = create_config()
+
+    async def get_clients():
+        return get_async_openai_client(config), get_async_openai_client(config)
+
+    first, same = asyncio.run(get_clients())
+    second, _ = asyncio.run(get_clients())
+
+    assert first is same
+    assert second is not first
+    with pytest.raises(RuntimeError):
+        get_async_openai_client(config)
+
+
+def test_an_async_instance_can_be_used_from_several_event_loops(offline_args):
+    with FakeOpenAIServer() as server:
+        sage = AsyncSageAI(
+            **{**offline_args, "openai_key": "test", "openai_base_url": server.base_url}
+        )
+
+        async def chat():
+            await sage.aindex()
+            return await sage.achat(
+                messages=[dict(role="user", content="create a billing invoice")],
+                model="gpt-3.5-turbo-0613",
+                top_n=3,
+            )
+
+        first = asyncio.run(chat())
+        second = asyncio.run(chat())
+
+    assert first == second
+    assert server.requests["completions"] == 2
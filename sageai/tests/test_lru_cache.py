@@ -0,0 +1,97 @@
+import pytest
+
+from sageai.types.abstract_vectordb import AbstractVectorDB
+from sageai.utils import lru_cache
+from sageai.utils.lru_cache import LRUCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(lru_cache.time, "monotonic", clock)
+    return clock
+
+
+class QueryVectorDB(AbstractVectorDB):
+    def __init__(self):
+        super().__init__()
+        self.embedded = []
+
+    def index(self):
+        pass
+
+    def search(self, *, query, top_n):
+        return []
+
+    def embed_batch(self, queries):
+        self.embedded.append(queries)
+        return [[float(len(query))] for query in queries]
+
+
+def test_evicts_the_least_recently_used_entry():
+    cache = LRUCache(2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = LRUCache(2, ttl=10)
+    cache.set("a", 1)
+
+    clock.now = 10
+    assert cache.get("a") == 1
+    clock.now = 10.5
+    assert cache.get("a", "expired") == "expired"
+    assert len(cache) == 0
+
+
+def test_setting_an_entry_renews_its_ttl(clock):
+    cache = LRUCache(2, ttl=10)
+    cache.set("a", 1)
+    clock.now = 8
+    cache.set("a", 2)
+
+    clock.now = 15
+    assert cache.get("a") == 2
+
+
+def test_max_size_zero_disables_caching():
+    cache = LRUCache(0)
+    cache.set("a", 1)
+
+    assert cache.get("a") is None
+    assert cache.stats() == dict(
+        size=0, max_size=0, hits=0, misses=1, evictions=0, hit_rate=0.0
+    )
+
+
+def test_query_embeddings_are_embedded_once():
+    vectordb = QueryVectorDB()
+
+    assert vectordb.get_query_embeddings(["ab", "a", "ab"], vectordb.embed_batch) == [
+        [2.0],
+        [1.0],
+        [2.0],
+    ]
+    assert vectordb.get_query_embeddings(["a", "abc"], vectordb.embed_batch) == [
+        [1.0],
+        [3.0],
+    ]
+    assert vectordb.embedded == [["ab", "a"], ["abc"]]
+    assert vectordb.get_query_embedding("abc", pytest.fail) == [3.0]
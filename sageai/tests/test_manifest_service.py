@@ -0,0 +1,121 @@
+import json
+import logging
+import os
+import shutil
+import stat
+
+import pytest
+
+from sageai.sageai import SageAI
+from sageai.services.manifest_service import ManifestService
+from sageai.types.function import Function
+from sageai.types.lazy_function import LazyFunction
+from sageai.utils.file_utilities import get_umask
+
+logger = logging.getLogger("ManifestTest")
+
+
+@pytest.fixture
+def manifest(functions_directory):
+    return ManifestService(functions_directory, logger=logger)
+
+
+def get_function_path(functions_directory, name):
+    return os.path.join(functions_directory, name, "function.py")
+
+
+def test_first_load_imports_all_functions_and_writes_the_manifest(manifest):
+    function_map = manifest.generate_functions_map()
+
+    assert len(function_map) == 12
+    assert all(isinstance(func, Function) for func in function_map.values())
+    assert sorted(entry.name for entry in manifest.load().values()) == sorted(
+        function_map
+    )
+    mode = stat.S_IMODE(os.stat(manifest.manifest_path).st_mode)
+    assert mode == 0o666 & ~get_umask()
+
+
+def test_fresh_entries_defer_imports_until_first_use(manifest):
+    function_map = manifest.generate_functions_map()
+    lazy_map = manifest.generate_functions_map()
+
+    assert all(isinstance(func, LazyFunction) for func in lazy_map.values())
+    lazy = lazy_map["get_billing_invoice_0"]
+    assert lazy.parameters == function_map["get_billing_invoice_0"].parameters
+    assert lazy.token_count == function_map["get_billing_invoice_0"].token_count
+    assert not lazy.is_loaded
+
+    assert lazy.invoke(dict(identifier="1")) == dict(result="get_billing_invoice_0")
+    assert lazy.is_loaded
+    assert not lazy_map["list_billing_invoice_1"].is_loaded
+
+
+def test_touched_but_unchanged_sources_stay_fresh(manifest, functions_directory):
+    manifest.generate_functions_map()
+    path = get_function_path(functions_directory, "get_billing_invoice_0")
+    os.utime(path, (1, 1))
+
+    function_map = manifest.generate_functions_map()
+
+    assert isinstance(function_map["get_billing_invoice_0"], LazyFunction)
+    entry = manifest.load()[os.path.relpath(path, functions_directory)]
+    assert entry.mtime == 1
+
+
+def test_changed_and_removed_functions_are_rebuilt(manifest, functions_directory):
+    manifest.generate_functions_map()
+    path = get_function_path(functions_directory, "get_billing_invoice_0")
+    with open(path) as f:
+        source = f.read()
+    with open(path, "w") as f:
+        f.write(source.replace("for the user.", "for the customer."))
+    # Filesystems with a coarse mtime may not tell the write apart.
+    os.utime(path, (2, 2))
+    shutil.rmtree(os.path.join(functions_directory, "list_billing_invoice_1"))
+
+    function_map = manifest.generate_functions_map()
+
+    changed = function_map["get_billing_invoice_0"]
+    assert isinstance(changed, Function)
+    assert changed.description == "Get a billing invoice for the customer."
+    assert "list_billing_invoice_1" not in function_map
+    assert isinstance(function_map["create_billing_invoice_2"], LazyFunction)
+    with open(manifest.manifest_path) as f:
+        names = [entry["name"] for entry in json.load(f)["functions"]]
+    assert "list_billing_invoice_1" not in names
+    assert len(names) == 11
+
+
+def test_a_manifest_of_another_version_is_ignored(manifest):
+    manifest.generate_functions_map()
+    with open(manifest.manifest_path, "w") as f:
+        json.dump(dict(version=0, functions=[]), f)
+
+    assert manifest.load() == {}
+    function_map = manifest.generate_functions_map()
+    assert all(isinstance(func, Function) for func in function_map.values())
+
+
+def test_reloads_refresh_the_manifest_entries(offline_args, functions_directory):
+    sage = SageAI(**offline_args, lazy_loading=True)
+    sage.index()
+    path = get_function_path(functions_directory, "get_billing_invoice_0")
+    with open(path) as f:
+        source = f.read()
+    with open(path, "w") as f:
+        f.write(source.replace("for the user.", "for the customer."))
+    os.utime(path, (2, 2))
+    removed = os.path.join(functions_directory, "list_billing_invoice_1")
+    shutil.rmtree(removed)
+
+    sage.reload_functions(changed=[os.path.dirname(path)], removed=[removed])
+
+    manifest = ManifestService(functions_directory, logger=logger)
+    entries = {entry.name: entry for entry in manifest.load().values()}
+    assert "list_billing_invoice_1" not in entries
+    changed = entries["get_billing_invoice_0"]
+    assert changed.description == "Get a billing invoice for the customer."
+    assert changed.mtime == 2
+    function_map = manifest.generate_functions_map()
+    assert all(isinstance(func, LazyFunction) for func in function_map.values())
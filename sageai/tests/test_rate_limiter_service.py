@@ -0,0 +1,72 @@
+import httpx
+import pytest
+
+from sageai.services.rate_limiter_service import (
+    AdaptiveConcurrency,
+    RateLimiterService,
+    TokenBucket,
+)
+
+
+def create_rate_limiter(**kwargs) -> RateLimiterService:
+    return RateLimiterService(
+        requests_per_minute=kwargs.get("requests_per_minute", {}),
+        tokens_per_minute=kwargs.get("tokens_per_minute", {}),
+        max_concurrency=kwargs.get("max_concurrency"),
+        min_concurrency=1,
+    )
+
+
+def create_response(status_code: int, headers=None) -> httpx.Response:
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    return httpx.Response(status_code, headers=headers, request=request)
+
+
+def test_token_bucket_delays_reservations_over_its_level():
+    bucket = TokenBucket(per_minute=60)
+    bucket.updated = 0.0
+
+    assert bucket.reserve(60, now=0.0) == 0.0
+    assert bucket.reserve(30, now=0.0) == pytest.approx(30.0)
+    # Refills one unit per second.
+    assert bucket.reserve(1, now=31.0) == 0.0
+
+
+def test_token_bucket_caps_reservations_at_its_capacity():
+    bucket = TokenBucket(per_minute=60)
+    bucket.updated = 0.0
+
+    assert bucket.reserve(600, now=0.0) == 0.0
+    assert bucket.reserve(600, now=0.0) == pytest.approx(60.0)
+
+
+def test_rate_limiter_only_counts_tokens_with_a_tokens_bucket():
+    limiter = create_rate_limiter(tokens_per_minute=dict(chat=1000, embeddings=None))
+
+    assert limiter.counts_tokens("chat")
+    assert not limiter.counts_tokens("embeddings")
+    assert limiter.reserve("embeddings", 10**9) == 0.0
+
+
+def test_rate_limiter_backs_off_once_per_burst_of_throttled_responses():
+    limiter = create_rate_limiter(max_concurrency=8)
+    limiter.concurrency.in_flight = 8
+
+    limiter.on_response(create_response(429, {"retry-after-ms": "500"}))
+    limiter.on_response(create_response(429, {"retry-after": "1"}))
+
+    assert limiter.concurrency.limit == 4
+    assert limiter.stats()["chat"]["throttled"] == 2
+    assert 0.9 < limiter.reserve("chat", 0) <= 1.0
+
+
+def test_adaptive_concurrency_grows_back_after_successes():
+    limit = AdaptiveConcurrency(maximum=4, minimum=1)
+    limit.limit = 2
+
+    limit.on_success()
+    assert limit.limit == 2.5
+
+    for _ in range(10):
+        limit.on_success()
+    assert limit.limit == 4
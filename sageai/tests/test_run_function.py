@@ -0,0 +1,35 @@
+import pytest
+
+from sageai import config
+from sageai.sageai import SageAI
+
+
+@pytest.fixture
+def global_config(monkeypatch, offline_args):
+    # Restored once the test is done.
+    monkeypatch.setattr(config, "_default_registry", config._default_registry)
+    return config.set_config(**offline_args)
+
+
+def test_run_function_on_an_instance(offline_args):
+    sage = SageAI(**offline_args)
+
+    assert sage.run_function(
+        name="get_billing_invoice_0", args=dict(identifier="1")
+    ) == dict(result="get_billing_invoice_0")
+
+
+def test_run_function_on_the_class_uses_the_global_config(global_config):
+    assert SageAI.run_function(
+        name="get_billing_invoice_0", args=dict(identifier="1")
+    ) == dict(result="get_billing_invoice_0")
+
+
+@pytest.mark.parametrize("sage", [None, "instance"])
+def test_run_function_returns_errors(offline_args, global_config, sage):
+    run_function = (
+        SageAI.run_function if sage is None else SageAI(**offline_args).run_function
+    )
+
+    assert "error" in run_function(name="missing", args={})
+    assert "error" in run_function(name="get_billing_invoice_0", args={})
@@ -0,0 +1,127 @@
+import pytest
+
+from sageai.base_sageai import BaseSageAI
+from sageai.sageai import SageAI
+from sageai.services import semantic_cache_service
+from sageai.services.semantic_cache_service import (
+    SemanticCacheEntry,
+    SemanticCacheService,
+)
+
+MESSAGES = [
+    dict(role="system", content="You are a billing assistant."),
+    dict(role="user", content="Get invoice 1."),
+]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(semantic_cache_service.time, "monotonic", clock)
+    return clock
+
+
+def create_entry(cache, name, *, model="model", context="context"):
+    return SemanticCacheEntry(
+        model=model,
+        context=context,
+        query=name,
+        name=name,
+        args={},
+        expires_at=cache.get_expires_at(),
+    )
+
+
+def lookup_name(cache, embedding, *, model="model", context="context"):
+    hit = cache.lookup(embedding, model=model, context=context)
+    return None if hit is None else hit[0].name
+
+
+def test_lookups_hit_queries_above_the_threshold():
+    cache = SemanticCacheService(max_size=4, threshold=0.9, ttl=None)
+    cache.store([1.0, 0.0], create_entry(cache, "a"))
+    cache.store([0.0, 1.0], create_entry(cache, "b"))
+
+    assert lookup_name(cache, [1.0, 0.2]) == "a"
+    assert lookup_name(cache, [1.0, 1.0]) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["hit_rate"] == 0.5
+
+
+def test_lookups_only_hit_entries_of_the_same_model_and_context():
+    cache = SemanticCacheService(max_size=4, threshold=0.9, ttl=None)
+    cache.store([1.0, 0.0], create_entry(cache, "a", context="other"))
+    cache.store([1.0, 0.1], create_entry(cache, "b", model="other"))
+
+    assert lookup_name(cache, [1.0, 0.0]) is None
+    assert lookup_name(cache, [1.0, 0.0], context="other") == "a"
+    assert lookup_name(cache, [1.0, 0.0], model="other") == "b"
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = SemanticCacheService(max_size=4, threshold=0.9, ttl=10)
+    cache.store([1.0, 0.0], create_entry(cache, "a"))
+
+    clock.now = 10
+    assert lookup_name(cache, [1.0, 0.0]) == "a"
+    clock.now = 10.5
+    assert lookup_name(cache, [1.0, 0.0]) is None
+
+    cache.store([0.0, 1.0], create_entry(cache, "b"))
+    assert len(cache) == 1
+
+
+def test_evicts_the_least_recently_used_entry():
+    cache = SemanticCacheService(max_size=2, threshold=0.9, ttl=None)
+    cache.store([1.0, 0.0], create_entry(cache, "a"))
+    cache.store([0.0, 1.0], create_entry(cache, "b"))
+    assert lookup_name(cache, [1.0, 0.0]) == "a"
+
+    cache.store([-1.0, 0.0], create_entry(cache, "c"))
+
+    assert lookup_name(cache, [0.0, 1.0]) is None
+    assert lookup_name(cache, [1.0, 0.0]) == "a"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_invalidate_drops_the_entries_of_reloaded_functions():
+    cache = SemanticCacheService(max_size=4, threshold=0.9, ttl=None)
+    cache.store([1.0, 0.0], create_entry(cache, "a"))
+    cache.store([0.0, 1.0], create_entry(cache, "b"))
+
+    cache.invalidate(["a"])
+
+    assert lookup_name(cache, [1.0, 0.0]) is None
+    assert lookup_name(cache, [0.0, 1.0]) == "b"
+
+
+def test_context_ignores_the_latest_user_message_only():
+    context = BaseSageAI.get_semantic_cache_context(
+        dict(model="model", messages=MESSAGES)
+    )
+    rephrased = [MESSAGES[0], dict(role="user", content="Fetch invoice 1.")]
+    other_system = [dict(role="system", content="Be brief."), MESSAGES[1]]
+
+    assert context == BaseSageAI.get_semantic_cache_context(
+        dict(model="model", messages=rephrased)
+    )
+    assert context != BaseSageAI.get_semantic_cache_context(
+        dict(model="model", messages=other_system)
+    )
+    assert context != BaseSageAI.get_semantic_cache_context(
+        dict(model="model", messages=MESSAGES, temperature=0)
+    )
+
+
+def test_the_semantic_cache_cant_be_used_with_tools(offline_args):
+    with pytest.raises(Exception, match="use_tools"):
+        SageAI(**offline_args, semantic_cache=True, use_tools=True)
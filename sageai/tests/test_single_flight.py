@@ -0,0 +1,132 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from sageai.utils.single_flight import AsyncSingleFlight, SingleFlight
+
+
+def test_concurrent_calls_with_the_same_key_run_once():
+    single_flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "result"
+
+    with ThreadPoolExecutor(5) as executor:
+        leader = executor.submit(single_flight.do, "key", fn)
+        started.wait(5)
+        followers = [executor.submit(single_flight.do, "key", fn) for _ in range(3)]
+        other = executor.submit(single_flight.do, "other", lambda: "other")
+        assert other.result(5) == "other"
+        # Gives the followers time to start waiting on the leader.
+        time.sleep(0.05)
+        release.set()
+        results = [future.result(5) for future in [leader] + followers]
+
+    assert results == ["result"] * 4
+    assert calls == [1]
+    assert single_flight.do("key", lambda: "again") == "again"
+
+
+def test_followers_get_the_exception_of_the_call():
+    single_flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def fn():
+        started.set()
+        release.wait(5)
+        raise ValueError("failed")
+
+    with ThreadPoolExecutor(2) as executor:
+        leader = executor.submit(single_flight.do, "key", fn)
+        started.wait(5)
+        follower = executor.submit(single_flight.do, "key", fn)
+        time.sleep(0.05)
+        release.set()
+        for future in [leader, follower]:
+            with pytest.raises(ValueError, match="failed"):
+                future.result(5)
+
+
+def test_async_calls_with_the_same_key_run_once():
+    single_flight = AsyncSingleFlight()
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def run():
+        return await asyncio.gather(
+            *[single_flight.do("key", fn) for _ in range(4)],
+            single_flight.do("other", fn),
+        )
+
+    assert asyncio.run(run()) == ["result"] * 5
+    assert calls == [1, 1]
+
+
+def test_async_followers_get_the_exception_of_the_call():
+    single_flight = AsyncSingleFlight()
+
+    async def fn():
+        await asyncio.sleep(0.01)
+        raise ValueError("failed")
+
+    async def run():
+        return await asyncio.gather(
+            *[single_flight.do("key", fn) for _ in range(2)], return_exceptions=True
+        )
+
+    assert [type(result) for result in asyncio.run(run())] == [ValueError] * 2
+
+
+def test_a_follower_runs_the_call_when_the_leader_is_cancelled():
+    single_flight = AsyncSingleFlight()
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    async def run():
+        leader = asyncio.create_task(single_flight.do("key", fn))
+        await asyncio.sleep(0)
+        followers = [asyncio.create_task(single_flight.do("key", fn)) for _ in range(2)]
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.gather(*followers)
+
+    assert asyncio.run(run()) == [2, 2]
+    assert calls == [1, 1]
+
+
+def test_cancelling_a_follower_leaves_the_call_running():
+    single_flight = AsyncSingleFlight()
+
+    async def fn():
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def run():
+        leader = asyncio.create_task(single_flight.do("key", fn))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(single_flight.do("key", fn))
+        await asyncio.sleep(0)
+        follower.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        return await leader
+
+    assert asyncio.run(run()) == "result"
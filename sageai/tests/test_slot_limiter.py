@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+
+from sageai.utils.slot_limiter import SlotLimiter
+
+
+def test_unbounded_limiters_never_wait():
+    limit = SlotLimiter(None)
+
+    assert all(limit.acquire(timeout=0) for _ in range(100))
+    assert limit.in_flight == 100
+
+
+def test_acquire_times_out_while_the_slot_is_held():
+    limit = SlotLimiter(1)
+    assert limit.acquire()
+
+    assert not limit.acquire(timeout=0.01)
+    assert limit.in_flight == 1
+    assert len(limit.waiters) == 0
+
+
+def test_acquire_keeps_a_slot_handed_over_right_after_its_timeout():
+    limit = SlotLimiter(1)
+    assert limit.acquire()
+
+    remove_waiter = limit.remove_waiter
+
+    def release_then_remove_waiter(waiter):
+        # The holder releases between the timed out wait and the removal of
+        # the waiter, so the slot was already taken on the waiter's behalf.
+        limit.release()
+        return remove_waiter(waiter)
+
+    limit.remove_waiter = release_then_remove_waiter
+    assert limit.acquire(timeout=0.01)
+    assert limit.in_flight == 1
+
+    limit.release()
+    assert limit.in_flight == 0
+
+
+def test_release_wakes_waiters_in_fifo_order():
+    async def main():
+        limit = SlotLimiter(1)
+        await limit.aacquire()
+        order = []
+
+        async def acquire(name):
+            await limit.aacquire()
+            order.append(name)
+            limit.release()
+
+        tasks = [asyncio.create_task(acquire(name)) for name in "abc"]
+        await asyncio.sleep(0)
+        limit.release()
+        await asyncio.gather(*tasks)
+        return order, limit.in_flight
+
+    assert asyncio.run(main()) == (["a", "b", "c"], 0)
+
+
+def test_aacquire_cancelled_while_queued_leaves_the_queue():
+    async def main():
+        limit = SlotLimiter(1)
+        await limit.aacquire()
+        task = asyncio.create_task(limit.aacquire())
+        await asyncio.sleep(0)
+        assert len(limit.waiters) == 1
+
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert len(limit.waiters) == 0
+
+        limit.release()
+        return limit.in_flight
+
+    assert asyncio.run(main()) == 0
+
+
+def test_aacquire_cancelled_before_the_handed_over_slot_resolves_releases_it():
+    async def main():
+        limit = SlotLimiter(1)
+        await limit.aacquire()
+        task = asyncio.create_task(limit.aacquire())
+        await asyncio.sleep(0)
+
+        # The slot is taken for the waiter, but resolving its future is only
+        # scheduled when the task is cancelled.
+        limit.release()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0)
+        return limit.in_flight, len(limit.waiters)
+
+    assert asyncio.run(main()) == (0, 0)
+
+
+def test_aacquire_cancelled_after_the_handed_over_slot_resolved_releases_it():
+    async def main():
+        limit = SlotLimiter(1)
+        await limit.aacquire()
+        task = asyncio.create_task(limit.aacquire())
+        await asyncio.sleep(0)
+
+        limit.release()
+        # Runs the scheduled resolve, so the task is woken with its slot.
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return limit.in_flight, len(limit.waiters)
+
+    assert asyncio.run(main()) == (0, 0)
@@ -0,0 +1,124 @@
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from sageai.types.stage import Stage
+from sageai.types.stream_event_type import StreamEventType
+from sageai.utils.stream_utilities import IncrementalJSONParser, StreamedFunctionCalls
+
+
+class RecordingHooks:
+    def __init__(self):
+        self.stages = []
+
+    @contextmanager
+    def stage(self, stage, **attributes):
+        self.stages.append((stage, attributes))
+        yield
+
+
+def tool_delta(index, *, id=None, name=None, arguments=None):
+    return SimpleNamespace(
+        tool_calls=[
+            SimpleNamespace(
+                index=index,
+                id=id,
+                function=SimpleNamespace(name=name, arguments=arguments),
+            )
+        ],
+        function_call=None,
+    )
+
+
+def function_delta(*, name=None, arguments=None):
+    return SimpleNamespace(
+        tool_calls=None,
+        function_call=SimpleNamespace(name=name, arguments=arguments),
+    )
+
+
+def event_types(events):
+    return [event["type"] for event in events]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 5, 100])
+def test_parser_completes_on_the_closing_brace(chunk_size):
+    text = '{"text": "a } and a \\" {", "items": [1, {"b": "]"}]}'
+    parser = IncrementalJSONParser()
+    chunks = [text[i : i + chunk_size] for i in range(0, len(text), chunk_size)]
+
+    completed = [parser.feed(chunk) for chunk in chunks]
+
+    assert completed == [False] * (len(chunks) - 1) + [True]
+    assert parser.value() == {"text": 'a } and a " {', "items": [1, {"b": "]"}]}
+
+
+def test_parser_ignores_text_after_the_value():
+    parser = IncrementalJSONParser()
+
+    assert parser.feed('{"a": 1}')
+    assert parser.feed("{") is True
+    assert parser.depth == 0
+
+
+def test_parser_of_empty_arguments_returns_an_empty_object():
+    assert IncrementalJSONParser().value() == {}
+
+
+def test_tool_calls_are_completed_as_their_arguments_close():
+    calls = StreamedFunctionCalls()
+    deltas = [
+        tool_delta(0, id="call_a", name="get_", arguments=""),
+        tool_delta(1, id="call_b", name="list_orders", arguments='{"lim'),
+        tool_delta(0, name="invoice", arguments='{"id": "{'),
+        tool_delta(1, arguments='it": 2}'),
+        tool_delta(0, arguments='1}"}'),
+    ]
+
+    events = [event for delta in deltas for event in calls.feed(delta)]
+
+    assert event_types(events) == [
+        StreamEventType.FUNCTION_NAME,
+        StreamEventType.FUNCTION_NAME,
+        StreamEventType.ARGUMENTS_DELTA,
+        StreamEventType.ARGUMENTS_DELTA,
+        StreamEventType.ARGUMENTS_DELTA,
+        StreamEventType.ARGUMENTS_COMPLETE,
+        StreamEventType.ARGUMENTS_DELTA,
+        StreamEventType.ARGUMENTS_COMPLETE,
+    ]
+    # The name event of a call is sent once its first name chunk arrives.
+    assert events[0]["name"] == "get_"
+    assert calls.ordered_calls() == [
+        dict(id="call_a", name="get_invoice", args={"id": "{1}"}),
+        dict(id="call_b", name="list_orders", args={"limit": 2}),
+    ]
+    assert calls.finish() == []
+
+
+def test_function_call_deltas_are_parsed_as_call_zero():
+    calls = StreamedFunctionCalls()
+
+    calls.feed(function_delta(name="get_invoice", arguments='{"id":'))
+    events = calls.feed(function_delta(arguments=' "1"}'))
+
+    assert events[-1] == dict(
+        type=StreamEventType.ARGUMENTS_COMPLETE,
+        index=0,
+        id=None,
+        name="get_invoice",
+        args={"id": "1"},
+    )
+
+
+def test_finish_reports_arguments_that_never_closed():
+    hooks = RecordingHooks()
+    calls = StreamedFunctionCalls(hooks=hooks)
+    calls.feed(tool_delta(0, id="call_a", name="get_invoice", arguments='{"id": 1'))
+
+    [event] = calls.finish()
+
+    assert event["args"] == '{"id": 1'
+    assert event["error"].startswith("Invalid function arguments")
+    assert hooks.stages == [(Stage.PARSE_ARGUMENTS, dict(function="get_invoice"))]
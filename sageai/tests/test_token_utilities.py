@@ -0,0 +1,78 @@
+from types import SimpleNamespace
+
+from sageai.base_sageai import BaseSageAI
+from sageai.types.abstract_vectordb import AbstractVectorDB
+from sageai.utils.token_utilities import (
+    count_schema_tokens,
+    estimate_chat_tokens,
+    select_by_token_budget,
+)
+
+FUNCTION_MAP = {
+    name: SimpleNamespace(token_count=token_count, parameters=dict(name=name))
+    for name, token_count in dict(a=50, b=1500, c=300, d=200).items()
+}
+
+
+class ScoredVectorDB(AbstractVectorDB):
+    def __init__(self, scored, *, budget=None, min_score=None):
+        super().__init__()
+        self.scored = scored
+        self.hybrid_search = False
+        self.function_token_budget = budget
+        self.function_min_score = min_score
+
+    def index(self):
+        pass
+
+    def search(self, *, query, top_n):
+        return [func_name for func_name, _ in self.scored[:top_n]]
+
+    def search_scored(self, *, query, top_n):
+        return self.scored[:top_n]
+
+
+def test_functions_are_kept_while_they_fit_in_the_budget():
+    assert select_by_token_budget(["a", "c", "d"], FUNCTION_MAP, 550) == ["a", "c", "d"]
+    assert select_by_token_budget(["a", "c", "d"], FUNCTION_MAP, 549) == ["a", "c"]
+
+
+def test_functions_that_dont_fit_are_skipped_for_smaller_ones():
+    assert select_by_token_budget(["a", "b", "d"], FUNCTION_MAP, 400) == ["a", "d"]
+
+
+def test_the_best_function_is_always_kept():
+    assert select_by_token_budget(["b", "a"], FUNCTION_MAP, 100) == ["b"]
+
+
+def test_names_missing_from_the_function_map_are_dropped():
+    assert select_by_token_budget(["removed", "b", "a"], FUNCTION_MAP, 100) == ["b"]
+
+
+def test_search_applies_the_min_score_then_the_budget():
+    scored = [("a", 0.9), ("b", 0.8), ("c", 0.7), ("d", 0.2)]
+    vectordb = ScoredVectorDB(scored, budget=400, min_score=0.5)
+
+    result = vectordb.search_impl(query="query", top_n=4, function_map=FUNCTION_MAP)
+
+    assert result == [dict(name="a"), dict(name="c")]
+    assert not vectordb.is_plain_search()
+
+
+def test_chat_tokens_count_the_definitions_once():
+    messages = [dict(role="user", content="12345678")]
+    parameters = dict(name="a", parameters=dict(type="object"))
+
+    counted = estimate_chat_tokens(messages, functions=[parameters], max_tokens=10)
+    given = estimate_chat_tokens(messages, function_tokens=7, max_tokens=10)
+
+    assert counted - given == count_schema_tokens(parameters) - 7
+    assert estimate_chat_tokens(messages, tools=[dict(function=parameters)]) == (
+        counted - 10
+    )
+
+
+def test_chat_results_report_the_tokens_of_the_sent_definitions():
+    top_functions = [dict(name="a"), dict(name="d"), dict(name="removed")]
+
+    assert BaseSageAI.get_function_tokens(top_functions, FUNCTION_MAP) == 250
@@ -0,0 +1,137 @@
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+from sageai.services.qdrantstore_service import QdrantStoreService
+
+logger = logging.getLogger("VectorStoreTest")
+
+
+def create_function_map(**descriptions):
+    return {
+        name: SimpleNamespace(name=name, description=description)
+        for name, description in descriptions.items()
+    }
+
+
+def embed(texts):
+    return [[float(len(text)), 1.0] for text in texts]
+
+
+def index(store, function_map, *, incremental=True):
+    changes = store.plan_index(function_map, incremental=incremental)
+    store.apply_index(changes, embed(list(changes.upserts.values())))
+    return changes
+
+
+@pytest.fixture
+def store():
+    return QdrantStoreService(
+        embeddings_model="model", embeddings_size=2, logger=logger
+    )
+
+
+def test_incremental_index_only_upserts_new_and_changed_functions(store):
+    first = index(store, create_function_map(a="Gets a.", b="Gets b."))
+    assert sorted(first.upserts) == ["a", "b"]
+    assert first.unchanged == 0
+
+    second = index(
+        store, create_function_map(a="Gets a.", b="Gets b, changed.", c="Gets c.")
+    )
+    assert sorted(second.upserts) == ["b", "c"]
+    assert second.unchanged == 1
+    # The previous point of the changed function is replaced.
+    assert len(second.deletes) == 1
+    assert len(store.get_stored_ids()) == 3
+
+
+def test_incremental_index_deletes_removed_functions(store):
+    function_map = create_function_map(a="Gets a.", b="Gets b.")
+    index(store, function_map)
+    b_id = store.get_point_id("b", store.format_func_embedding(function_map["b"]))
+
+    changes = index(store, create_function_map(a="Gets a."))
+
+    assert changes.upserts == {}
+    assert changes.deletes == [b_id]
+    assert store.search(query_embedding=[1.0, 1.0], top_n=5) == ["a"]
+
+
+def test_unchanged_functions_keep_stable_ids(store):
+    function_map = create_function_map(a="Gets a.", b="Gets b.")
+    index(store, function_map)
+    ids = store.get_stored_ids()
+
+    other_store = QdrantStoreService(
+        embeddings_model="model", embeddings_size=2, logger=logger
+    )
+    index(other_store, function_map)
+
+    assert other_store.get_stored_ids() == ids
+    assert index(store, function_map).unchanged == 2
+
+
+def test_point_ids_depend_on_the_embeddings_model(store):
+    other_store = QdrantStoreService(
+        embeddings_model="other-model", embeddings_size=2, logger=logger
+    )
+
+    assert store.get_point_id("a", "text") != other_store.get_point_id("a", "text")
+
+
+def test_full_index_recreates_the_collection(store):
+    index(store, create_function_map(a="Gets a.", b="Gets b."))
+
+    changes = index(store, create_function_map(c="Gets c."), incremental=False)
+
+    assert list(changes.upserts) == ["c"]
+    assert store.search(query_embedding=[1.0, 1.0], top_n=5) == ["c"]
+
+
+def reindex(store, function_map, *, changed, removed):
+    changes = store.plan_reindex(function_map, changed=changed, removed=removed)
+    store.apply_index(changes, embed(list(changes.upserts.values())))
+    return changes
+
+
+def test_reindex_only_plans_the_changed_and_removed_functions(store):
+    function_map = create_function_map(a="Gets a.", b="Gets b.", c="Gets c.")
+    index(store, function_map)
+    c_id = store.point_ids["c"]
+    # A stale description outside the reloaded functions isn't fingerprinted.
+    function_map = create_function_map(a="Gets a, stale.", b="Gets b, changed.")
+
+    changes = reindex(store, function_map, changed=["b"], removed=["c"])
+
+    assert list(changes.upserts) == ["b"]
+    assert c_id in changes.deletes
+    assert len(changes.deletes) == 2
+    assert sorted(store.point_ids) == ["a", "b"]
+    assert len(store.get_stored_ids()) == 2
+
+
+def test_reindex_skips_reloaded_functions_with_the_same_text(store):
+    function_map = create_function_map(a="Gets a.", b="Gets b.")
+    index(store, function_map)
+
+    changes = reindex(store, function_map, changed=["a"], removed=[])
+
+    assert changes.upserts == {}
+    assert changes.deletes == []
+    assert changes.unchanged == 2
+
+
+def test_reindex_of_a_renamed_function_replaces_its_point(store):
+    index(store, create_function_map(a="Gets a.", b="Gets b."))
+
+    reindex(
+        store,
+        create_function_map(a="Gets a.", d="Gets b."),
+        changed=["d"],
+        removed=["b"],
+    )
+
+    assert sorted(store.point_ids) == ["a", "d"]
+    assert sorted(store.search(query_embedding=[1.0, 1.0], top_n=5)) == ["a", "d"]
@@ -0,0 +1,150 @@
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sageai.types.base_vectordb import BaseVectorDB
+from sageai.types.stage import Stage
+
+
+class AbstractAsyncVectorDB(BaseVectorDB, ABC):
+    """Async counterpart of `AbstractVectorDB`, used by `AsyncSageAI`."""
+
+    @abstractmethod
+    async def index(self) -> None:
+        """Indexes the vector db based on the functions directory."""
+        pass
+
+    @abstractmethod
+    async def search(self, *, query: str, top_n: int) -> List[str]:
+        """Actual search logic, which should be implemented in derived classes.
+        It should return a list of function names
+        """
+        pass
+
+    async def search_batch(self, *, queries: List[str], top_n: int) -> List[List[str]]:
+        """Searches several queries at once. Defaults to one `search` per query;
+        implementations can embed and score the queries together."""
+        return [await self.search(query=query, top_n=top_n) for query in queries]
+
+    async def get_query_embedding(
+        self, query: str, embed: Callable[[str], Awaitable[List[float]]]
+    ) -> List[float]:
+        """Returns the cached embedding of a query, awaiting `embed` on a miss."""
+        embedding = self.query_embeddings_cache.get(query)
+        if embedding is None:
+            with self.hooks.stage(Stage.QUERY_EMBEDDING, count=1):
+                embedding = await embed(query)
+            self.query_embeddings_cache.set(query, embedding)
+        return embedding
+
+    async def get_query_embeddings(
+        self,
+        queries: List[str],
+        embed_batch: Callable[[List[str]], Awaitable[List[List[float]]]],
+    ) -> List[List[float]]:
+        """Returns the cached embeddings of queries, awaiting a single
+        `embed_batch` call for all misses."""
+        embeddings, missing = self.get_cached_query_embeddings(queries)
+        if len(missing) == 0:
+            return embeddings
+        with self.hooks.stage(Stage.QUERY_EMBEDDING, count=len(missing)):
+            new_embeddings = await embed_batch(missing)
+        return self.merge_query_embeddings(queries, embeddings, missing, new_embeddings)
+
+    async def search_impl(
+        self,
+        *,
+        query: str,
+        top_n: int,
+        function_map: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Search vector db based on a query and return top n function names.
+        Names missing from `function_map` (e.g. removed by a hot reload) are
+        skipped. With `function_token_budget` set, ranked functions are kept
+        while their definitions fit in the budget."""
+        function_map = self.get_function_map(function_map)
+        with self.hooks.stage(Stage.SEARCH, top_n=top_n):
+            if self.hybrid_search:
+                results = await self.search_hybrid(
+                    query=query, top_n=top_n, function_map=function_map
+                )
+            else:
+                results = await self.search_above_min_score(query=query, top_n=top_n)
+            return self.select_search_result(results, function_map)
+
+    async def search_impl_batch(
+        self,
+        *,
+        queries: List[str],
+        top_n: int,
+        function_map: Optional[Dict[str, Any]] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """`search_impl` for several queries. Plain vector searches go through
+        `search_batch`; otherwise the query embeddings are warmed up together
+        before each query is searched on its own."""
+        function_map = self.get_function_map(function_map)
+        if self.is_plain_search():
+            with self.hooks.stage(Stage.SEARCH, top_n=top_n, count=len(queries)):
+                return [
+                    self.format_search_result(
+                        function_names=function_names, function_map=function_map
+                    )
+                    for function_names in await self.search_batch(
+                        queries=queries, top_n=top_n
+                    )
+                ]
+
+        await self.warm_query_embeddings(queries)
+        return [
+            await self.search_impl(query=query, top_n=top_n, function_map=function_map)
+            for query in queries
+        ]
+
+    async def warm_query_embeddings(self, queries: List[str]) -> None:
+        """Caches the embeddings of queries about to be searched. Defaults to
+        doing nothing."""
+        pass
+
+    async def search_hybrid(
+        self,
+        *,
+        query: str,
+        top_n: int,
+        function_map: Optional[Dict[str, Any]] = None,
+    ) -> List[str]:
+        """Fuses BM25 and vector rankings with reciprocal rank fusion. When the
+        lexical match is decisive, the vector search and its query embedding
+        are skipped."""
+        candidates = top_n * 2
+        lexical_names, decisive = self.search_lexical(
+            query=query,
+            top_n=candidates,
+            function_map=self.get_function_map(function_map),
+        )
+        if decisive:
+            return lexical_names[:top_n]
+
+        vector_names = await self.search_above_min_score(query=query, top_n=candidates)
+        return self.fuse_rankings(vector_names, lexical_names, top_n)
+
+    async def search_scored(
+        self, *, query: str, top_n: int
+    ) -> List[Tuple[str, Optional[float]]]:
+        """Returns (function name, similarity) pairs, best first. Defaults to
+        `search` without scores, to which `function_min_score` doesn't apply."""
+        return [
+            (func_name, None)
+            for func_name in await self.search(query=query, top_n=top_n)
+        ]
+
+    async def search_above_min_score(self, *, query: str, top_n: int) -> List[str]:
+        if self.function_min_score is None:
+            return await self.search(query=query, top_n=top_n)
+        return self.filter_min_score(await self.search_scored(query=query, top_n=top_n))
+
+    async def reindex_functions(
+        self, *, changed: List[str], removed: List[str]
+    ) -> None:
+        """Updates the index after `function_map` was hot reloaded. Defaults to a
+        full `index`; implementations can re-embed only the `changed` functions
+        and drop the `removed` ones."""
+        await self.index()
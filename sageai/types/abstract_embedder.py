@@ -0,0 +1,34 @@
+import asyncio
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+
+class AbstractEmbedder(ABC):
+    """Turns function descriptions and queries into embeddings for the vector
+    db. `name` identifies the embedding space, and is part of the embeddings
+    cache key and of the stored point fingerprints."""
+
+    name: str
+
+    def __init__(self):
+        self._dimension: Optional[int] = None
+
+    @abstractmethod
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embeds a batch of texts, returning embeddings in the same order."""
+        pass
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed([text])[0]
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        return await asyncio.to_thread(self.embed, texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed([text]))[0]
+
+    def get_dimension(self) -> int:
+        """Size of the embeddings, detected by embedding a probe text once."""
+        if self._dimension is None:
+            self._dimension = len(self.embed_query("dimension"))
+        return self._dimension
@@ -0,0 +1,51 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+
+from sageai.types.stage import Stage
+
+
+class AbstractHooks(ABC):
+    """Callbacks around each stage of the chat pipeline. Stages nest, e.g. a
+    `SEARCH` contains its `QUERY_EMBEDDING`, and carry attributes such as the
+    `function` name of the function stages.
+
+    Whatever `on_stage_start` returns is passed back to `on_stage_end` as
+    `context`. Hooks are called on the thread or event loop running the stage,
+    so they should be quick and thread-safe.
+
+    Streaming stages are paused while the consumer of the stream holds an
+    event, and `on_stage_pause` and `on_stage_resume` let hooks step out of the
+    stage's context in the meantime. Paused time isn't part of the duration.
+    """
+
+    @abstractmethod
+    def on_stage_start(self, stage: Stage, attributes: Dict[str, Any]) -> Any:
+        pass
+
+    @abstractmethod
+    def on_stage_end(
+        self,
+        stage: Stage,
+        attributes: Dict[str, Any],
+        *,
+        context: Any,
+        duration: float,
+        error: Optional[BaseException],
+    ) -> None:
+        """`duration` is in seconds, and `error` is the exception that failed
+        the stage, if any."""
+        pass
+
+    def on_stage_pause(
+        self, stage: Stage, attributes: Dict[str, Any], *, context: Any
+    ) -> Any:
+        """Called before a streaming stage yields an event. Returns the context
+        passed to `on_stage_resume`."""
+        return context
+
+    def on_stage_resume(
+        self, stage: Stage, attributes: Dict[str, Any], *, context: Any
+    ) -> Any:
+        """Called once the consumer asks for the next event. Returns the context
+        passed to the next call, or to `on_stage_end`."""
+        return context
@@ -0,0 +1,32 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+
+
+class AbstractResultCache(ABC):
+    """Store of memoized function results. `namespace` is the function name and
+    `key` the serialized validated input. Implementations backed by an external
+    store can ignore `max_entries` and rely on `ttl` alone."""
+
+    @abstractmethod
+    def get(self, namespace: str, key: str) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    def set(
+        self,
+        namespace: str,
+        key: str,
+        value: Dict[str, Any],
+        *,
+        ttl: float,
+        max_entries: Optional[int],
+    ) -> None:
+        pass
+
+    def invalidate(self, namespace: str) -> None:
+        """Drops the results of a function, e.g. after a hot reload changed its
+        code. Defaults to `clear`, which implementations should narrow down."""
+        self.clear()
+
+    def clear(self) -> None:
+        pass
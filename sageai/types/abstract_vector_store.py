@@ -0,0 +1,163 @@
+import hashlib
+import uuid
+from abc import ABC, abstractmethod
+from typing import Dict, List, Tuple
+
+from pydantic import BaseModel
+
+from sageai.types.function import Function
+
+
+class IndexChanges(BaseModel):
+    upserts: Dict[str, str]
+    deletes: List[str]
+    unchanged: int
+
+
+class AbstractVectorStore(ABC):
+    """Storage of function embeddings behind the default vector dbs.
+
+    Computing which functions need (re-)embedding is kept separate from
+    writing them, so both the sync and async vector dbs can share a store.
+    """
+
+    def __init__(self, *, embeddings_model: str, embeddings_size: int, logger):
+        self.embeddings_model = embeddings_model
+        self.embeddings_size = embeddings_size
+        self.logger = logger
+        # The point id of each stored function, so a hot reload can plan its
+        # update without listing and fingerprinting every point.
+        self.point_ids: Dict[str, str] = {}
+
+    @abstractmethod
+    def apply_index(self, changes: IndexChanges, embeddings: List[List[float]]):
+        """Writes the planned changes. Implementations call `record_index`
+        once they are stored."""
+        pass
+
+    def record_index(self, changes: IndexChanges):
+        deletes = set(changes.deletes)
+        point_ids = {
+            func_name: point_id
+            for func_name, point_id in self.point_ids.items()
+            if point_id not in deletes
+        }
+        for func_name, text in changes.upserts.items():
+            point_ids[func_name] = self.get_point_id(func_name, text)
+        self.point_ids = point_ids
+
+    @abstractmethod
+    def search_scored(
+        self, *, query_embedding: List[float], top_n: int
+    ) -> List[Tuple[str, float]]:
+        """Returns (function name, cosine similarity) pairs, best first."""
+        pass
+
+    def search(self, *, query_embedding: List[float], top_n: int) -> List[str]:
+        return [
+            func_name
+            for func_name, _ in self.search_scored(
+                query_embedding=query_embedding, top_n=top_n
+            )
+        ]
+
+    def search_batch(
+        self, *, query_embeddings: List[List[float]], top_n: int
+    ) -> List[List[str]]:
+        return [
+            self.search(query_embedding=query_embedding, top_n=top_n)
+            for query_embedding in query_embeddings
+        ]
+
+    @abstractmethod
+    def get_stored_ids(self) -> set:
+        pass
+
+    @abstractmethod
+    def ensure_collection(self):
+        """Creates the collection, or recreates it if the embeddings size
+        changed."""
+        pass
+
+    @abstractmethod
+    def recreate_collection(self):
+        pass
+
+    def plan_index(
+        self, function_map: Dict[str, Function], *, incremental: bool
+    ) -> IndexChanges:
+        func_texts = {
+            func_name: self.format_func_embedding(func)
+            for func_name, func in function_map.items()
+        }
+
+        if not incremental:
+            self.recreate_collection()
+            return IndexChanges(upserts=func_texts, deletes=[], unchanged=0)
+
+        self.ensure_collection()
+        stored_ids = self.get_stored_ids()
+        desired_ids = {
+            self.get_point_id(func_name, text): func_name
+            for func_name, text in func_texts.items()
+        }
+
+        upserts = {
+            func_name: func_texts[func_name]
+            for point_id, func_name in desired_ids.items()
+            if point_id not in stored_ids
+        }
+        deletes = [point_id for point_id in stored_ids if point_id not in desired_ids]
+        return IndexChanges(
+            upserts=upserts,
+            deletes=deletes,
+            unchanged=len(func_texts) - len(upserts),
+        )
+
+    def plan_reindex(
+        self,
+        function_map: Dict[str, Function],
+        *,
+        changed: List[str],
+        removed: List[str],
+    ) -> IndexChanges:
+        """Plans the update of a hot reload, only fingerprinting the `changed`
+        functions and dropping the points of the `removed` ones."""
+        stored_ids = dict(self.point_ids)
+        deletes = [
+            stored_ids.pop(func_name)
+            for func_name in removed
+            if func_name in stored_ids
+        ]
+        upserts = {}
+        for func_name in changed:
+            if func_name not in function_map:
+                continue
+            text = self.format_func_embedding(function_map[func_name])
+            stored_id = stored_ids.pop(func_name, None)
+            if stored_id == self.get_point_id(func_name, text):
+                continue
+            if stored_id is not None:
+                deletes.append(stored_id)
+            upserts[func_name] = text
+        return IndexChanges(
+            upserts=upserts,
+            deletes=deletes,
+            unchanged=len(function_map) - len(upserts),
+        )
+
+    @staticmethod
+    def format_func_embedding(func: Function) -> str:
+        return func.name.replace("_", " ") + " - " + func.description
+
+    def get_fingerprint(self, text: str) -> str:
+        return hashlib.sha256(
+            f"{self.embeddings_model}\0{text}".encode("utf-8")
+        ).hexdigest()
+
+    def get_point_id(self, func_name: str, text: str) -> str:
+        """Stable point id derived from the function name and a fingerprint of
+        its embedded content, so unchanged functions keep their ids."""
+        return str(
+            uuid.uuid5(uuid.NAMESPACE_URL, f"{func_name}:{self.get_fingerprint(text)}")
+        )
@@ -0,0 +1,138 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from sageai.utils.bm25_index import BM25Index, reciprocal_rank_fusion
+from sageai.utils.lru_cache import LRUCache
+from sageai.utils.token_utilities import select_by_token_budget
+
+
+class BaseVectorDB:
+    """State and synchronous search steps shared by `AbstractVectorDB` and
+    `AbstractAsyncVectorDB`, which only differ in how they embed and search."""
+
+    def __init__(self):
+        from sageai.config import get_registry
+
+        self.registry = get_registry()
+        config = self.registry.config
+        self.function_map = self.registry.function_map
+        self.hooks = self.registry.hooks
+        self.query_embeddings_cache = LRUCache(
+            config.query_embeddings_cache_size,
+            ttl=config.query_embeddings_cache_ttl,
+        )
+        self.hybrid_search = config.hybrid_search
+        self.lexical_confidence_threshold = config.lexical_confidence_threshold
+        self.lexical_index: Optional[Tuple[Dict[str, Any], BM25Index]] = None
+        self.hybrid_search_stats = dict(lexical=0, fused=0)
+        self.function_token_budget = config.function_token_budget
+        self.function_min_score = config.function_min_score
+
+    def get_function_map(
+        self, function_map: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        return self.function_map if function_map is None else function_map
+
+    def get_cached_query_embeddings(
+        self, queries: List[str]
+    ) -> Tuple[List[Optional[List[float]]], List[str]]:
+        """Returns the cached embedding of each query, None on a miss, and the
+        distinct queries missing from the cache."""
+        embeddings = [self.query_embeddings_cache.get(query) for query in queries]
+        missing = list(
+            dict.fromkeys(
+                query
+                for query, embedding in zip(queries, embeddings)
+                if embedding is None
+            )
+        )
+        return embeddings, missing
+
+    def merge_query_embeddings(
+        self,
+        queries: List[str],
+        embeddings: List[Optional[List[float]]],
+        missing: List[str],
+        new_embeddings: List[List[float]],
+    ) -> List[List[float]]:
+        """Caches the embeddings of the `missing` queries and fills them in."""
+        embedded = dict(zip(missing, new_embeddings))
+        for query, embedding in embedded.items():
+            self.query_embeddings_cache.set(query, embedding)
+        return [
+            embedded[query] if embedding is None else embedding
+            for query, embedding in zip(queries, embeddings)
+        ]
+
+    def format_search_result(
+        self,
+        *,
+        function_names: List[str],
+        function_map: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        function_map = self.get_function_map(function_map)
+        potential_functions = [
+            function_map[func_name].parameters
+            for func_name in function_names
+            if func_name in function_map
+        ]
+        return potential_functions
+
+    def select_search_result(
+        self, function_names: List[str], function_map: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """Keeps ranked functions while their definitions fit in
+        `function_token_budget`, and formats them."""
+        if self.function_token_budget is not None:
+            function_names = select_by_token_budget(
+                function_names, function_map, self.function_token_budget
+            )
+        return self.format_search_result(
+            function_names=function_names, function_map=function_map
+        )
+
+    def is_plain_search(self) -> bool:
+        """Whether searches are plain vector searches, which can be batched."""
+        return (
+            not self.hybrid_search
+            and self.function_min_score is None
+            and self.function_token_budget is None
+        )
+
+    def search_lexical(
+        self, *, query: str, top_n: int, function_map: Dict[str, Any]
+    ) -> Tuple[List[str], bool]:
+        """Returns the BM25 ranking of `top_n` candidates, and whether the
+        lexical match is decisive enough to skip the vector search."""
+        lexical_results, confidence = self.get_lexical_index(function_map).search(
+            query, top_n
+        )
+        threshold = self.lexical_confidence_threshold
+        decisive = threshold is not None and confidence >= threshold
+        self.hybrid_search_stats["lexical" if decisive else "fused"] += 1
+        return [name for name, _ in lexical_results], decisive
+
+    @staticmethod
+    def fuse_rankings(
+        vector_names: List[str], lexical_names: List[str], top_n: int
+    ) -> List[str]:
+        return reciprocal_rank_fusion([vector_names, lexical_names], top_n=top_n)
+
+    def filter_min_score(self, scored: List[Tuple[str, Optional[float]]]) -> List[str]:
+        return [
+            func_name
+            for func_name, score in scored
+            if score is None or score >= self.function_min_score
+        ]
+
+    def get_lexical_index(self, function_map: Dict[str, Any]) -> BM25Index:
+        """BM25 index of function names and descriptions, rebuilt whenever a
+        different function map is passed in, e.g. after a hot reload."""
+        if self.lexical_index is None or self.lexical_index[0] is not function_map:
+            index = BM25Index(
+                {
+                    func_name: func_name.replace("_", " ") + " " + func.description
+                    for func_name, func in function_map.items()
+                }
+            )
+            self.lexical_index = (function_map, index)
+        return self.lexical_index[1]
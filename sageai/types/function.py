@@ -1,7 +1,11 @@
-from typing import Any, Callable, Dict, List, Type
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Type
 
 from pydantic import BaseModel
 
+from sageai.types.execution_mode import ExecutionMode
+from sageai.types.invocation_plan import InvocationPlan
+from sageai.types.semantic_cache_mode import SemanticCacheMode
 from sageai.utils.inspection_utilities import get_input_parameter_type
 from sageai.utils.model_utilities import (
     get_array_item_type,
@@ -12,6 +16,7 @@ from sageai.utils.model_utilities import (
     is_enum_array,
     is_optional,
 )
+from sageai.utils.token_utilities import count_schema_tokens
 
 
 class Function(BaseModel):
@@ -22,12 +27,31 @@ class Function(BaseModel):
     # generated from input
     name: str
     parameters: Dict[str, Any]
+    token_count: int
     input_type: Type[BaseModel]
+    plan: InvocationPlan
+
+    # optional
+    semantic_cache: Optional[SemanticCacheMode] = None
+    cache_ttl: Optional[float] = None
+    max_entries: Optional[int] = None
+    max_concurrency: Optional[int] = None
+    timeout: Optional[float] = None
+    execution_mode: ExecutionMode = ExecutionMode.THREAD
+
+    # set when loaded from the functions directory
+    source_path: Optional[str] = None
 
     def __init__(
         self,
         function: Callable,
         description: str,
+        semantic_cache: Optional[SemanticCacheMode] = None,
+        cache_ttl: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        execution_mode: ExecutionMode = ExecutionMode.THREAD,
     ) -> None:
         name = function.__name__
         input_parameter_type = get_input_parameter_type(function)
@@ -42,7 +66,15 @@ class Function(BaseModel):
             description=description,
             name=name,
             parameters=formatted_parameters,
+            token_count=count_schema_tokens(formatted_parameters),
             input_type=input_parameter_type,
+            plan=InvocationPlan.compile(function, input_parameter_type),
+            semantic_cache=semantic_cache,
+            cache_ttl=cache_ttl,
+            max_entries=max_entries,
+            max_concurrency=max_concurrency,
+            timeout=timeout,
+            execution_mode=execution_mode,
         )
 
     @staticmethod
@@ -101,5 +133,28 @@ class Function(BaseModel):
     def __call__(self, *args, **kwargs):
         return self.function(*args, **kwargs)
 
+    def invoke(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Validates the arguments, calls the function and serializes its output."""
+        return self.invoke_validated(self.plan.validate_input(args))
+
+    def invoke_validated(self, func_args: BaseModel) -> Dict[str, Any]:
+        plan = self.plan
+        result = self.function(func_args)
+        if plan.is_async:
+            result = asyncio.run(result)
+        return plan.serialize_output(result)
+
+    async def ainvoke(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Async `invoke`. Sync functions run in a worker thread."""
+        return await self.ainvoke_validated(self.plan.validate_input(args))
+
+    async def ainvoke_validated(self, func_args: BaseModel) -> Dict[str, Any]:
+        plan = self.plan
+        if plan.is_async:
+            result = await self.function(func_args)
+        else:
+            result = await asyncio.to_thread(self.function, func_args)
+        return plan.serialize_output(result)
+
     def __str__(self):
         return f"{self.name}: {self.description}"
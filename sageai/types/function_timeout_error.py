@@ -0,0 +1,10 @@
+class FunctionTimeoutError(TimeoutError):
+    """A function didn't finish within its timeout, including the time spent
+    waiting for a worker or for a slot under its `max_concurrency`."""
+
+    error_type = "timeout"
+
+    def __init__(self, name: str, timeout: float):
+        super().__init__(f"Function {name} timed out after {timeout}s.")
+        self.name = name
+        self.timeout = timeout
@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class IndexMode(str, Enum):
+    FULL = "FULL"
+    INCREMENTAL = "INCREMENTAL"
@@ -0,0 +1,73 @@
+import inspect
+from enum import Enum
+from typing import Any, Callable, Dict, Optional, Type, get_type_hints
+
+from pydantic import BaseModel
+from pydantic.fields import SHAPE_SINGLETON
+
+FLAT_FIELD_TYPES = (str, int, float, bool, bytes, Enum, type(None))
+
+
+class InvocationPlan(BaseModel):
+    """Everything `run_function` needs to call a function, resolved once when
+    the `Function` is created instead of on every call."""
+
+    input_type: Type[BaseModel]
+    output_type: Optional[Any]
+    is_async: bool
+    validate_input: Callable[[Dict[str, Any]], BaseModel]
+    serialize_output: Callable[[Any], Dict[str, Any]]
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    @classmethod
+    def compile(
+        cls, function: Callable, input_type: Type[BaseModel]
+    ) -> "InvocationPlan":
+        output_type = get_return_type(function)
+        return cls(
+            input_type=input_type,
+            output_type=output_type,
+            is_async=inspect.iscoroutinefunction(function),
+            validate_input=input_type.parse_obj,
+            serialize_output=get_output_serializer(output_type),
+        )
+
+
+def get_return_type(function: Callable) -> Optional[Any]:
+    try:
+        return get_type_hints(function).get("return")
+    except Exception:
+        annotation = inspect.signature(function).return_annotation
+        return None if annotation is inspect.Signature.empty else annotation
+
+
+def is_flat_model(model: Type[BaseModel]) -> bool:
+    """Whether `.dict()` of the model is equal to a shallow copy of its
+    `__dict__`, i.e. no field can hold a model or a container."""
+    if model.dict is not BaseModel.dict:
+        return False
+    return all(
+        field.shape == SHAPE_SINGLETON
+        and isinstance(field.type_, type)
+        and issubclass(field.type_, FLAT_FIELD_TYPES)
+        for field in model.__fields__.values()
+    )
+
+
+def get_output_serializer(output_type: Optional[Any]) -> Callable[[Any], Dict]:
+    def serialize(result: Any) -> Dict[str, Any]:
+        return result.dict()
+
+    if not (isinstance(output_type, type) and issubclass(output_type, BaseModel)):
+        return serialize
+    if not is_flat_model(output_type):
+        return serialize
+
+    def serialize_flat(result: Any) -> Dict[str, Any]:
+        if type(result) is output_type:
+            return dict(result.__dict__)
+        return result.dict()
+
+    return serialize_flat
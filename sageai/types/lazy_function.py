@@ -0,0 +1,71 @@
+from threading import Lock
+from typing import Any, Dict, Optional
+
+from sageai.types.execution_mode import ExecutionMode
+from sageai.types.semantic_cache_mode import SemanticCacheMode
+from sageai.utils.file_utilities import load_function_from_file
+
+
+class LazyFunction:
+    """Stand-in for a `Function` built from its manifest entry. The name,
+    description and parameters are available right away, while the module in
+    `source_path` is only imported the first time the function is used."""
+
+    def __init__(
+        self,
+        *,
+        name: str,
+        description: str,
+        parameters: Dict[str, Any],
+        token_count: int,
+        source_path: str,
+        module_name: str,
+        semantic_cache: Optional[SemanticCacheMode] = None,
+        execution_mode: ExecutionMode = ExecutionMode.THREAD,
+    ):
+        self.name = name
+        self.description = description
+        self.parameters = parameters
+        self.token_count = token_count
+        self.semantic_cache = semantic_cache
+        self.execution_mode = execution_mode
+        self.source_path = source_path
+        self.module_name = module_name
+        self._function = None
+        self._lock = Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._function is not None
+
+    def load(self):
+        if self._function is None:
+            with self._lock:
+                if self._function is None:
+                    function = load_function_from_file(
+                        self.module_name, self.source_path
+                    )
+                    if function.name != self.name:
+                        raise Exception(
+                            f"Function {self.source_path} was renamed from "
+                            f"{self.name} to {function.name}, rebuild the manifest"
+                        )
+                    self._function = function
+        return self._function
+
+    def invoke(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        return self.load().invoke(args)
+
+    async def ainvoke(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        return await self.load().ainvoke(args)
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+    def __getattr__(self, item: str) -> Any:
+        if item.startswith("_"):
+            raise AttributeError(item)
+        return getattr(self.load(), item)
+
+    def __str__(self):
+        return f"{self.name}: {self.description}"
@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class SemanticCacheMode(str, Enum):
+    ARGS = "ARGS"
+    RESULT = "RESULT"
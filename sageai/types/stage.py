@@ -0,0 +1,12 @@
+from enum import Enum
+
+
+class Stage(str, Enum):
+    CHAT = "CHAT"
+    SEARCH = "SEARCH"
+    QUERY_EMBEDDING = "QUERY_EMBEDDING"
+    COMPLETION = "COMPLETION"
+    PARSE_ARGUMENTS = "PARSE_ARGUMENTS"
+    RUN_FUNCTION = "RUN_FUNCTION"
+    VALIDATION = "VALIDATION"
+    EXECUTION = "EXECUTION"
@@ -0,0 +1,9 @@
+from enum import Enum
+
+
+class StreamEventType(str, Enum):
+    FUNCTION_NAME = "FUNCTION_NAME"
+    ARGUMENTS_DELTA = "ARGUMENTS_DELTA"
+    ARGUMENTS_COMPLETE = "ARGUMENTS_COMPLETE"
+    FUNCTION_RESULT = "FUNCTION_RESULT"
+    DONE = "DONE"
@@ -0,0 +1,42 @@
+import itertools
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+
+def iter_batches(
+    items: Iterable[Any], batch_size: int
+) -> Iterator[List[Tuple[int, Any]]]:
+    """Lazily splits `items` into lists of up to `batch_size` (index, item)
+    pairs, so large or generated inputs are never materialized at once."""
+    if batch_size < 1:
+        raise Exception("Batch size must be at least 1.")
+    iterator = enumerate(items)
+    while True:
+        batch = list(itertools.islice(iterator, batch_size))
+        if len(batch) == 0:
+            return
+        yield batch
+
+
+class ResultsBuffer:
+    """Holds results keyed by their `index` until they can be released: in
+    index order, or as soon as they arrive when `ordered` is False."""
+
+    def __init__(self, *, ordered: bool):
+        self.ordered = ordered
+        self.results: Dict[int, Dict[str, Any]] = {}
+        self.next_index = 0
+
+    def add(self, result: Dict[str, Any]):
+        self.results[result["index"]] = result
+
+    def pop_ready(self) -> List[Dict[str, Any]]:
+        if not self.ordered:
+            ready = list(self.results.values())
+            self.results.clear()
+            return ready
+
+        ready = []
+        while self.next_index in self.results:
+            ready.append(self.results.pop(self.next_index))
+            self.next_index += 1
+        return ready
@@ -0,0 +1,90 @@
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """Okapi BM25 index over short documents, such as function names and
+    descriptions."""
+
+    def __init__(self, documents: Dict[str, str], *, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.names = list(documents.keys())
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+
+        lengths = []
+        for doc_index, text in enumerate(documents.values()):
+            tokens = tokenize(text)
+            lengths.append(len(tokens))
+            for term, frequency in Counter(tokens).items():
+                self.postings[term].append((doc_index, frequency))
+
+        self.lengths = lengths
+        self.average_length = sum(lengths) / len(lengths) if lengths else 0.0
+        self.idf = {
+            term: math.log(
+                1 + (len(lengths) - len(postings) + 0.5) / (len(postings) + 0.5)
+            )
+            for term, postings in self.postings.items()
+        }
+
+    def search(self, query: str, top_n: int) -> Tuple[List[Tuple[str, float]], float]:
+        """Returns up to `top_n` (name, score) pairs of documents sharing terms
+        with the query, best first, and a confidence in [0, 1] that the best
+        match is the right one.
+
+        The confidence is the best match's relative lead over the runner-up,
+        scaled by the share of query terms the best match contains, so a single
+        rare word matching one document is not enough on its own.
+        """
+        query_terms = tokenize(query)
+        scores: Dict[int, float] = defaultdict(float)
+        matched_terms: Dict[int, int] = defaultdict(int)
+        for term in set(query_terms):
+            postings = self.postings.get(term)
+            if postings is None:
+                continue
+            idf = self.idf[term]
+            for doc_index, frequency in postings:
+                length_norm = (
+                    1
+                    - self.b
+                    + self.b * self.lengths[doc_index] / (self.average_length or 1.0)
+                )
+                scores[doc_index] += (
+                    idf
+                    * frequency
+                    * (self.k1 + 1)
+                    / (frequency + self.k1 * length_norm)
+                )
+                matched_terms[doc_index] += 1
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        results = [(self.names[doc_index], score) for doc_index, score in ranked]
+        if len(ranked) == 0:
+            return [], 0.0
+
+        best_index, best_score = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        lead = (best_score - runner_up) / best_score if best_score > 0 else 0.0
+        coverage = matched_terms[best_index] / len(set(query_terms))
+        return results[:top_n], lead * coverage
+
+
+def reciprocal_rank_fusion(
+    rankings: List[List[str]], *, top_n: int, k: int = 60
+) -> List[str]:
+    """Merges rankings by summing 1 / (k + rank) for every list a name is in."""
+    scores: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, name in enumerate(ranking):
+            scores[name] += 1 / (k + rank + 1)
+    return sorted(scores, key=lambda name: scores[name], reverse=True)[:top_n]
@@ -0,0 +1,136 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from logging import Logger
+from typing import Awaitable, Callable, List, Optional
+
+EmbedBatch = Callable[[List[str]], List[List[float]]]
+AsyncEmbedBatch = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+
+def chunk_texts(texts: List[str], batch_size: int) -> List[List[str]]:
+    if batch_size < 1:
+        raise Exception("Embeddings batch size must be at least 1.")
+    return [texts[i : i + batch_size] for i in range(0, len(texts), batch_size)]
+
+
+def embed_in_batches(
+    embed_batch: EmbedBatch,
+    texts: List[str],
+    *,
+    batch_size: int,
+    concurrency: int,
+    max_retries: int,
+    logger: Logger,
+) -> List[List[float]]:
+    """Embeds texts in batches, running up to `concurrency` batches at once.
+    Failed batches are retried with exponential backoff, and the returned
+    embeddings are in the same order as `texts`.
+    """
+    if len(texts) == 0:
+        return []
+
+    batches = chunk_texts(texts, batch_size)
+
+    def run_batch(batch_index: int) -> List[List[float]]:
+        batch = batches[batch_index]
+        for attempt in range(max_retries + 1):
+            try:
+                embeddings = embed_batch(batch)
+                if len(embeddings) != len(batch):
+                    raise Exception(
+                        f"Expected {len(batch)} embeddings, got {len(embeddings)}."
+                    )
+                return embeddings
+            except Exception as e:
+                if attempt == max_retries:
+                    raise Exception(
+                        f"Embeddings batch {batch_index + 1}/{len(batches)} failed "
+                        f"after {attempt + 1} attempts: {e}"
+                    )
+                delay = min(0.5 * 2**attempt, 30)
+                logger.warning(
+                    f"Embeddings batch {batch_index + 1}/{len(batches)} failed "
+                    f"({e}), retrying in {delay:.1f}s"
+                )
+                time.sleep(delay)
+
+    start = time.perf_counter()
+    max_workers = max(1, min(concurrency, len(batches)))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(run_batch, range(len(batches))))
+
+    log_throughput(logger, len(texts), len(batches), max_workers, start)
+    return [embedding for batch in results for embedding in batch]
+
+
+async def embed_in_batches_async(
+    embed_batch: AsyncEmbedBatch,
+    texts: List[str],
+    *,
+    batch_size: int,
+    concurrency: int,
+    max_retries: int,
+    logger: Logger,
+) -> List[List[float]]:
+    """Async counterpart of `embed_in_batches`, bounding the number of
+    in-flight batches with a semaphore instead of a thread pool.
+    """
+    if len(texts) == 0:
+        return []
+
+    batches = chunk_texts(texts, batch_size)
+    max_concurrent = max(1, min(concurrency, len(batches)))
+    semaphore = asyncio.Semaphore(max_concurrent)
+
+    async def run_batch(batch_index: int) -> List[List[float]]:
+        batch = batches[batch_index]
+        for attempt in range(max_retries + 1):
+            try:
+                async with semaphore:
+                    embeddings = await embed_batch(batch)
+                if len(embeddings) != len(batch):
+                    raise Exception(
+                        f"Expected {len(batch)} embeddings, got {len(embeddings)}."
+                    )
+                return embeddings
+            except Exception as e:
+                if attempt == max_retries:
+                    raise Exception(
+                        f"Embeddings batch {batch_index + 1}/{len(batches)} failed "
+                        f"after {attempt + 1} attempts: {e}"
+                    )
+                delay = min(0.5 * 2**attempt, 30)
+                logger.warning(
+                    f"Embeddings batch {batch_index + 1}/{len(batches)} failed "
+                    f"({e}), retrying in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*[run_batch(i) for i in range(len(batches))])
+
+    log_throughput(logger, len(texts), len(batches), max_concurrent, start)
+    return [embedding for batch in results for embedding in batch]
+
+
+def merge_cached_embeddings(
+    cached: List[Optional[List[float]]], new_embeddings: List[List[float]]
+) -> List[List[float]]:
+    """Fills the cache misses (None) in `cached` with `new_embeddings`, in order."""
+    new_embeddings_iter = iter(new_embeddings)
+    return [
+        embedding if embedding is not None else next(new_embeddings_iter)
+        for embedding in cached
+    ]
+
+
+def log_throughput(
+    logger: Logger, num_texts: int, num_batches: int, concurrency: int, start: float
+):
+    elapsed = time.perf_counter() - start
+    logger.info(
+        f"Embedded {num_texts} texts in {num_batches} batches "
+        f"({concurrency} concurrent) in {elapsed:.2f}s "
+        f"({num_texts / max(elapsed, 1e-9):.1f} texts/s)"
+    )
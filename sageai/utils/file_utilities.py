@@ -1,4 +1,7 @@
+import hashlib
 import os
+import sys
+from functools import lru_cache
 from importlib import util
 from types import ModuleType
 from typing import List
@@ -7,13 +10,97 @@ from sageai.types.function import Function
 from sageai.utils.logger import get_logger
 
 
-def load_module_from_file(module_name: str, filepath: str) -> ModuleType:
+def load_module_from_file(
+    module_name: str, filepath: str, *, register: bool = False
+) -> ModuleType:
+    """Imports a file as a module. With `register`, the module is added to
+    `sys.modules`, so the classes it defines can be pickled."""
     spec = util.spec_from_file_location(module_name, filepath)
     module = util.module_from_spec(spec)
-    spec.loader.exec_module(module)
+    if register:
+        sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        if register and sys.modules.get(module_name) is module:
+            del sys.modules[module_name]
+        raise
     return module
 
 
+def get_function_module_name(module_name: str, filepath: str) -> str:
+    """Name a function module is registered under, unique to its file so
+    folders with the same name in different directories don't collide."""
+    path_hash = hashlib.sha256(os.path.abspath(filepath).encode("utf-8")).hexdigest()
+    return f"sageai_function__{module_name}_{path_hash[:12]}"
+
+
+@lru_cache(maxsize=None)
+def get_umask() -> int:
+    # Reading the umask sets it, so it is read once rather than racing with
+    # threads creating files.
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+def replace_file(tmp_path: str, path: str):
+    """Moves a file written with `tempfile.mkstemp` to `path`. mkstemp creates
+    files readable by their owner only, so the file first gets the permissions
+    `open` would have given it under the umask."""
+    os.chmod(tmp_path, 0o666 & ~get_umask())
+    os.replace(tmp_path, path)
+
+
+def load_function_from_file(module_name: str, filepath: str) -> Function:
+    function_module = load_module_from_file(
+        get_function_module_name(module_name, filepath), filepath, register=True
+    )
+
+    if not hasattr(function_module, "function"):
+        raise Exception(
+            f"Function {module_name} does not have a function attribute",
+        )
+
+    function = function_module.function
+    function.source_path = os.path.abspath(filepath)
+    return function
+
+
+def get_source_files(dirpath: str) -> List[str]:
+    """Python files of a function folder. A change to any of them invalidates
+    the function's manifest entry."""
+    return sorted(
+        os.path.join(dirpath, filename)
+        for filename in os.listdir(dirpath)
+        if filename.endswith(".py")
+    )
+
+
+def get_source_mtime(dirpath: str) -> float:
+    return max(os.path.getmtime(path) for path in get_source_files(dirpath))
+
+
+def get_source_hash(dirpath: str) -> str:
+    source_hash = hashlib.sha256()
+    for path in get_source_files(dirpath):
+        source_hash.update(os.path.basename(path).encode("utf-8"))
+        with open(path, "rb") as f:
+            source_hash.update(f.read())
+    return source_hash.hexdigest()
+
+
+def get_functions_fingerprint(logger, functions_directory_path: str) -> str:
+    """Hash of the function folders and the modification times of their
+    sources, which changes whenever a function is added, changed or removed."""
+    fingerprint = hashlib.sha256()
+    for dirpath in get_functions_directories(logger, functions_directory_path):
+        fingerprint.update(
+            f"{os.path.abspath(dirpath)}\0{get_source_mtime(dirpath)}\n".encode("utf-8")
+        )
+    return fingerprint.hexdigest()
+
+
 def get_functions_directories(
     logger,
     functions_directory_path: str = None,
@@ -31,13 +118,20 @@ def get_functions_directories(
     return sorted(function_directories)
 
 
-def generate_functions_map() -> dict[str, Function]:
-    from sageai.config import get_config
+def generate_functions_map(config=None) -> dict[str, Function]:
+    if config is None:
+        from sageai.config import get_config
 
-    config = get_config()
+        config = get_config()
     functions_directory_path = config.functions_directory
     log_level = config.log_level
     logger = get_logger("Utils", log_level)
+
+    if config.lazy_loading:
+        from sageai.services.manifest_service import ManifestService
+
+        return ManifestService.from_config(config, logger).generate_functions_map()
+
     available_functions = {}
 
     logger.info("Generating function map")
@@ -46,14 +140,8 @@ def generate_functions_map() -> dict[str, Function]:
     for dirpath in functions_directory:
         folder_name = os.path.basename(dirpath)
         function_file = os.path.join(dirpath, "function.py")
-        function_module = load_module_from_file(folder_name, function_file)
-
-        if not hasattr(function_module, "function"):
-            raise Exception(
-                f"Function {folder_name} does not have a function attribute",
-            )
-
-        available_functions[function_module.function.name] = function_module.function
+        function = load_function_from_file(folder_name, function_file)
+        available_functions[function.name] = function
 
     if len(available_functions) == 0:
         raise Exception("No functions found")
@@ -4,14 +4,19 @@ import os
 
 
 def get_user_package_path():
-    caller_frame = inspect.stack()[4]
-    caller_module = inspect.getmodule(caller_frame[0])
-
-    if caller_module is None or not hasattr(caller_module, "__file__"):
-        raise ValueError("Cannot determine the path of the caller's module")
-
-    module_path = os.path.abspath(caller_module.__file__)
-    return os.path.dirname(module_path)
+    """Returns the directory of the first module on the call stack that is not
+    part of sageai, i.e. the module that constructed SageAI."""
+    sageai_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    frame = inspect.currentframe()
+    while frame is not None:
+        module_file = frame.f_globals.get("__file__")
+        if module_file is not None:
+            module_path = os.path.abspath(module_file)
+            if not module_path.startswith(sageai_path + os.sep):
+                return os.path.dirname(module_path)
+        frame = frame.f_back
+
+    raise ValueError("Cannot determine the path of the caller's module")
 
 
 def inject_env_vars(**kwargs):
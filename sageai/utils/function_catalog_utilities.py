@@ -0,0 +1,59 @@
+import os
+import threading
+from typing import Dict, Tuple
+
+from sageai.services.function_catalog_service import FunctionCatalogService
+from sageai.utils.file_utilities import (
+    generate_functions_map,
+    get_functions_fingerprint,
+)
+from sageai.utils.logger import get_logger
+from sageai.utils.single_flight import SingleFlight
+
+_lock = threading.Lock()
+_catalogs: Dict[Tuple, FunctionCatalogService] = {}
+_loads = SingleFlight()
+
+
+def get_catalog_key(config) -> Tuple:
+    """The settings that make two configs load different function maps."""
+    return (
+        os.path.abspath(config.functions_directory),
+        config.lazy_loading,
+        config.manifest_path,
+    )
+
+
+def get_function_catalog(config) -> FunctionCatalogService:
+    """Returns the catalog of the config's functions directory, loading it only
+    if no instance has loaded the directory yet or its sources changed since.
+    Concurrent loads of the same directory are run once."""
+    key = get_catalog_key(config)
+    logger = get_logger("Utils", config.log_level)
+    fingerprint = get_functions_fingerprint(logger, config.functions_directory)
+
+    with _lock:
+        catalog = _catalogs.get(key)
+    if catalog is not None and catalog.fingerprint == fingerprint:
+        logger.info(f"Reusing the functions loaded from {key[0]}")
+        return catalog
+
+    def load() -> FunctionCatalogService:
+        loaded = FunctionCatalogService(generate_functions_map(config), fingerprint)
+        if catalog is not None:
+            # Embeddings are keyed by text, so those of unchanged functions
+            # carry over.
+            with catalog.lock:
+                loaded.embeddings = dict(catalog.embeddings)
+        with _lock:
+            _catalogs[key] = loaded
+        return loaded
+
+    return _loads.do((key, fingerprint), load)
+
+
+def clear_function_catalogs():
+    """Drops the loaded catalogs, e.g. to free their memory once the instances
+    using them are gone."""
+    with _lock:
+        _catalogs.clear()
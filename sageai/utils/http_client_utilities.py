@@ -0,0 +1,124 @@
+import asyncio
+import threading
+import weakref
+from typing import Dict, Tuple
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
+
+from sageai.services.rate_limiter_service import (
+    RateLimiterService,
+    aon_response,
+    on_response,
+)
+
+_lock = threading.Lock()
+_clients: Dict[Tuple, OpenAI] = {}
+_async_clients: Dict[
+    Tuple[int, Tuple], Tuple["weakref.ref[asyncio.AbstractEventLoop]", AsyncOpenAI]
+] = {}
+_rate_limiters: Dict[Tuple, RateLimiterService] = {}
+
+
+def get_client_key(config) -> Tuple:
+    """The settings that make two configs need different clients."""
+    return (
+        config.openai_key,
+        config.openai_base_url,
+        config.http_max_connections,
+        config.http_max_keepalive_connections,
+        config.http_keepalive_expiry,
+        config.http_timeout,
+        config.http_connect_timeout,
+        config.http2,
+    )
+
+
+def get_rate_limiter_key(config) -> Tuple:
+    """The settings that make two configs need different rate limiters."""
+    return (
+        config.openai_key,
+        config.openai_base_url,
+        config.chat_requests_per_minute,
+        config.chat_tokens_per_minute,
+        config.embeddings_requests_per_minute,
+        config.embeddings_tokens_per_minute,
+        config.openai_max_concurrency,
+        config.openai_min_concurrency,
+    )
+
+
+def get_http_settings(config) -> Dict:
+    return dict(
+        limits=httpx.Limits(
+            max_connections=config.http_max_connections,
+            max_keepalive_connections=config.http_max_keepalive_connections,
+            keepalive_expiry=config.http_keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(config.http_timeout, connect=config.http_connect_timeout),
+        http2=config.http2,
+        follow_redirects=True,
+    )
+
+
+def get_rate_limiter(config) -> RateLimiterService:
+    """Returns the rate limiter of a config, shared by its sync and async
+    clients since both draw on the same account limits."""
+    key = get_rate_limiter_key(config)
+    with _lock:
+        rate_limiter = _rate_limiters.get(key)
+        if rate_limiter is None:
+            rate_limiter = RateLimiterService.from_config(config)
+            _rate_limiters[key] = rate_limiter
+        return rate_limiter
+
+
+def get_openai_client(config) -> OpenAI:
+    """Returns the process-wide `OpenAI` client of a config, so every service
+    using the same settings shares one connection pool."""
+    key = get_client_key(config)
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            settings = get_http_settings(config)
+            client = OpenAI(
+                api_key=config.openai_key,
+                base_url=config.openai_base_url,
+                timeout=settings["timeout"],
+                http_client=httpx.Client(
+                    **settings, event_hooks={"response": [on_response]}
+                ),
+            )
+            _clients[key] = client
+        return client
+
+
+def get_async_openai_client(config) -> AsyncOpenAI:
+    """Async counterpart of `get_openai_client`, shared per running event loop
+    since pooled connections are tied to the loop that opened them. Clients of
+    closed loops are dropped."""
+    loop = asyncio.get_running_loop()
+    key = (id(loop), get_client_key(config))
+    with _lock:
+        drop_closed_loop_clients()
+        entry = _async_clients.get(key)
+        if entry is None or entry[0]() is not loop:
+            settings = get_http_settings(config)
+            client = AsyncOpenAI(
+                api_key=config.openai_key,
+                base_url=config.openai_base_url,
+                timeout=settings["timeout"],
+                http_client=httpx.AsyncClient(
+                    **settings, event_hooks={"response": [aon_response]}
+                ),
+            )
+            entry = (weakref.ref(loop), client)
+            _async_clients[key] = entry
+        return entry[1]
+
+
+def drop_closed_loop_clients():
+    for key, (loop_ref, _) in list(_async_clients.items()):
+        loop = loop_ref()
+        if loop is None or loop.is_closed():
+            del _async_clients[key]
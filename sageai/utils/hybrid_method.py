@@ -0,0 +1,15 @@
+from functools import partial, update_wrapper
+from typing import Any, Callable
+
+
+class hybridmethod:
+    """Method that can also be called on its class, in which case it receives
+    None instead of an instance. Keeps methods that used to be static callable
+    the old way."""
+
+    def __init__(self, func: Callable[..., Any]):
+        self.func = func
+        update_wrapper(self, func)
+
+    def __get__(self, instance, owner=None) -> Callable[..., Any]:
+        return update_wrapper(partial(self.func, instance), self.func)
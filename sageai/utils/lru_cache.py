@@ -0,0 +1,68 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Hashable, Optional
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe bounded cache with LRU eviction and an optional TTL in
+    seconds. A `max_size` of 0 disables caching."""
+
+    def __init__(self, max_size: int, ttl: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING:
+                expires_at, value = entry
+                if expires_at >= time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.max_size <= 0:
+            return
+        expires_at = (
+            time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+        )
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return dict(
+            size=len(self._entries),
+            max_size=self.max_size,
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            hit_rate=self.hits / lookups if lookups > 0 else 0.0,
+        )
@@ -0,0 +1,10 @@
+from typing import Dict
+
+
+def format_labels(labels: Dict[str, str]) -> str:
+    """Formats labels of a sample in the Prometheus text exposition format."""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in labels.items()
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
@@ -0,0 +1,74 @@
+import asyncio
+from concurrent.futures import Future
+from threading import Lock
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Runs concurrent calls with the same key only once. Callers arriving
+    while a call is in flight wait for it and get its result or exception."""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class LeaderCancelled(Exception):
+    """Set on an `AsyncSingleFlight` call whose leader was cancelled, so its
+    followers retry instead of being cancelled with it."""
+
+
+class AsyncSingleFlight:
+    """`SingleFlight` for coroutines running on one event loop. When the caller
+    running a call is cancelled, a waiting caller runs it again."""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._calls.get(key)
+        while future is not None:
+            try:
+                return await asyncio.shield(future)
+            except LeaderCancelled:
+                future = self._calls.get(key)
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await fn()
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.set_exception(LeaderCancelled())
+            future.exception()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Waiters re-raise the exception, mark it retrieved in case there
+            # are none.
+            future.exception()
+            raise
+        finally:
+            del self._calls[key]
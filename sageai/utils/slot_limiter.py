@@ -0,0 +1,80 @@
+import asyncio
+import threading
+from collections import deque
+from typing import Callable, Deque, Optional
+
+
+class SlotLimiter:
+    """Bounds concurrent calls to `maximum` slots, unbounded when None. Waiting
+    threads and coroutines are handed the freed slots in FIFO order."""
+
+    def __init__(self, maximum: Optional[int]):
+        self.maximum = float("inf") if maximum is None else maximum
+        self.in_flight = 0
+        self.waiters: Deque[Callable[[], None]] = deque()
+        self.lock = threading.Lock()
+
+    def has_slot(self) -> bool:
+        return self.in_flight + 1 <= self.maximum
+
+    def try_acquire(self, waiter: Callable[[], None]) -> bool:
+        """Takes a slot, or queues `waiter` to be called once a slot was taken
+        on its behalf."""
+        with self.lock:
+            if len(self.waiters) == 0 and self.has_slot():
+                self.in_flight += 1
+                return True
+            self.waiters.append(waiter)
+            return False
+
+    def remove_waiter(self, waiter: Callable[[], None]) -> bool:
+        with self.lock:
+            try:
+                self.waiters.remove(waiter)
+                return True
+            except ValueError:
+                return False
+
+    def release(self):
+        with self.lock:
+            self.in_flight -= 1
+            self.wake_waiters()
+
+    def wake_waiters(self):
+        while len(self.waiters) > 0 and self.has_slot():
+            self.in_flight += 1
+            self.waiters.popleft()()
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Waits for a slot, for at most `timeout` seconds when set, and returns
+        whether one was taken."""
+        event = threading.Event()
+        if self.try_acquire(event.set) or event.wait(timeout):
+            return True
+        # The slot may have been handed over right after the wait timed out.
+        return not self.remove_waiter(event.set)
+
+    async def aacquire(self):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def resolve():
+            if future.cancelled():
+                # The slot was handed to a waiter that is gone.
+                self.release()
+            else:
+                future.set_result(None)
+
+        def waiter():
+            loop.call_soon_threadsafe(resolve)
+
+        if self.try_acquire(waiter):
+            return
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()
+            else:
+                self.remove_waiter(waiter)
+            raise
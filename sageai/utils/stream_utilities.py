@@ -0,0 +1,148 @@
+import json
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional
+
+from sageai.types.stage import Stage
+from sageai.types.stream_event_type import StreamEventType
+
+
+class IncrementalJSONParser:
+    """Tracks nesting of a streamed JSON object or array, so a caller knows the
+    moment the value is complete without re-parsing the buffer on every chunk.
+    """
+
+    def __init__(self):
+        self.chunks: List[str] = []
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.started = False
+        self.complete = False
+
+    def feed(self, chunk: str) -> bool:
+        self.chunks.append(chunk)
+        for char in chunk:
+            if self.complete:
+                break
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == "\\":
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in "{[":
+                self.started = True
+                self.depth += 1
+            elif char in "}]":
+                self.depth -= 1
+                if self.started and self.depth == 0:
+                    self.complete = True
+        return self.complete
+
+    @property
+    def text(self) -> str:
+        return "".join(self.chunks)
+
+    def value(self) -> Any:
+        text = self.text.strip()
+        return json.loads(text) if text else {}
+
+
+class StreamedFunctionCalls:
+    """Accumulates function call deltas of a streamed completion, for both the
+    functions and the tools API, and turns them into stream events. With
+    `hooks`, parsing each call's arguments is a `PARSE_ARGUMENTS` stage."""
+
+    def __init__(self, hooks=None):
+        self.hooks = hooks
+        self.calls: Dict[int, Dict[str, Any]] = {}
+        self.parsers: Dict[int, IncrementalJSONParser] = {}
+        self.named = set()
+
+    def feed(self, delta) -> List[Dict[str, Any]]:
+        events = []
+        if getattr(delta, "tool_calls", None):
+            for tool_call in delta.tool_calls:
+                function = tool_call.function
+                events.extend(
+                    self.feed_call(
+                        tool_call.index,
+                        tool_call.id,
+                        function.name if function else None,
+                        function.arguments if function else None,
+                    )
+                )
+        elif getattr(delta, "function_call", None):
+            events.extend(
+                self.feed_call(
+                    0, None, delta.function_call.name, delta.function_call.arguments
+                )
+            )
+        return events
+
+    def feed_call(
+        self,
+        index: int,
+        call_id: Optional[str],
+        name: Optional[str],
+        arguments: Optional[str],
+    ) -> List[Dict[str, Any]]:
+        events = []
+        if index not in self.calls:
+            self.calls[index] = dict(id=call_id, name="")
+            self.parsers[index] = IncrementalJSONParser()
+
+        call = self.calls[index]
+        if call_id:
+            call["id"] = call_id
+        if name:
+            call["name"] += name
+        if call["name"] and index not in self.named:
+            self.named.add(index)
+            events.append(
+                dict(
+                    type=StreamEventType.FUNCTION_NAME,
+                    index=index,
+                    id=call["id"],
+                    name=call["name"],
+                )
+            )
+
+        parser = self.parsers[index]
+        if arguments and not parser.complete:
+            events.append(
+                dict(type=StreamEventType.ARGUMENTS_DELTA, index=index, delta=arguments)
+            )
+            if parser.feed(arguments):
+                events.append(self.complete_call(index))
+        return events
+
+    def finish(self) -> List[Dict[str, Any]]:
+        """Completes calls whose arguments never closed, once the stream ends."""
+        return [
+            self.complete_call(index)
+            for index, call in sorted(self.calls.items())
+            if "args" not in call
+        ]
+
+    def complete_call(self, index: int) -> Dict[str, Any]:
+        call = self.calls[index]
+        parser = self.parsers[index]
+        stage = (
+            nullcontext()
+            if self.hooks is None
+            else self.hooks.stage(Stage.PARSE_ARGUMENTS, function=call["name"])
+        )
+        try:
+            with stage:
+                call["args"] = parser.value()
+        except json.JSONDecodeError as e:
+            call["args"] = parser.text
+            call["error"] = f"Invalid function arguments: {e}"
+        return dict(type=StreamEventType.ARGUMENTS_COMPLETE, index=index, **call)
+
+    def ordered_calls(self) -> List[Dict[str, Any]]:
+        return [call for _, call in sorted(self.calls.items())]
@@ -0,0 +1,95 @@
+import json
+import math
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Union
+
+from sageai.types.log_level import LogLevel
+from sageai.utils.logger import get_logger
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - optional dependency
+    tiktoken = None
+
+# Encoding of the chat models that support function calling.
+ENCODING_NAME = "cl100k_base"
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=1)
+def get_encoding():
+    """The tiktoken encoding, or None when tiktoken isn't installed or can't
+    load it, e.g. when its BPE file isn't cached on an offline host."""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding(ENCODING_NAME)
+    except Exception as e:
+        logger = get_logger("Utils", LogLevel.WARNING)
+        logger.warning(
+            f"Failed to load the {ENCODING_NAME} tiktoken encoding, estimating "
+            f"tokens from the number of characters instead: {e}"
+        )
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Counts tokens with tiktoken when it is available, and otherwise
+    estimates them at one token per four characters."""
+    encoding = get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def count_schema_tokens(parameters: Dict[str, Any]) -> int:
+    """Tokens of a function definition as sent to the chat endpoint."""
+    return count_tokens(json.dumps(parameters, separators=(",", ":")))
+
+
+def estimate_chat_tokens(
+    messages: List[Dict[str, Any]],
+    *,
+    functions: Optional[List[Dict[str, Any]]] = None,
+    tools: Optional[List[Dict[str, Any]]] = None,
+    max_tokens: Optional[int] = None,
+    function_tokens: Optional[int] = None,
+) -> int:
+    """Estimates the tokens a chat completion counts against a tokens per
+    minute limit: the prompt, its function definitions and `max_tokens`.
+    `function_tokens`, e.g. summed from `Function.token_count`, saves counting
+    the definitions again. Unset arguments may be passed as OpenAI's falsy
+    `NOT_GIVEN`."""
+    tokens = sum(
+        count_tokens(str(message.get("content") or "")) + 4 for message in messages
+    )
+    if function_tokens is None:
+        definitions = list(functions or []) + [tool["function"] for tool in tools or []]
+        function_tokens = sum(
+            count_schema_tokens(definition) for definition in definitions
+        )
+    return tokens + function_tokens + (max_tokens or 0)
+
+
+def estimate_embedding_tokens(texts: Union[str, List[str]]) -> int:
+    if isinstance(texts, str):
+        return count_tokens(texts)
+    return sum(count_tokens(text) for text in texts if isinstance(text, str))
+
+
+def select_by_token_budget(
+    function_names: List[str], function_map: Dict[str, Any], budget: int
+) -> List[str]:
+    """Keeps ranked functions, best first, while their definitions fit in
+    `budget` tokens. Functions that don't fit are skipped in favour of smaller
+    lower-ranked ones, and the best function is always kept. Names missing from
+    `function_map` are dropped."""
+    selected, spent = [], 0
+    for func_name in function_names:
+        if func_name not in function_map:
+            continue
+        tokens = function_map[func_name].token_count
+        if spent + tokens <= budget or len(selected) == 0:
+            selected.append(func_name)
+            spent += tokens
+    return selected